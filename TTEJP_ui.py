@@ -5,12 +5,12 @@ JRec-IN Portal爬虫 - Streamlit界面
 
 import streamlit as st
 import pandas as pd
-import json
 import os
 import sys
 import time
 from datetime import datetime
-from jrecin_scraper import *
+from jrecin_corpus import CorpusTable
+from jrecin_store import JOB_STORE_FILE, URL_STORE_FILE, JobStore, iter_json_list
 
 # import subprocess
 # import importlib.util
@@ -64,6 +64,11 @@ mode_map = {
 default_keywords = "理論経済学 経済学説 経済思想 経済政策"
 keywords = st.sidebar.text_area("Keywords (with space in between)", default_keywords)
 
+# 查询集模式：每行一组关键词，并发爬取并跨查询去重
+use_query_set = st.sidebar.checkbox("Query set (one keyword group per line)", value=False,
+                                    help="Crawl each line as a separate query under one shared rate limit and "
+                                         "deduplicate positions across all queries.")
+
 # 最大页数设置
 max_pages = st.sidebar.slider("Max crawling pages", 1, 30, 10)
 
@@ -93,6 +98,7 @@ if execution:
     # 准备运行参数
     mode = mode_map[run_mode]
     jobs_param = None if use_all_jobs else max_jobs
+    queries = [line.strip() for line in keywords.splitlines() if line.strip()] if use_query_set else None
 
     # 更新状态
     status_placeholder.info(f"Running on: {run_mode}, Keywords: {keywords}, Max pages: {max_pages}")
@@ -106,7 +112,8 @@ if execution:
                     max_jobs=jobs_param,
                     keywords=keywords,
                     mode=mode,
-                    test_optimal=test_mode)
+                    test_optimal=test_mode,
+                    queries=queries)
 
         # 计算运行时间
         end_time = time.time()
@@ -128,16 +135,21 @@ st.markdown("#### List of new positions")
 all_urls_file = 'jrecin_data/all_job_urls.json'
 new_urls_file = 'jrecin_data/new_job_urls.json'
 
+
+@st.cache_data
+def load_url_list(path, modified_time):
+    """读取URL列表为DataFrame；以文件修改时间为缓存键，文件没有变化时界面交互不重新读取"""
+    return pd.DataFrame(iter_json_list(path))
+
+
 if os.path.exists(new_urls_file):
     try:
-        with open(new_urls_file, 'r', encoding='utf-8-sig') as f:
-            all_urls = json.load(f)
+        # 逐条读取新增URL列表并转换为DataFrame
+        url_df = load_url_list(new_urls_file, os.path.getmtime(new_urls_file))
 
         # 显示URL总数
-        st.info(f"A total of {len(all_urls)} position detected.")
+        st.info(f"A total of {len(url_df)} position detected.")
 
-        # 将URL列表转换为DataFrame并显示
-        url_df = pd.DataFrame(all_urls)
         st.dataframe(
             url_df,width=None,use_container_width=True,
             column_config={
@@ -153,23 +165,54 @@ if os.path.exists(new_urls_file):
 else:
     st.warning("URL list file does not exist, please run the crawler to collect URLs first.")
 
+# Current
+st.markdown("#### Current open positions")
+
+
+@st.cache_resource
+def corpus_frame_cache():
+    """跨界面交互保留的当前职位表DataFrame和它的版本号"""
+    return {}
+
+
+def current_corpus_frame():
+    """当前职位表的DataFrame：版本号没有变化时直接使用缓存，变化时只读取变化过的职位"""
+    cache = corpus_frame_cache()
+    corpus = CorpusTable()
+    try:
+        if corpus.version != cache.get('version'):
+            cache['frame'], cache['version'] = corpus.frame(cache.get('frame'), cache.get('version'))
+    finally:
+        corpus.close()
+    return cache['frame']
+
+
+corpus_df = current_corpus_frame()
+if len(corpus_df):
+    st.info(f"{len(corpus_df)} open position(s) with a future or unknown deadline.")
+    st.dataframe(
+        corpus_df, width=None, use_container_width=True,
+        column_config={"original_url": st.column_config.LinkColumn("Link")},
+    )
+else:
+    st.warning("No current positions yet, please run the crawler with detail processing first.")
+
 # All
 st.markdown("#### List of all positions")
 
-# 检查URL列表文件是否存在
-all_urls_file = 'jrecin_data/all_job_urls.json'
-new_urls_file = 'jrecin_data/new_job_urls.json'
-
-if os.path.exists(all_urls_file):
+# 所有出现过的职位保存在带索引的URL存储中，按页随机读取，不加载整个历史
+url_store = JobStore(URL_STORE_FILE)
+if len(url_store):
     try:
-        with open(all_urls_file, 'r', encoding='utf-8-sig') as f:
-            all_urls = json.load(f)
+        # 显示URL总数（只读取索引）
+        st.info(f"A total of {len(url_store)} position detected.")
 
-        # 显示URL总数
-        st.info(f"A total of {len(all_urls)} position detected.")
+        page_size = 200
+        page_count = (len(url_store) - 1) // page_size + 1
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
 
-        # 将URL列表转换为DataFrame并显示
-        url_df = pd.DataFrame(all_urls)
+        # 将当前页的URL记录转换为DataFrame并显示
+        url_df = pd.DataFrame(url_store.iter_slice((page_number - 1) * page_size, page_size))
 
         st.dataframe(
             url_df,width=None,use_container_width=True,
@@ -186,6 +229,111 @@ if os.path.exists(all_urls_file):
 else:
     st.warning("URL list file does not exist, please run the crawler to collect URLs first.")
 
+# Details
+st.markdown("#### Position details")
+
+# 按job_id从职位存储中随机读取单个职位的解析结果
+job_store = JobStore(JOB_STORE_FILE)
+if len(job_store):
+    selected_job_id = st.selectbox("Job ID", job_store.ids()[::-1])
+    if selected_job_id:
+        st.json(job_store.get(selected_job_id))
+else:
+    st.warning("No processed job details yet, please run the crawler with detail processing first.")
+
+# Search
+st.markdown("#### Search positions")
+
+
+@st.cache_resource
+def load_search_index():
+    """跨界面交互保留的检索索引（向量模型只加载一次）"""
+    from jrecin_search import SemanticIndex
+
+    return SemanticIndex()
+
+
+# 本地检索索引：自由文本查询或查找与某职位相似的职位
+search_query = st.text_input("Free-text query or job ID to find similar positions", "")
+if search_query:
+    search_index = load_search_index()
+    # 爬虫进程更新了索引文件时重新读取
+    search_index.refresh()
+    if job_store and search_query.strip() in job_store:
+        search_results = search_index.similar(search_query.strip(), 20)
+    else:
+        search_results = search_index.search(search_query, 20)
+
+    search_rows = []
+    for result_job_id, score in search_results:
+        record = job_store.get(result_job_id) or {}
+        search_rows.append({
+            "job_id": result_job_id,
+            "score": round(score, 3),
+            "title": record.get("基本信息", {}).get("position_title", ""),
+            "institution": record.get("基本信息", {}).get("institution", ""),
+            "deadline": record.get("基本信息", {}).get("application_deadline", ""),
+            "url": record.get("其他信息", {}).get("original_url", ""),
+        })
+    if search_rows:
+        st.dataframe(
+            pd.DataFrame(search_rows), width=None, use_container_width=True,
+            column_config={"url": st.column_config.LinkColumn("Link")},
+            hide_index=True,
+        )
+    else:
+        st.info("No matching positions.")
+
+# Duplicates
+st.markdown("#### Possible duplicate postings")
+
+# 近似重复（重新发布/交叉发布）的职位按最早的职位分组显示
+near_dup_file = 'jrecin_data/near_dup_index.json'
+if os.path.exists(near_dup_file):
+    from jrecin_dedup import NearDupIndex
+
+    duplicate_groups = NearDupIndex(near_dup_file).groups()
+    if duplicate_groups:
+        st.info(f"{len(duplicate_groups)} group(s) of near-duplicate positions detected.")
+        st.dataframe(
+            pd.DataFrame([{"job_id": canonical, "duplicates": ", ".join(job_ids)}
+                          for canonical, job_ids in duplicate_groups.items()]),
+            width=None, use_container_width=True, hide_index=True,
+        )
+    else:
+        st.info("No near-duplicate positions detected.")
+
+# Trends
+st.markdown("#### Trends")
+
+# 趋势统计在每次运行时增量更新，这里只读取汇总结果
+trends_file = 'jrecin_data/trends.json'
+if os.path.exists(trends_file):
+    from jrecin_trends import TrendAggregates
+
+    trends = TrendAggregates(trends_file)
+    st.markdown("New positions per week")
+    st.line_chart(pd.Series(trends.series(), name="positions"))
+
+    st.markdown("Tenure status per week")
+    st.bar_chart(pd.DataFrame(trends.series('tenure_status')).T.fillna(0))
+
+    trend_columns = st.columns(2)
+    with trend_columns[0]:
+        st.markdown("Top research fields")
+        st.bar_chart(pd.Series(trends.totals('research_field')).nlargest(15))
+        st.markdown("Institution types")
+        st.bar_chart(pd.Series(trends.totals('institution_type')))
+    with trend_columns[1]:
+        st.markdown("Annual salary (upper bound)")
+        salary_totals = trends.totals('salary')
+        salary_totals.pop('不明', None)
+        st.bar_chart(pd.Series(salary_totals).sort_index(key=lambda index: index.str[:-3].astype(int)))
+        st.markdown("Days from posting to deadline")
+        st.bar_chart(pd.Series(trends.totals('deadline_days')))
+else:
+    st.info("No trend data yet, please run the crawler with detail processing first.")
+
 # 底部信息
 st.markdown("---")
 st.markdown(f"Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -1,30 +1,135 @@
-import csv
-from datetime import datetime
+import json
+import os
+import time
+from datetime import date
+from itertools import islice
+
+from jrecin_archive import HtmlArchive
+from jrecin_config import ScraperConfig
+from jrecin_dedup import NearDupIndex, job_text
+from jrecin_http import http_errors
+from jrecin_output import BackgroundWriter, atomic_write_json, atomic_write_text
+from jrecin_normalize import ITAG_RE, TEACHING_RE, TENURE_RE, TRIAL_RE, normalize_text, parse_date, strip_label
+from jrecin_parse_cache import ParseCache, html_hash
+from jrecin_profile import stage
+from jrecin_record import JobRecord, write_json_list
+from jrecin_search import SemanticIndex
+from jrecin_store import JOB_STORE_FILE, URL_STORE_FILE, JobStore
 
 
 # 第二部分：获取并解析职位详情
-def fetch_job_details(session, job_url, job_id):
-    """获取职位详情页面"""
+def fetch_job_details(session, job_url, job_id, archive=None, writer=None):
+    """获取职位详情页面（请求头由会话提供）；提供writer（BackgroundWriter）时HTML文件在后台写出"""
     try:
         print(f"获取职位详情: {job_url}")
-        response = session.get(job_url, headers=headers)
+        response = session.get(job_url)
         response.raise_for_status()
 
-        # 保存详情页面
+        # 保存详情页面（html目录每次运行都会清空，历史版本压缩保存在归档中）
         file_path = f'jrecin_data/job_details/html/{job_id}.html'
-        with open(file_path, 'w', encoding='utf-8-sig') as f:
-            f.write(response.text)
+        if writer is not None:
+            writer.write_text(file_path, response.text, encoding='utf-8-sig')
+        else:
+            atomic_write_text(file_path, response.text, encoding='utf-8-sig')
+        if archive is not None:
+            archive.put(job_id, response.text)
 
         print(f"职位详情已保存至 {file_path}")
         return response.text
-    except requests.exceptions.RequestException as e:
+    except http_errors() as e:
         print(f"获取职位详情出错: {e}")
         return None
 
 
+# 详情页面和搜索结果卡片共有的摘要字段
+SUMMARY_FIELDS = ('institution', 'institution_type', 'update_date', 'application_deadline', 'location',
+                  'research_field', 'position_type', 'employment_type', 'tenure_status', 'trial_period')
+
+
+def parse_summary_fields(node):
+    """从详情页面或搜索结果卡片（BeautifulSoup节点）中提取机构、日期、地点、研究领域和雇佣信息，找不到的字段为空字符串"""
+    fields = dict.fromkeys(SUMMARY_FIELDS, '')
+
+    # 机构名称
+    institution_elem = node.find('p', class_=lambda c: c and 'orgModalLink' in c)
+    if institution_elem:
+        fields["institution"] = normalize_text(ITAG_RE.sub('', institution_elem.get_text(strip=True)))
+
+    # 机构类型
+    institution_type_elem = node.find('span', class_='tag_line')
+    if institution_type_elem:
+        fields["institution_type"] = normalize_text(institution_type_elem.get_text(strip=True))
+
+    # 日期信息
+    date_elements = node.find_all('span', string=lambda s: s and ('更新日' in s or '募集終了日' in s))
+    for date_elem in date_elements:
+        date_text = normalize_text(date_elem.get_text(strip=True))
+        if '更新日' in date_text:
+            fields["update_date"] = strip_label(date_text, '更新日')
+        elif '募集終了日' in date_text:
+            fields["application_deadline"] = strip_label(date_text, '募集終了日')
+
+    # 提取职位属性
+    # 工作地点
+    location_elem = node.find('p', string=lambda s: s and '勤務地' in s)
+    if location_elem:
+        location_text = strip_label(normalize_text(location_elem.get_text(strip=True)), '勤務地')
+        fields["location"] = location_text
+
+    # 研究领域
+    research_field_elem = node.find('p', string=lambda s: s and '研究分野' in s)
+    if research_field_elem:
+        research_field_text = strip_label(normalize_text(research_field_elem.get_text(strip=True)), '研究分野')
+        fields["research_field"] = research_field_text
+
+    # 职位类型和雇佣信息
+    position_elem = node.find('i', class_='fa-solid fa-briefcase')
+    if position_elem and position_elem.find_next('p'):
+        position_text = normalize_text(position_elem.find_next('p').get_text(strip=True))
+        # 尝试从文本中提取各种信息
+        position_parts = position_text.split(':')
+        if len(position_parts) >= 2:
+            fields["position_type"] = position_parts[0].strip()
+
+            employment_info = position_parts[1].strip()
+            info_parts = employment_info.split('-')
+
+            # 提取雇佣类型
+            if len(info_parts) >= 1:
+                fields["employment_type"] = info_parts[0].strip()
+
+            # 提取任期状态
+            tenure_match = TENURE_RE.search(employment_info)
+            if tenure_match:
+                fields["tenure_status"] = tenure_match.group(0)
+
+            # 提取试用期
+            trial_match = TRIAL_RE.search(employment_info)
+            if trial_match:
+                fields["trial_period"] = trial_match.group(0)
+
+    return fields
+
+
+# 解析器版本：修改 parse_job_details / parse_summary_fields 或其使用的正则的提取结果时加1，
+# 使解析缓存中旧版本的结果失效
+PARSER_VERSION = 1
+
+
+def deadline_active(application_deadline, today=None):
+    """根据截止日期判断职位是否有效（截止当天仍视为有效），日期无法解析时返回None"""
+    deadline_date = parse_date(application_deadline)
+    if deadline_date is None:
+        return None
+    return deadline_date >= (today or date.today())
+
+
 def parse_job_details(html_content, job_url, job_id):
     """解析职位详情页面，提取关键信息"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    from bs4 import BeautifulSoup
+
+    with stage('html_tree'):
+        soup = BeautifulSoup(html_content, 'html.parser')
 
     # 初始化结果字典
     job_data = {
@@ -67,80 +172,27 @@ def parse_job_details(html_content, job_url, job_id):
     # 职位标题
     title_elem = soup.find('h5', class_='card_title_min')
     if title_elem:
-        job_data["基本信息"]["position_title"] = title_elem.get_text(strip=True)
-
-    # 机构名称
-    institution_elem = soup.find('p', class_=lambda c: c and 'orgModalLink' in c)
-    if institution_elem:
-        job_data["基本信息"]["institution"] = re.sub(r'<i.*', '', institution_elem.get_text(strip=True))
-
-    # 机构类型
-    institution_type_elem = soup.find('span', class_='tag_line')
-    if institution_type_elem:
-        job_data["基本信息"]["institution_type"] = institution_type_elem.get_text(strip=True)
+        job_data["基本信息"]["position_title"] = normalize_text(title_elem.get_text(strip=True))
 
-    # 日期信息
-    date_elements = soup.find_all('span', string=lambda s: s and ('更新日' in s or '募集終了日' in s))
-    for date_elem in date_elements:
-        date_text = date_elem.get_text(strip=True)
-        if '更新日' in date_text:
-            job_data["基本信息"]["update_date"] = date_text.replace('更新日', '').replace(':', '').strip()
-        elif '募集終了日' in date_text:
-            job_data["基本信息"]["application_deadline"] = date_text.replace('募集終了日', '').replace(':', '').strip()
-
-    # 提取职位属性
-    # 工作地点
-    location_elem = soup.find('p', string=lambda s: s and '勤務地' in s)
-    if location_elem:
-        location_text = location_elem.get_text(strip=True).replace('勤務地 : ', '')
-        job_data["职位属性"]["location"] = location_text
-
-    # 研究领域
-    research_field_elem = soup.find('p', string=lambda s: s and '研究分野' in s)
-    if research_field_elem:
-        research_field_text = research_field_elem.get_text(strip=True).replace('研究分野 : ', '')
-        job_data["职位属性"]["research_field"] = research_field_text
-
-    # 职位类型和雇佣信息
-    position_elem = soup.find('i', class_='fa-solid fa-briefcase')
-    if position_elem and position_elem.find_next('p'):
-        position_text = position_elem.find_next('p').get_text(strip=True)
-        # 尝试从文本中提取各种信息
-        position_parts = position_text.split(':')
-        if len(position_parts) >= 2:
-            job_data["职位属性"]["position_type"] = position_parts[0].strip()
-
-            employment_info = position_parts[1].strip()
-            info_parts = employment_info.split('-')
-
-            # 提取雇佣类型
-            if len(info_parts) >= 1:
-                job_data["职位属性"]["employment_type"] = info_parts[0].strip()
-
-            # 提取任期状态
-            tenure_pattern = r'任期(あり|なし)|テニュアトラック'
-            tenure_match = re.search(tenure_pattern, employment_info)
-            if tenure_match:
-                job_data["职位属性"]["tenure_status"] = tenure_match.group(0)
-
-            # 提取试用期
-            trial_pattern = r'試用期間(あり|なし)'
-            trial_match = re.search(trial_pattern, employment_info)
-            if trial_match:
-                job_data["职位属性"]["trial_period"] = trial_match.group(0)
+    # 机构、日期、工作地点、研究领域和雇佣信息（与搜索结果卡片共用同一套提取规则）
+    summary = parse_summary_fields(soup)
+    for section in ("基本信息", "职位属性"):
+        for field in job_data[section]:
+            if field in summary:
+                job_data[section][field] = summary[field]
 
     # 提取薪资和工作条件
     # 薪资信息
     salary_elems = soup.find_all('p', string=lambda s: s and '年収' in s)
     for elem in salary_elems:
-        salary_text = elem.get_text(strip=True)
+        salary_text = normalize_text(elem.get_text(strip=True))
         if '年収' in salary_text:
-            job_data["薪资和工作条件"]["salary"] = salary_text.replace('年収 : ', '')
+            job_data["薪资和工作条件"]["salary"] = strip_label(salary_text, '年収')
 
     # 薪资说明
     salary_section = soup.find('p', class_='card_subTitle', string='給与')
     if salary_section and salary_section.find_next('p'):
-        salary_desc = salary_section.find_next('p').get_text(strip=True)
+        salary_desc = normalize_text(salary_section.find_next('p').get_text(strip=True))
         job_data["薪资和工作条件"]["salary_description"] = salary_desc
 
     # 工作时间说明
@@ -151,24 +203,23 @@ def parse_job_details(html_content, job_url, job_id):
         if next_elems:
             for elem in next_elems[0].find_all('p'):
                 work_time_desc += elem.get_text(strip=True) + " "
-        job_data["薪资和工作条件"]["working_hours_description"] = work_time_desc.strip()
+        job_data["薪资和工作条件"]["working_hours_description"] = normalize_text(work_time_desc)
 
     # 提取职位详情
     # 职位描述
     job_desc_elem = soup.find('p', class_='card_listTitle', string='仕事内容・職務内容')
     if job_desc_elem and job_desc_elem.find_next('p'):
-        job_data["职位详情"]["job_description"] = job_desc_elem.find_next('p').get_text(strip=True)
+        job_data["职位详情"]["job_description"] = normalize_text(job_desc_elem.find_next('p').get_text(strip=True))
 
         # 提取教学要求
-        teaching_pattern = r'担当科目：.*|教育負担：.*|授業：.*'
-        teaching_match = re.search(teaching_pattern, job_data["职位详情"]["job_description"])
+        teaching_match = TEACHING_RE.search(job_data["职位详情"]["job_description"])
         if teaching_match:
             job_data["职位详情"]["teaching_requirements"] = teaching_match.group(0)
 
     # 部门信息
     department_elem = soup.find('p', class_='card_listTitle', string='配属部署')
     if department_elem and department_elem.find_next('p'):
-        job_data["职位详情"]["department"] = department_elem.find_next('p').get_text(strip=True)
+        job_data["职位详情"]["department"] = normalize_text(department_elem.find_next('p').get_text(strip=True))
 
     # 资格要求
     qualifications_section = soup.find('p', class_='card_subTitle', string='応募資格')
@@ -176,7 +227,7 @@ def parse_job_details(html_content, job_url, job_id):
         quals_text = ""
         for elem in qualifications_section.find_next_siblings('ul')[0].find_all('p'):
             quals_text += elem.get_text(strip=True) + " "
-        job_data["职位详情"]["qualifications"] = quals_text.strip()
+        job_data["职位详情"]["qualifications"] = normalize_text(quals_text)
 
     # 申请方法
     application_section = soup.find('p', class_='card_subTitle', string='応募方法')
@@ -184,119 +235,196 @@ def parse_job_details(html_content, job_url, job_id):
         app_text = ""
         for elem in application_section.find_next_siblings('ul')[0].find_all('p'):
             app_text += elem.get_text(strip=True) + " "
-        job_data["职位详情"]["application_method"] = app_text.strip()
+        job_data["职位详情"]["application_method"] = normalize_text(app_text)
 
     # 提取其他信息
     # 备注
     notes_section = soup.find('p', class_='card_subTitle', string='備考')
     if notes_section and notes_section.find_next('div'):
-        job_data["其他信息"]["notes"] = notes_section.find_next('div').get_text(strip=True)
+        job_data["其他信息"]["notes"] = normalize_text(notes_section.find_next('div').get_text(strip=True))
 
     # 判断职位是否有效（基于当前日期和截止日期）
     if job_data["基本信息"]["application_deadline"]:
-        try:
-            # 假设日期格式为"YYYY年MM月DD日"
-            deadline_str = job_data["基本信息"]["application_deadline"]
-            # 将日期转换为datetime对象
-            deadline_parts = re.findall(r'\d+', deadline_str)
-            if len(deadline_parts) >= 3:
-                year, month, day = int(deadline_parts[0]), int(deadline_parts[1]), int(deadline_parts[2])
-                deadline_date = datetime(year, month, day)
-                current_date = datetime.now()
-                job_data["其他信息"]["is_active"] = (deadline_date >= current_date)
-        except Exception as e:
-            print(f"日期解析错误: {e}")
+        # 支持"YYYY年MM月DD日"和令和等和暦日期
+        is_active = deadline_active(job_data["基本信息"]["application_deadline"])
+        if is_active is not None:
+            job_data["其他信息"]["is_active"] = is_active
+        else:
+            print(f"日期解析错误: {job_data['基本信息']['application_deadline']}")
 
     return job_data
 
 
-def process_job_urls(urls, max_jobs=None):
-    """处理职位URL列表，获取并解析详情页面"""
-    session = requests.Session()
+def parse_job_details_cached(html_content, job_url, job_id, parse_cache=None):
+    """带缓存的 parse_job_details，返回 (job_data, 是否命中缓存)
+
+    缓存的结果只依赖页面内容和解析器版本：job_id和原始链接按本次参数填入，is_active按今天的日期重新计算
+    """
+    if parse_cache is None:
+        return parse_job_details(html_content, job_url, job_id), False
+
+    sha = html_hash(html_content)
+    job_data = parse_cache.get(sha)
+    if job_data is None:
+        job_data = parse_job_details(html_content, job_url, job_id)
+        parse_cache.put(sha, job_data)
+        return job_data, False
+
+    job_data["基本信息"]["job_id"] = job_id
+    job_data["其他信息"]["original_url"] = job_url
+    is_active = deadline_active(job_data["基本信息"]["application_deadline"])
+    job_data["其他信息"]["is_active"] = True if is_active is None else is_active
+    return job_data, True
+
+
+def save_job_data(job_data, job_store, near_dup=None, search_index=None, writer=None):
+    """保存一个解析结果：JSON文件、职位存储（索引由调用方统一保存），并登记近似重复和检索索引
+
+    writer: 可选的BackgroundWriter，提供时JSON文件在后台原子写出（之后不能再修改job_data）
+    """
+    job_id = job_data['基本信息']['job_id']
+    # 登记近似重复（重新发布/交叉发布）的职位
+    if near_dup is not None:
+        with stage('near_dup'):
+            near_dup.check(job_id, job_text(job_data))
+    # 增量加入本地检索索引
+    if search_index is not None:
+        with stage('search_index'):
+            search_index.add_job(job_data)
+
+    # 保存解析结果（索引在全部处理完后统一保存，中断时下次打开存储会补扫）
+    with stage('json_dump'):
+        json_path = f'jrecin_data/job_details/json/{job_id}.json'
+        if writer is not None:
+            writer.write_json(json_path, job_data)
+        else:
+            atomic_write_json(json_path, job_data)
+        job_store.put_many([job_data], sync=False)
+
+
+def process_job_urls(urls, max_jobs=None, journal=None, config=None, budget=None, attempted=None):
+    """处理职位URL列表（也可以是按需读取的迭代器），获取并解析详情页面，返回JobRecord列表
+
+    budget: 可选的TimeBudget；预计无法在预算内完成下一个职位时，剩余职位记入budget.deferred['job']
+    attempted: 可选的集合，加入本次取出的job_id（包括抓取失败和推迟的职位，不包括被max_jobs截断的职位）
+    """
+    config = config or ScraperConfig()
+    session = config.new_session()
+    job_store = JobStore(JOB_STORE_FILE)
+    archive = HtmlArchive()
+    near_dup = NearDupIndex()
+    search_index = SemanticIndex()
+    parse_cache = ParseCache(PARSER_VERSION)
+    # HTML和JSON文件在后台线程中批量原子写出，抓取循环不等待磁盘
+    writer = BackgroundWriter()
     all_job_data = []
 
-    # 限制处理的职位数量
+    # 限制处理的职位数量；URL来源可能是惰性迭代器，总数未知时只显示序号
+    total = len(urls) if hasattr(urls, '__len__') else None
     if max_jobs is not None:
-        urls = urls[:max_jobs]
-
-    for i, job in enumerate(urls, 1):
-        print(f"处理第 {i}/{len(urls)} 个职位 - {job['job_id']}")
-
-        # 获取职位详情页面
-        job_html = fetch_job_details(session, job['url'], job['job_id'])
-
-        if job_html:
-            # 解析职位详情
-            job_data = parse_job_details(job_html, job['url'], job['job_id'])
-
-            # 保存解析结果
-            with open(f'jrecin_data/job_details/json/{job["job_id"]}.json', 'w', encoding='utf-8-sig') as f:
-                json.dump(job_data, f, ensure_ascii=False, indent=2)
+        urls = islice(urls, max_jobs)
+        total = min(total, max_jobs) if total is not None else max_jobs
+    total_text = total if total is not None else '?'
+    urls = iter(urls)
 
-            all_job_data.append(job_data)
+    fetched = False
+    try:
+        for i, job in enumerate(urls, 1):
+            if attempted is not None:
+                attempted.add(job['job_id'])
+            # 断点日志中已完成的职位直接读取已保存的解析结果
+            json_path = f'jrecin_data/job_details/json/{job["job_id"]}.json'
+            if journal and journal.job_done(job['job_id']):
+                job_data = job_store.get(job['job_id'])
+                if job_data is None and os.path.exists(json_path):
+                    with open(json_path, 'r', encoding='utf-8-sig') as f:
+                        job_data = json.load(f)
+                if job_data is not None:
+                    all_job_data.append(JobRecord.from_dict(job_data))
+                    print(f"第 {i}/{total_text} 个职位已在断点日志中，跳过 - {job['job_id']}")
+                    continue
+
+            # 时间预算不足时停止抓取，剩余职位推迟到下次运行
+            if budget and not budget.can_afford('job'):
+                remaining = [job] + list(urls)
+                print(f"时间预算不足，{len(remaining)}个职位推迟到下次运行")
+                budget.defer('job', remaining)
+                break
+            job_start = time.monotonic()
 
             # 添加延迟，避免请求过快
-            if i < len(urls):
-                time.sleep(1)
-
-    # 保存所有职位数据
-    with open('jrecin_data/all_job_data.json', 'w', encoding='utf-8-sig') as f:
-        json.dump(all_job_data, f, ensure_ascii=False, indent=2)
+            if fetched:
+                with stage('interval'):
+                    time.sleep(config.job_interval)
+
+            print(f"处理第 {i}/{total_text} 个职位 - {job['job_id']}")
+
+            # 获取职位详情页面
+            with stage('fetch'):
+                job_html = fetch_job_details(session, job['url'], job['job_id'], archive=archive, writer=writer)
+
+            if job_html:
+                fetched = True
+                # 解析职位详情（页面内容和解析器都没有变化时直接使用缓存的结果）
+                with stage('parse'):
+                    job_data, cached = parse_job_details_cached(job_html, job['url'], job['job_id'], parse_cache)
+                # 结果与职位存储中的记录完全相同时不需要重写文件和索引
+                if not (cached and job_store.get(job['job_id']) == job_data):
+                    with stage('save'):
+                        save_job_data(job_data, job_store, near_dup, search_index, writer)
+
+                # 只在内存中保留紧凑的JobRecord，嵌套字典在写出后即可释放
+                all_job_data.append(JobRecord.from_dict(job_data))
+                if journal:
+                    journal.mark_job(job['job_id'])
+            if budget:
+                budget.record('job', time.monotonic() - job_start)
+    finally:
+        # 出错时也关闭HTTP客户端的连接
+        session.close()
+    with stage('flush_writes'):
+        writer.close()
+    with stage('save_indexes'):
+        job_store.save_index()
+        near_dup.save()
+        search_index.save()
+        parse_cache.close()
+    print(parse_cache.stats_text())
+
+    # 保存所有职位数据（格式不变，逐条写出）
+    with stage('write_all_json'):
+        write_json_list(all_job_data, 'jrecin_data/all_job_data.json')
 
     print(f"成功处理 {len(all_job_data)} 个职位详情")
     return all_job_data
 
 
-def save_to_csv(job_data_list, filename='jrecin_data/economic_jobs.csv', encoding='utf-8-sig'):
-    """将职位数据保存为CSV文件"""
-    if not job_data_list:
-        print("没有职位数据可保存")
-        return
-
-    # 准备CSV表头
-    fieldnames = [
-        "职位标题", "机构名称", "职位ID", "机构类型", "更新日期", "申请截止日期",
-        "工作地点", "研究领域", "职位类型", "雇佣类型", "任期状态", "试用期",
-        "薪资", "薪资说明", "工作时间说明",
-        "职位描述", "部门", "资格要求", "教学要求", "申请方法",
-        "备注", "是否有效", "原始链接"
-    ]
-
-    # 准备CSV数据
-    csv_data = []
-    for job in job_data_list:
-        row = {
-            "职位标题": job["基本信息"]["position_title"],
-            "机构名称": job["基本信息"]["institution"],
-            "职位ID": job["基本信息"]["job_id"],
-            "机构类型": job["基本信息"]["institution_type"],
-            "更新日期": job["基本信息"]["update_date"],
-            "申请截止日期": job["基本信息"]["application_deadline"],
-            "工作地点": job["职位属性"]["location"],
-            "研究领域": job["职位属性"]["research_field"],
-            "职位类型": job["职位属性"]["position_type"],
-            "雇佣类型": job["职位属性"]["employment_type"],
-            "任期状态": job["职位属性"]["tenure_status"],
-            "试用期": job["职位属性"]["trial_period"],
-            "薪资": job["薪资和工作条件"]["salary"],
-            "薪资说明": job["薪资和工作条件"]["salary_description"],
-            "工作时间说明": job["薪资和工作条件"]["working_hours_description"],
-            "职位描述": job["职位详情"]["job_description"],
-            "部门": job["职位详情"]["department"],
-            "资格要求": job["职位详情"]["qualifications"],
-            "教学要求": job["职位详情"]["teaching_requirements"],
-            "申请方法": job["职位详情"]["application_method"],
-            "备注": job["其他信息"]["notes"],
-            "是否有效": job["其他信息"]["is_active"],
-            "原始链接": job["其他信息"]["original_url"],
-        }
-        csv_data.append(row)
-
-    # 写入CSV文件
-    with open(filename, 'w', encoding='utf-8-sig', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in csv_data:
-            writer.writerow(row)
-
-    print(f"已将{len(csv_data)}条职位信息保存至{filename}")
+def reparse_archive(archive=None, max_jobs=None):
+    """用当前解析器重新解析HTML归档中每个职位的最新版本，不发出任何网络请求
+
+    总是实际解析（不读取解析缓存），并用结果刷新缓存
+    """
+    archive = archive or HtmlArchive()
+    job_store = JobStore(JOB_STORE_FILE)
+    url_store = JobStore(URL_STORE_FILE)
+    parse_cache = ParseCache(PARSER_VERSION)
+    writer = BackgroundWriter()
+    os.makedirs('jrecin_data/job_details/json', exist_ok=True)
+
+    count = 0
+    for job_id, job_html in islice(archive.iter_latest(), max_jobs):
+        # 原始链接优先沿用已有记录
+        previous = job_store.get(job_id) or {}
+        job_url = previous.get('其他信息', {}).get('original_url') or url_store.get(job_id, {}).get('url', '')
+
+        job_data = parse_job_details(job_html, job_url, job_id)
+        parse_cache.put(html_hash(job_html), job_data)
+        writer.write_json(f'jrecin_data/job_details/json/{job_id}.json', job_data)
+        job_store.put_many([job_data], sync=False)
+        count += 1
+
+    writer.close()
+    job_store.save_index()
+    parse_cache.close()
+    print(f"已重新解析{count}个归档职位")
+    return count
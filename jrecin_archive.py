@@ -0,0 +1,195 @@
+"""
+JRec-IN Portal 职位详情HTML归档
+按内容哈希去重、压缩后追加写入分段文件，保留每个job_id的所有历史版本，
+支持按job_id读取和按文件顺序批量扫描（用于重新解析）
+"""
+
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+
+from jrecin_normalize import page_hash
+
+# zstandard为可选依赖，未安装时使用标准库zlib压缩
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_DIR = 'jrecin_data/html_archive'
+SEGMENT_SIZE = 64 * 1024 * 1024  # 单个分段文件的最大字节数
+
+
+def _read_jsonl(path):
+    """读取JSON Lines索引文件，截掉中断时写了一半的最后一行"""
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'r+b') as f:
+        position = 0
+        for line in f:
+            if not line.endswith(b'\n'):
+                f.truncate(position)
+                break
+            entries.append(json.loads(line))
+            position += len(line)
+    return entries
+
+
+def compress(data, codec):
+    """按指定编码压缩字节数据"""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 9)
+
+
+def decompress(data, codec):
+    """按指定编码解压字节数据"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("该归档使用zstd压缩，请先安装: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class HtmlArchive:
+    """内容寻址的HTML归档：相同内容只存一份，每次抓取记录为job_id的一个版本"""
+
+    def __init__(self, directory=ARCHIVE_DIR, segment_size=SEGMENT_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.codec = 'zstd' if zstandard is not None else 'zlib'
+        self.blobs_path = os.path.join(directory, 'blobs.jsonl')
+        self.versions_path = os.path.join(directory, 'versions.jsonl')
+        self._lock = threading.Lock()
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # sha256 -> {'segment', 'offset', 'length', 'codec', 'size'}
+        self.blobs = {}
+        for entry in _read_jsonl(self.blobs_path):
+            self.blobs[entry['sha']] = entry
+        # job_id -> [{'sha', 'fetched_at'}, ...]（按抓取时间顺序）
+        self.versions = {}
+        for entry in _read_jsonl(self.versions_path):
+            if entry['sha'] in self.blobs:
+                self.versions.setdefault(entry['job_id'], []).append(
+                    {'sha': entry['sha'], 'fetched_at': entry['fetched_at']})
+
+        self.segment = max((blob['segment'] for blob in self.blobs.values()), default=1)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f'segment-{segment:05d}.bin')
+
+    def _append_line(self, path, entry):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def put(self, job_id, html_content, fetched_at=None):
+        """归档一次抓取结果，内容与该职位最新版本相同时不新增版本，返回内容哈希（jrecin_normalize.page_hash）"""
+        data = html_content.encode('utf-8')
+        # 按去掉CSRF令牌等易变部分后的内容去重，只有令牌不同的两次抓取保存为同一份
+        sha = page_hash(html_content)
+        fetched_at = fetched_at or datetime.now().isoformat(timespec='seconds')
+
+        with self._lock:
+            if sha not in self.blobs:
+                compressed = compress(data, self.codec)
+                segment_path = self._segment_path(self.segment)
+                if os.path.exists(segment_path) and os.path.getsize(segment_path) >= self.segment_size:
+                    self.segment += 1
+                    segment_path = self._segment_path(self.segment)
+                with open(segment_path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(compressed)
+                blob = {'sha': sha, 'segment': self.segment, 'offset': offset, 'length': len(compressed),
+                        'codec': self.codec, 'size': len(data)}
+                # 先写数据再写索引，中断时最多留下无索引引用的数据
+                self._append_line(self.blobs_path, blob)
+                self.blobs[sha] = blob
+
+            history = self.versions.setdefault(job_id, [])
+            if not history or history[-1]['sha'] != sha:
+                self._append_line(self.versions_path, {'job_id': job_id, 'sha': sha, 'fetched_at': fetched_at})
+                history.append({'sha': sha, 'fetched_at': fetched_at})
+        return sha
+
+    def read_blob(self, sha):
+        """按内容哈希读取并解压HTML"""
+        blob = self.blobs[sha]
+        with open(self._segment_path(blob['segment']), 'rb') as f:
+            f.seek(blob['offset'])
+            return decompress(f.read(blob['length']), blob['codec']).decode('utf-8')
+
+    def get(self, job_id, version=-1):
+        """读取职位的某个历史版本（默认最新版本），不存在时返回None"""
+        history = self.versions.get(job_id)
+        if not history:
+            return None
+        return self.read_blob(history[version]['sha'])
+
+    def history(self, job_id):
+        """返回职位所有版本的哈希和抓取时间"""
+        return list(self.versions.get(job_id, []))
+
+    def __contains__(self, job_id):
+        return job_id in self.versions
+
+    def __len__(self):
+        return len(self.versions)
+
+    def iter_latest(self):
+        """按分段文件顺序批量读取每个职位的最新版本，产出 (job_id, html)"""
+        latest = [(self.blobs[history[-1]['sha']], job_id) for job_id, history in self.versions.items()]
+        latest.sort(key=lambda item: (item[0]['segment'], item[0]['offset']))
+
+        handle, current_segment = None, None
+        try:
+            for blob, job_id in latest:
+                if blob['segment'] != current_segment:
+                    if handle:
+                        handle.close()
+                    handle = open(self._segment_path(blob['segment']), 'rb')
+                    current_segment = blob['segment']
+                handle.seek(blob['offset'])
+                yield job_id, decompress(handle.read(blob['length']), blob['codec']).decode('utf-8')
+        finally:
+            if handle:
+                handle.close()
+
+    def stats(self):
+        """统计归档的原始大小与压缩后大小"""
+        raw = sum(blob['size'] for blob in self.blobs.values())
+        stored = sum(blob['length'] for blob in self.blobs.values())
+        return {
+            'jobs': len(self.versions),
+            'versions': sum(len(history) for history in self.versions.values()),
+            'blobs': len(self.blobs),
+            'raw_bytes': raw,
+            'stored_bytes': stored,
+            'ratio': round(raw / stored, 2) if stored else 0
+        }
+
+
+def import_html_directory(archive, directory='jrecin_data/job_details/html'):
+    """将已有的逐个HTML文件导入归档（文件名即job_id）"""
+    count = 0
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.html'):
+            continue
+        path = os.path.join(directory, name)
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            html_content = f.read()
+        fetched_at = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+        archive.put(os.path.splitext(name)[0], html_content, fetched_at)
+        count += 1
+    print(f"已导入{count}个HTML文件，归档统计: {archive.stats()}")
+    return count
+
+
+if __name__ == "__main__":
+    # 导入当前HTML目录并显示归档统计
+    import_html_directory(HtmlArchive())
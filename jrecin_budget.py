@@ -0,0 +1,111 @@
+"""
+JRec-IN Portal 运行时间预算
+跟踪已用时间和各阶段单位耗时，预测剩余工作所需时间，在预算不足时提前结束翻页、
+推迟低优先级的详情抓取和LLM分析，保证在规定时间内写出一致的结果，并记录推迟到下次运行的工作
+"""
+
+import json
+import os
+import time
+
+from jrecin_output import atomic_write_json
+
+RUN_SUMMARY_FILE = 'jrecin_data/run_summary.json'
+DEFERRED_URLS_FILE = 'jrecin_data/deferred_job_urls.json'
+
+# 为写出最终结果（JSON、CSV等）预留的时间比例和最小秒数
+FINALIZE_RESERVE_FRACTION = 0.05
+FINALIZE_RESERVE_MIN = 5.0
+# 尚无实测数据时各阶段的单位耗时估计（秒）
+DEFAULT_UNIT_COSTS = {'page': 4.0, 'job': 2.5, 'llm': 60.0}
+
+
+class TimeBudget:
+    """墙钟时间预算；seconds为None时不限制时间，只做统计"""
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.start = time.monotonic()
+        self.unit_costs = dict(DEFAULT_UNIT_COSTS)
+        self.counts = {}
+        self.deferred = {}
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def remaining(self):
+        if self.seconds is None:
+            return float('inf')
+        return self.seconds - self.elapsed()
+
+    def record(self, stage, duration):
+        """记录一个单位工作的耗时，用指数滑动平均更新该阶段的单位耗时估计"""
+        count = self.counts.get(stage, 0)
+        if count == 0:
+            self.unit_costs[stage] = duration
+        else:
+            self.unit_costs[stage] = 0.7 * self.unit_costs[stage] + 0.3 * duration
+        self.counts[stage] = count + 1
+
+    def estimate(self, stage, count=1):
+        """预测完成count个单位工作所需的时间"""
+        return self.unit_costs.get(stage, 0.0) * count
+
+    def can_afford(self, stage, count=1, limit_fraction=1.0):
+        """判断在预算的limit_fraction以内（扣除写出结果的预留时间）能否再完成count个单位工作"""
+        if self.seconds is None:
+            return True
+        reserve = max(FINALIZE_RESERVE_MIN, self.seconds * FINALIZE_RESERVE_FRACTION)
+        limit = self.seconds * limit_fraction - reserve
+        return self.elapsed() + self.estimate(stage, count) <= limit
+
+    def is_tight(self, stage, pending):
+        """剩余工作的预测耗时超过剩余预算时返回True（需要降级）"""
+        return not self.can_afford(stage, pending)
+
+    def defer(self, stage, items):
+        """记录推迟到下次运行的工作"""
+        self.deferred.setdefault(stage, []).extend(items)
+
+    def summary(self):
+        """返回运行摘要"""
+        return {
+            'time_budget': self.seconds,
+            'elapsed': round(self.elapsed(), 2),
+            'completed': dict(self.counts),
+            'unit_costs': {stage: round(cost, 3) for stage, cost in self.unit_costs.items()},
+            'deferred': {stage: len(items) for stage, items in self.deferred.items()},
+            # 职位记录只保留job_id，避免摘要过大
+            'deferred_items': {stage: [item.get('job_id') if isinstance(item, dict) else item for item in items]
+                               for stage, items in self.deferred.items()},
+        }
+
+    def write_summary(self, path=RUN_SUMMARY_FILE):
+        """写出运行摘要，并打印推迟的工作"""
+        summary = self.summary()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        atomic_write_json(path, summary)
+        print(f"运行用时 {summary['elapsed']:.1f} 秒" +
+              (f"（预算 {self.seconds} 秒）" if self.seconds is not None else ""))
+        for stage, count in summary['deferred'].items():
+            print(f"推迟到下次运行: {stage} {count}项")
+        return summary
+
+
+def load_deferred_jobs(path=DEFERRED_URLS_FILE):
+    """读取上次运行因时间预算推迟的职位URL记录"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return json.load(f)
+
+
+def save_deferred_jobs(jobs, path=DEFERRED_URLS_FILE):
+    """保存本次推迟的职位URL记录，没有推迟的职位时删除文件"""
+    if not jobs:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    atomic_write_json(path, jobs)
@@ -0,0 +1,98 @@
+"""
+JRec-IN Portal 爬虫断点日志
+记录已完成的搜索页面、已完成的阶段和已处理的职位ID，
+爬取中断后重新运行时可以从上次停止的位置继续，不再重复请求
+"""
+
+import json
+import os
+import threading
+
+CHECKPOINT_FILE = 'jrecin_data/checkpoint.jsonl'
+
+
+def page_key(keywords, page, filters=None):
+    """生成搜索页面在日志中的键（关键词 + 筛选条件 + 页码）"""
+    key = {'keywords': keywords, 'page': page}
+    if filters:
+        key['filters'] = filters
+    return json.dumps(key, ensure_ascii=False, sort_keys=True)
+
+
+class CheckpointJournal:
+    """追加写入的断点日志，每完成一个单元就写入一行JSON"""
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        self.pages = {}
+        self.jobs = set()
+        self.stages = set()
+        # 并发查询的多个线程会同时写入日志
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """读取已有日志，忽略中断时写了一半的最后一行"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry['type'] == 'page':
+                    self.pages[entry['key']] = entry['result']
+                elif entry['type'] == 'job':
+                    self.jobs.add(entry['job_id'])
+                elif entry['type'] == 'stage':
+                    self.stages.add(entry['stage'])
+        if self.pages or self.jobs or self.stages:
+            print(f"从断点日志恢复: {len(self.pages)}个搜索页面, {len(self.jobs)}个职位已完成")
+
+    def _append(self, entry):
+        """写入一行日志并立即落盘"""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def page_result(self, keywords, page, filters=None):
+        """返回已完成页面的解析结果，未完成则返回None"""
+        return self.pages.get(page_key(keywords, page, filters))
+
+    def mark_page(self, keywords, page, result, filters=None):
+        """记录搜索页面已完成"""
+        key = page_key(keywords, page, filters)
+        self.pages[key] = result
+        self._append({'type': 'page', 'key': key, 'result': result})
+
+    def job_done(self, job_id):
+        """判断职位是否已处理完成"""
+        return job_id in self.jobs
+
+    def mark_job(self, job_id):
+        """记录职位已处理完成"""
+        self.jobs.add(job_id)
+        self._append({'type': 'job', 'job_id': job_id})
+
+    def stage_done(self, stage):
+        """判断阶段（如URL比较）是否已完成"""
+        return stage in self.stages
+
+    def mark_stage(self, stage):
+        """记录阶段已完成"""
+        self.stages.add(stage)
+        self._append({'type': 'stage', 'stage': stage})
+
+    def clear(self):
+        """整个流程成功结束后删除日志"""
+        self.pages.clear()
+        self.jobs.clear()
+        self.stages.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,259 @@
+"""
+JRec-IN Portal 命令行入口
+子命令: urls / details / reparse / llm / quality / search / export / queue / worker
+只在执行具体子命令时才导入对应模块，保持冷启动轻量（适合cron频繁调用）
+
+查看启动耗时: python -X importtime jrecin_cli.py --help
+性能分析: python jrecin_cli.py --profile details
+离线回放: python jrecin_cli.py --record jrecin_data/sessions/run.sqlite3 urls，之后 --replay 同一文件
+"""
+
+import time
+
+_START_TIME = time.perf_counter()
+
+import argparse
+import sys
+
+DEFAULT_KEYWORDS = '理論経済学 経済学説 経済思想 経済政策'
+
+
+def scraper_config(args):
+    """录制或回放会话时使用带会话存档的爬虫配置，否则返回None（使用默认配置）"""
+    if args.session_archive is None:
+        return None
+    from jrecin_config import ScraperConfig
+    return ScraperConfig(session_archive=args.session_archive)
+
+
+def cmd_urls(args):
+    """只收集职位URL"""
+    from jrecin_scraper import main
+    main(max_pages=args.max_pages, keywords=args.keywords, mode='urls_only', test_optimal=args.test,
+         resume=not args.no_resume, queries=args.query, time_budget=args.time_budget, config=scraper_config(args))
+
+
+def cmd_details(args):
+    """处理已收集的职位URL"""
+    from jrecin_scraper import main
+    main(max_jobs=args.max_jobs, mode='details_only', test_optimal=args.test, resume=not args.no_resume,
+         time_budget=args.time_budget, card_exclude=args.exclude, config=scraper_config(args))
+
+
+def cmd_reparse(args):
+    """用当前解析器重新解析HTML归档"""
+    from jrecin_analyzer import reparse_archive
+    reparse_archive(max_jobs=args.max_jobs)
+
+
+def cmd_llm(args):
+    """使用LLM分析单个职位，未指定职位时按紧急程度批量分析"""
+    from jrecin_llm_analyzer import analyze_jobs_by_priority
+    if args.backend == 'claude':
+        from jrecin_llm_analyzer_claude import analyze_job_html
+    else:
+        from jrecin_llm_analyzer import analyze_job_html
+    if args.job_id:
+        output = args.output or f'jrecin_data/job_details/llm_json/{args.job_id}.json'
+        analyze_job_html(None, output, job_id=args.job_id)
+        return
+
+    job_ids = None
+    if args.needs_llm:
+        import json
+        from jrecin_quality import QUALITY_DIR
+        with open(f'{QUALITY_DIR}/needs_llm.json', 'r', encoding='utf-8-sig') as f:
+            job_ids = set(json.load(f))
+    analyze_jobs_by_priority(max_jobs=args.max_jobs, analyze=analyze_job_html, time_budget=args.time_budget,
+                             job_ids=job_ids)
+
+
+def cmd_export(args):
+    """一次遍历职位存储（包括已过期的职位），导出为一种或多种格式"""
+    from jrecin_export import export_jobs, make_sink
+    from jrecin_store import JOB_STORE_FILE, JobStore
+
+    columns = args.columns.split(',') if args.columns else None
+    sinks = [make_sink(format_name, args.output, columns) for format_name in (args.format or ['csv'])]
+    where = {key: value for key, value in (
+        ('keywords', args.keyword), ('exclude', args.exclude), ('regions', args.region),
+        ('institution_types', args.institution_type), ('tenure_track', args.tenure_track),
+        ('salary_min', args.salary_min), ('active_only', args.active_only),
+    ) if value}
+    export_jobs(JobStore(JOB_STORE_FILE), sinks, where=where, incremental=args.incremental)
+
+
+def cmd_quality(args):
+    """比较正则解析结果和LLM分析结果的字段填充率和一致率"""
+    from jrecin_quality import evaluate_corpus, print_report
+    print_report(evaluate_corpus())
+
+
+def cmd_queue(args):
+    """管理分布式处理的工作队列"""
+    from jrecin_queue import open_queue, serve_queue
+
+    queue = open_queue(args.queue, args.token)
+    if args.action == 'serve':
+        serve_queue(queue, host=args.host, port=args.port, token=args.token)
+    elif args.action == 'submit':
+        from jrecin_distributed import submit_new_jobs
+        submit_new_jobs(queue, llm=args.llm, card_exclude=args.exclude)
+    elif args.action == 'collect':
+        from jrecin_distributed import collect_results
+        collect_results(queue)
+    else:
+        stats = queue.stats()
+        for stage, counts in sorted(stats['tasks'].items()):
+            print(f"{stage:<8}" + '  '.join(f"{status} {n}" for status, n in sorted(counts.items())))
+        for worker_id, worker in sorted(stats['workers'].items()):
+            age = time.time() - worker['last_heartbeat']
+            print(f"工作进程 {worker_id}（{worker['stages']}）{age:.0f} 秒前心跳")
+
+
+def cmd_worker(args):
+    """启动工作进程（--processes大于1时在本机启动多个）"""
+    from jrecin_distributed import run_local_workers, run_worker
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    if args.processes > 1:
+        run_local_workers(args.processes, args.queue, stages, idle_timeout=args.idle_timeout, backend=args.backend,
+                          token=args.token)
+    else:
+        run_worker(args.queue, stages, max_tasks=args.max_tasks, idle_timeout=args.idle_timeout, backend=args.backend,
+                   token=args.token)
+
+
+def cmd_search(args):
+    """在本地检索索引中查询职位"""
+    from jrecin_search import SemanticIndex, build_search_index
+    from jrecin_store import JOB_STORE_FILE, JobStore
+
+    index = build_search_index() if args.rebuild else SemanticIndex()
+    results = index.similar(args.similar, args.k) if args.similar else index.search(args.text or '', args.k)
+    job_store = JobStore(JOB_STORE_FILE)
+    for job_id, score in results:
+        basic = (job_store.get(job_id) or {}).get('基本信息', {})
+        print(f"{score:8.3f}  {job_id}  {basic.get('position_title', '')}  {basic.get('institution', '')}")
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description='JRec-IN Portal 职位爬取与分析工具')
+    parser.add_argument('--timing', action='store_true', help='打印启动耗时和总耗时')
+    parser.add_argument('--profile', action='store_true',
+                        help='性能分析：各阶段墙钟/CPU时间、cProfile统计和火焰图调用栈，写入 jrecin_data/profile/')
+    session = parser.add_mutually_exclusive_group()
+    session.add_argument('--record', metavar='ARCHIVE',
+                         help='把urls/details发出的所有HTTP请求和响应录制到该会话存档（SQLite文件）')
+    session.add_argument('--replay', metavar='ARCHIVE',
+                         help='从会话存档回放urls/details的HTTP响应，不访问网络，请求间隔为0')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    urls = subparsers.add_parser('urls', help='只收集职位URL')
+    urls.add_argument('--keywords', '-k', default=DEFAULT_KEYWORDS, help='搜索关键词（空格分隔）')
+    urls.add_argument('--query', '-q', action='append', help='查询集中的一组关键词，可重复指定，提供时忽略--keywords')
+    urls.add_argument('--max-pages', type=int, default=10, help='最多爬取的搜索结果页数')
+    urls.set_defaults(func=cmd_urls)
+
+    details = subparsers.add_parser('details', help='处理已收集的职位URL')
+    details.add_argument('--max-jobs', type=int, default=None, help='最多处理的职位数量')
+    details.add_argument('--exclude', action='append', help='搜索结果卡片的标题/职位类型/雇佣类型包含该关键词时不抓取详情，可重复指定')
+    details.set_defaults(func=cmd_details)
+
+    for sub in (urls, details):
+        sub.add_argument('--test', action='store_true', help='保存更多中间文件用于调试')
+        sub.add_argument('--no-resume', action='store_true', help='忽略断点日志，重新开始')
+
+    reparse = subparsers.add_parser('reparse', help='用当前解析器重新解析HTML归档')
+    reparse.add_argument('--max-jobs', type=int, default=None, help='最多重新解析的职位数量')
+    reparse.set_defaults(func=cmd_reparse)
+
+    llm = subparsers.add_parser('llm', help='使用LLM分析归档中的职位')
+    llm.add_argument('job_id', nargs='?', help='职位ID，省略时按紧急程度批量分析尚未分析的职位')
+    llm.add_argument('--max-jobs', type=int, default=None, help='批量分析时最多分析的职位数量')
+    llm.add_argument('--backend', choices=['ollama', 'claude'], default='ollama', help='LLM后端')
+    llm.add_argument('--output', '-o', help='输出JSON文件路径')
+    llm.add_argument('--needs-llm', action='store_true', help='只分析质量评估列出的正则与LLM不一致或缺少关键字段的职位')
+    llm.set_defaults(func=cmd_llm)
+
+    for sub in (urls, details, llm):
+        sub.add_argument('--time-budget', type=float, default=None, help='墙钟时间预算（秒），预算不足时推迟剩余工作')
+
+    quality = subparsers.add_parser('quality', help='评估正则解析与LLM分析的填充率和一致率')
+    quality.set_defaults(func=cmd_quality)
+
+    search = subparsers.add_parser('search', help='在本地检索索引中查询职位')
+    search.add_argument('text', nargs='?', help='自由文本查询')
+    search.add_argument('--similar', help='查找与该职位ID相似的职位')
+    search.add_argument('-k', type=int, default=10, help='返回的职位数量')
+    search.add_argument('--rebuild', action='store_true', help='先用职位存储重建索引')
+    search.set_defaults(func=cmd_search)
+
+    export = subparsers.add_parser('export', help='将职位存储导出为CSV/Excel/Parquet/JSONL')
+    export.add_argument('--output', '-o', default='jrecin_data/exports/all_jobs.csv',
+                        help='输出文件路径（扩展名按格式替换）；economic_jobs.csv由当前职位表生成，不要用作导出路径')
+    export.add_argument('--format', '-f', action='append', choices=['csv', 'jsonl', 'xlsx', 'parquet'],
+                        help='导出格式，可重复指定以在一次遍历中同时导出多种格式（默认csv）')
+    export.add_argument('--columns', help='导出的列，逗号分隔的字段名或表头（默认全部）')
+    export.add_argument('--keyword', action='append', help='只导出标题、研究领域或职位描述包含该关键词的职位，可重复指定')
+    export.add_argument('--exclude', action='append', help='排除包含该关键词的职位，可重复指定')
+    export.add_argument('--region', action='append', help='工作地点所在地区（如 関東）或都道府县，可重复指定')
+    export.add_argument('--institution-type', action='append', help='机构类型，可重复指定')
+    export.add_argument('--tenure-track', action='store_true', help='只导出テニュアトラック职位')
+    export.add_argument('--salary-min', type=int, help='换算后的年薪上限不低于该值（日元）')
+    export.add_argument('--active-only', action='store_true', help='只导出尚未截止的职位')
+    export.add_argument('--incremental', action='store_true',
+                        help='增量导出：JSONL只追加有变化的行，其他格式没有变化时不重写')
+    export.set_defaults(func=cmd_export)
+
+    queue = subparsers.add_parser('queue', help='分布式处理：管理工作队列')
+    queue.add_argument('action', choices=['serve', 'submit', 'collect', 'stats'],
+                       help='serve: 向其他主机提供队列；submit: 加入新增职位；collect: 汇总结果；stats: 查看状态')
+    queue.add_argument('--llm', action='store_true', help='submit时为每个职位加入LLM分析阶段')
+    queue.add_argument('--exclude', action='append', help='submit时按搜索结果卡片排除的关键词，可重复指定')
+    queue.add_argument('--host', default='127.0.0.1', help='serve监听的地址（默认只监听本机，其他主机访问时指定 0.0.0.0）')
+    queue.add_argument('--port', type=int, default=8765, help='serve监听的端口')
+    queue.set_defaults(func=cmd_queue)
+
+    worker = subparsers.add_parser('worker', help='分布式处理：启动工作进程')
+    worker.add_argument('--stages', default='fetch,parse,llm', help='领取的阶段，逗号分隔（fetch/parse/llm）')
+    worker.add_argument('--backend', choices=['ollama', 'claude'], default='ollama', help='llm阶段使用的LLM后端')
+    worker.add_argument('--max-tasks', type=int, default=None, help='完成这么多任务后退出')
+    worker.add_argument('--idle-timeout', type=float, default=None, help='连续空闲这么多秒后退出（默认一直运行）')
+    worker.add_argument('--processes', type=int, default=1, help='在本机启动的工作进程数量')
+    worker.set_defaults(func=cmd_worker)
+
+    for sub in (queue, worker):
+        sub.add_argument('--queue', default='jrecin_data/work_queue.sqlite3',
+                         help='工作队列：SQLite文件路径，或其他主机上 queue serve 的地址（http://主机:端口）')
+        sub.add_argument('--token', default=None,
+                         help='HTTP工作队列的共享令牌，serve和远程访问时必需（默认读取环境变量 JRECIN_QUEUE_TOKEN）')
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.timing:
+        print(f"启动耗时: {(time.perf_counter() - _START_TIME) * 1000:.1f} ms", file=sys.stderr)
+    args.session_archive = None
+    if args.record or args.replay:
+        from jrecin_replay import SessionArchive
+        args.session_archive = SessionArchive(args.record or args.replay, mode='record' if args.record else 'replay')
+    try:
+        if args.profile:
+            from jrecin_profile import profiling
+            with profiling():
+                args.func(args)
+        else:
+            args.func(args)
+    finally:
+        if args.session_archive is not None:
+            args.session_archive.close()
+    if args.timing:
+        print(f"总耗时: {time.perf_counter() - _START_TIME:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
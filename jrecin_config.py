@@ -0,0 +1,44 @@
+"""
+JRec-IN Portal 爬虫配置
+集中管理目标URL、请求头、请求间隔和HTTP连接设置，并为每个爬取任务创建独立的HTTP客户端，
+CSRF令牌保存在各自客户端的请求头中，不再写入共享的全局字典
+"""
+
+from jrecin_http import CONNECT_TIMEOUT, POOL_SIZE, READ_TIMEOUT, HttpClient
+
+# 设置请求头，模拟浏览器
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ja,en-US;q=0.9,en;q=0.8',  # 设置为日语优先
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# 目标URL
+BASE_URL = 'https://jrecin.jst.go.jp'
+SEARCH_URL = 'https://jrecin.jst.go.jp/seek/SeekJorSearch'
+
+
+class ScraperConfig:
+    """爬虫运行配置，显式传递给各个爬取函数"""
+
+    def __init__(self, base_url=BASE_URL, search_url=SEARCH_URL, headers=None, page_interval=2.0,
+                 job_interval=1.0, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, pool_size=POOL_SIZE,
+                 http_backend='auto', session_archive=None):
+        self.base_url = base_url
+        self.search_url = search_url
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        self.page_interval = page_interval  # 搜索结果页之间的间隔（秒）
+        self.job_interval = job_interval  # 职位详情页之间的间隔（秒）
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.http_backend = http_backend  # 'auto'、'httpx' 或 'requests'
+        # 可选的jrecin_replay.SessionArchive：录制或回放所有请求；回放时不需要限速，请求间隔为0
+        self.session_archive = session_archive
+        if session_archive is not None and session_archive.replaying:
+            self.page_interval = self.job_interval = 0.0
+
+    def new_session(self):
+        """创建带默认请求头的独立HTTP客户端（HTTP库在此处才导入，避免拖慢命令行启动）"""
+        return HttpClient(headers=self.headers, timeout=self.timeout, pool_size=self.pool_size,
+                          backend=self.http_backend, session_archive=self.session_archive)
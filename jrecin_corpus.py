@@ -0,0 +1,164 @@
+"""
+JRec-IN Portal 当前职位表
+物化的"当前有效职位"表：每次运行只合并本次处理的职位（内容有变化时才写入），并删除截止日期已过的职位，
+不重新扫描整个职位存储。每次有变化时版本号加一，并在变更日志中记录本版本变化的job_id：
+- CSV导出（economic_jobs.csv）由这张表生成，始终包含全部有效职位，而不只是最近一次运行的职位
+- 界面按版本号缓存DataFrame，版本变化时只读取变更日志中的职位并更新缓存，开销与变化的职位数成正比
+
+表为空（从未合并过）时用职位存储中的全部职位初始化
+"""
+
+import hashlib
+import os
+import sqlite3
+from datetime import date
+
+from jrecin_normalize import parse_date
+from jrecin_record import FIELDS, JobRecord, as_record
+
+CORPUS_FILE = 'jrecin_data/corpus.sqlite3'
+# 变更日志保留的版本数，界面缓存落后更多版本时整表重新读取
+CHANGELOG_VERSIONS = 100
+
+FIELD_NAMES = [field for _, field, _ in FIELDS]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS corpus (
+    job_id TEXT PRIMARY KEY,
+    deadline TEXT,
+    row_hash TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS corpus_deadline ON corpus (deadline);
+CREATE TABLE IF NOT EXISTS changes (
+    version INTEGER NOT NULL,
+    job_id TEXT NOT NULL,
+    PRIMARY KEY (version, job_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _row(record):
+    return {field: getattr(record, field) for field in FIELD_NAMES}
+
+
+class CorpusTable:
+    """当前有效职位表；version为0表示从未合并过"""
+
+    def __init__(self, path=CORPUS_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.executescript(_SCHEMA)
+
+    def _meta(self, key):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    @property
+    def version(self):
+        """每次读取数据库（界面进程需要看到爬虫进程的更新）"""
+        return self._meta('version')
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM corpus').fetchone()[0]
+
+    def merge(self, jobs, today=None):
+        """合并职位（嵌套字典或JobRecord）并删除已过截止日期的职位，返回 (写入的数量, 删除的数量)
+
+        内容没有变化的职位不写入；截止日期无法解析的职位一直保留
+        """
+        today = (today or date.today()).isoformat()
+        version = self.version + 1
+        changed = []
+        upserted = 0
+        closed = 0
+        with self.db:
+            for job in jobs:
+                record = as_record(job)
+                deadline = parse_date(record.application_deadline)
+                deadline = deadline.isoformat() if deadline else None
+                if deadline is not None and deadline < today:
+                    # 新的截止日期已过（表中可能还是以前较晚的截止日期）：直接删除
+                    if self.db.execute('DELETE FROM corpus WHERE job_id = ?', (record.job_id,)).rowcount:
+                        changed.append(record.job_id)
+                        closed += 1
+                    continue
+                text = record.to_json()
+                row_hash = hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+                row = self.db.execute('SELECT row_hash FROM corpus WHERE job_id = ?', (record.job_id,)).fetchone()
+                if row is not None and row[0] == row_hash:
+                    continue
+                self.db.execute('INSERT OR REPLACE INTO corpus (job_id, deadline, row_hash, record) '
+                                'VALUES (?, ?, ?, ?)', (record.job_id, deadline, row_hash, text))
+                changed.append(record.job_id)
+                upserted += 1
+
+            expired = [job_id for job_id, in self.db.execute('SELECT job_id FROM corpus WHERE deadline < ?',
+                                                             (today,))]
+            self.db.executemany('DELETE FROM corpus WHERE job_id = ?', [(job_id,) for job_id in expired])
+            changed += expired
+
+            if changed:
+                self.db.executemany('INSERT OR IGNORE INTO changes (version, job_id) VALUES (?, ?)',
+                                    [(version, job_id) for job_id in changed])
+                self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,))
+                # 只保留最近的变更日志
+                pruned = version - CHANGELOG_VERSIONS
+                if pruned > self._meta('pruned'):
+                    self.db.execute('DELETE FROM changes WHERE version <= ?', (pruned,))
+                    self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('pruned', ?)", (pruned,))
+
+        removed = closed + len(expired)
+        print(f"当前职位表: 更新{upserted}个职位，删除{removed}个已过截止日期的职位，共{len(self)}个（版本 {self.version}）")
+        return upserted, removed
+
+    def iter_jobs(self):
+        """按job_id从新到旧逐个返回JobRecord"""
+        for text, in self.db.execute('SELECT record FROM corpus ORDER BY job_id DESC'):
+            yield JobRecord.from_json(text)
+
+    def changed_since(self, version):
+        """从version之后变化过的job_id集合；变更日志已不完整时返回None"""
+        if version < self._meta('pruned'):
+            return None
+        return {job_id for job_id, in self.db.execute('SELECT DISTINCT job_id FROM changes WHERE version > ?',
+                                                       (version,))}
+
+    def _records(self, job_ids):
+        job_ids = list(job_ids)
+        records = []
+        # SQLite对参数个数有限制，分批查询
+        for start in range(0, len(job_ids), 500):
+            batch = job_ids[start:start + 500]
+            records += [JobRecord.from_json(text) for text, in self.db.execute(
+                f"SELECT record FROM corpus WHERE job_id IN ({','.join('?' * len(batch))})", batch)]
+        return records
+
+    def frame(self, base=None, base_version=None):
+        """返回 (以job_id为索引的DataFrame, 版本号)
+
+        提供上次的结果 base 和它的版本号时，只读取之后变化过的职位并更新（base本身不修改），变化过的职位排在前面
+        """
+        import pandas as pd
+
+        version = self.version
+        job_ids = self.changed_since(base_version) if base is not None and base_version is not None else None
+        if job_ids is None:
+            rows = [_row(record) for record in self.iter_jobs()]
+            return pd.DataFrame(rows, columns=FIELD_NAMES).set_index('job_id'), version
+        if not job_ids:
+            return base, version
+
+        updated = pd.DataFrame([_row(record) for record in self._records(job_ids)], columns=FIELD_NAMES)
+        rest = base.drop(index=list(job_ids), errors='ignore')
+        return pd.concat([updated.set_index('job_id'), rest]), version
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,172 @@
+"""
+JRec-IN Portal 近似重复职位检测
+对规范化后的职位描述和应聘资格计算MinHash签名，用LSH分桶索引做次线性查找，
+识别同一机构以新ID重新发布或交叉发布的职位，复用已有的LLM分析结果并在界面中分组显示
+"""
+
+import json
+import os
+import random
+import zlib
+
+from jrecin_normalize import normalize_text
+
+NEAR_DUP_INDEX_FILE = 'jrecin_data/near_dup_index.json'
+
+NUM_PERM = 64  # MinHash签名长度
+BANDS = 16  # LSH分段数，每段 NUM_PERM // BANDS 个值；相似度约0.5以上的职位会落入同一个桶
+SHINGLE_SIZE = 3  # 日语没有空格分词，使用字符3-gram
+MIN_TEXT_LENGTH = 30  # 文本太短时不计算签名，避免误判
+DUPLICATE_THRESHOLD = 0.8  # 估计的Jaccard相似度达到该值视为重复
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20240401)  # 固定种子，保证签名在多次运行之间可比较
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def job_text(job_data):
+    """取出用于比较的文本：职位描述 + 应聘资格"""
+    details = job_data.get('职位详情', {})
+    return normalize_text(details.get('job_description', '') + ' ' + details.get('qualifications', ''))
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """规范化文本并切分为去掉空白的字符n-gram集合"""
+    text = normalize_text(text).replace(' ', '')
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash_signature(text):
+    """计算文本的MinHash签名，文本太短时返回None"""
+    if len(text) < MIN_TEXT_LENGTH:
+        return None
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(text)]
+    if not hashes:
+        return None
+    return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(signature1, signature2):
+    """用签名中相同位置相等的比例估计Jaccard相似度"""
+    return sum(1 for x, y in zip(signature1, signature2) if x == y) / NUM_PERM
+
+
+def posting_order(job_id):
+    """职位的发布先后：job_id按发布顺序递增编号，位数不同时位数少的更早"""
+    return len(job_id), job_id
+
+
+def _band_keys(signature):
+    rows = NUM_PERM // BANDS
+    return [f'{band}:{hash(tuple(signature[band * rows:(band + 1) * rows]))}' for band in range(BANDS)]
+
+
+class NearDupIndex:
+    """MinHash签名 + LSH分桶的近似重复索引，duplicates记录 job_id -> 最早发布的同一职位的job_id"""
+
+    def __init__(self, path=NEAR_DUP_INDEX_FILE, threshold=DUPLICATE_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.signatures = {}
+        self.duplicates = {}
+        self.buckets = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.duplicates = data.get('duplicates', {})
+            for job_id, signature in data.get('signatures', {}).items():
+                self._add(job_id, signature)
+
+    def _add(self, job_id, signature):
+        self.signatures[job_id] = signature
+        for key in _band_keys(signature):
+            self.buckets.setdefault(key, []).append(job_id)
+
+    def query(self, signature, exclude=None):
+        """查找与签名近似重复的职位，返回按相似度降序排列的 [(job_id, 相似度)]"""
+        candidates = set()
+        for key in _band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        candidates.discard(exclude)
+        matches = [(job_id, estimate_similarity(signature, self.signatures[job_id])) for job_id in candidates]
+        return sorted([match for match in matches if match[1] >= self.threshold], key=lambda m: -m[1])
+
+    def check(self, job_id, text):
+        """登记职位并返回它重复的已有职位job_id（不重复时返回None）"""
+        signature = minhash_signature(text)
+        if signature is None:
+            return None
+        if job_id in self.signatures:
+            # 同一职位再次抓取：内容未变时沿用原有结果
+            if self.signatures[job_id] == signature:
+                return self.duplicates.get(job_id)
+            self.remove(job_id)
+
+        matches = self.query(signature, exclude=job_id)
+        self._add(job_id, signature)
+        if not matches:
+            self.duplicates.pop(job_id, None)
+            return None
+
+        groups, canonical = self._link(job_id, matches)
+        if canonical == job_id:
+            # 按抓取顺序晚登记但发布更早的职位：成为原有分组的代表
+            print(f"职位 {job_id} 早于近似重复的 {', '.join(sorted(groups, key=posting_order))}，作为分组代表")
+            return None
+        print(f"职位 {job_id} 与 {canonical} 近似重复（最高相似度 {matches[0][1]:.2f}）")
+        return canonical
+
+    def _link(self, job_id, matches):
+        """把job_id和所有匹配职位所属的分组合并，返回 (原有分组的代表集合, 合并后的代表)"""
+        # 所有相似度达到阈值的职位及其所属分组中最早发布的职位作为代表，而不是相似度最高的职位
+        groups = {self.duplicates.get(match_id, match_id) for match_id, _ in matches}
+        canonical = min(groups | {job_id}, key=posting_order)
+        for other_id in [other for other, group in self.duplicates.items() if group in groups] + list(groups):
+            if other_id != canonical:
+                self.duplicates[other_id] = canonical
+        if canonical == job_id:
+            self.duplicates.pop(job_id, None)
+        else:
+            self.duplicates[job_id] = canonical
+        return groups, canonical
+
+    def remove(self, job_id):
+        """从索引中移除职位（内容变化后重新登记）"""
+        signature = self.signatures.pop(job_id, None)
+        if signature is None:
+            return
+        for key in _band_keys(signature):
+            bucket = self.buckets.get(key, [])
+            if job_id in bucket:
+                bucket.remove(job_id)
+        self.duplicates.pop(job_id, None)
+        # 被移除的是分组代表：其余成员按发布顺序重新与剩下的签名比对，选出新的代表（不再相似的成员各自独立）
+        members = sorted((other for other, canonical in self.duplicates.items() if canonical == job_id),
+                         key=posting_order)
+        for member in members:
+            del self.duplicates[member]
+        for member in members:
+            matches = self.query(self.signatures[member], exclude=member)
+            if matches:
+                self._link(member, matches)
+
+    def duplicate_of(self, job_id):
+        return self.duplicates.get(job_id)
+
+    def groups(self):
+        """按最早发布的职位分组返回重复职位 {canonical_job_id: [重复的job_id, ...]}"""
+        groups = {}
+        for job_id, canonical in self.duplicates.items():
+            groups.setdefault(canonical, []).append(job_id)
+        return groups
+
+    def save(self):
+        """保存签名和重复关系（分桶在加载时重建）"""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'signatures': self.signatures, 'duplicates': self.duplicates}, f)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,234 @@
+"""
+JRec-IN Portal 分布式处理
+协调进程把职位URL加入工作队列（jrecin_queue），工作进程按阶段领取任务：
+- fetch: 抓取详情页面，完成后加入parse任务（HTML随任务传递，工作进程之间不需要共享目录）
+- parse: 用正则解析器解析，需要时加入llm任务
+- llm:   用LLM分析（可以只在有GPU的主机上运行）
+各阶段可以启动任意数量的工作进程，互不影响；协调进程定期汇总完成的结果，写入本地的归档、职位存储和索引
+
+示例:
+  python jrecin_cli.py queue submit --llm            # 把新增职位加入队列
+  python jrecin_cli.py queue serve --host 0.0.0.0 --token 令牌   # 向其他主机提供队列
+  python jrecin_cli.py worker --stages fetch,parse   # 在任意主机上启动工作进程
+  python jrecin_cli.py worker --stages llm --queue http://coordinator:8765 --token 令牌
+  python jrecin_cli.py queue collect                 # 汇总结果
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+
+from jrecin_output import BackgroundWriter, atomic_write_json
+from jrecin_queue import LEASE_SECONDS, WORK_QUEUE_FILE, new_worker_id, open_queue
+from jrecin_scheduler import job_priority
+
+STAGES = ('fetch', 'parse', 'llm')
+
+
+def submit_jobs(queue, jobs, llm=False):
+    """把URL记录加入fetch队列（优先级与调度器的紧急程度相同，已过期的职位不加入），返回加入的数量"""
+    items = []
+    for job in jobs:
+        priority = job_priority(job)
+        if job.get('job_id') and priority is not None:
+            items.append((job['job_id'], {'job': job, 'llm': llm}, priority))
+    count = queue.enqueue_many('fetch', items)
+    print(f"已加入{count}个抓取任务")
+    return count
+
+
+def submit_new_jobs(queue, llm=False, card_exclude=None):
+    """把新增的职位URL（没有时使用完整URL列表）按搜索结果卡片筛选后加入fetch队列"""
+    from jrecin_scraper import skip_by_card
+    from jrecin_store import JOB_STORE_FILE, JobStore, iter_json_list
+
+    for path in ('jrecin_data/new_job_urls.json', 'jrecin_data/all_job_urls.json'):
+        if os.path.exists(path):
+            break
+    else:
+        print("找不到URL列表文件，请先执行URL收集步骤")
+        return 0
+    skipped = {}
+    jobs = skip_by_card(iter_json_list(path), JobStore(JOB_STORE_FILE), card_exclude, skipped)
+    count = submit_jobs(queue, jobs, llm=llm)
+    if skipped:
+        print("根据搜索结果卡片跳过: " + "，".join(f"{reason} {n}个" for reason, n in skipped.items()))
+    return count
+
+
+def _iter_results(queue, stage, batch_size):
+    """按id顺序分批读取某个阶段已完成的任务"""
+    after_id = 0
+    while True:
+        tasks = queue.take_results(stage, batch_size, after_id)
+        yield from tasks
+        if len(tasks) < batch_size:
+            return
+        after_id = tasks[-1]['id']
+
+
+def collect_results(queue, batch_size=500):
+    """汇总工作进程完成的解析和LLM结果，写入本地存储并执行详情处理后的汇总步骤，返回本次汇总的解析结果（JobRecord列表）
+
+    所有结果写入并完成汇总步骤之后才把任务标记为collected，中途出错时下次汇总会重新处理这些结果
+    """
+    from jrecin_analyzer import save_job_data
+    from jrecin_archive import HtmlArchive
+    from jrecin_dedup import NearDupIndex
+    from jrecin_record import JobRecord
+    from jrecin_scraper import finish_details
+    from jrecin_search import SemanticIndex
+    from jrecin_store import JOB_STORE_FILE, JobStore
+
+    job_store = JobStore(JOB_STORE_FILE)
+    archive = HtmlArchive()
+    near_dup = NearDupIndex()
+    search_index = SemanticIndex()
+    writer = BackgroundWriter()
+    os.makedirs('jrecin_data/job_details/json', exist_ok=True)
+    os.makedirs('jrecin_data/job_details/llm_json', exist_ok=True)
+
+    collected = []
+    taken = []
+    for task in _iter_results(queue, 'parse', batch_size):
+        archive.put(task['key'], task['payload']['html'])
+        save_job_data(task['result'], job_store, near_dup, search_index, writer)
+        collected.append(JobRecord.from_dict(task['result']))
+        taken.append((task['id'], task['updated']))
+    writer.close()
+    job_store.save_index()
+    near_dup.save()
+    search_index.save()
+
+    llm_count = 0
+    for task in _iter_results(queue, 'llm', batch_size):
+        atomic_write_json(f"jrecin_data/job_details/llm_json/{task['key']}.json", task['result'], encoding='utf-8')
+        taken.append((task['id'], task['updated']))
+        llm_count += 1
+
+    print(f"已汇总{len(collected)}个解析结果、{llm_count}个LLM结果")
+    finish_details(collected)
+    queue.mark_collected(taken)
+    return collected
+
+
+class Worker:
+    """工作进程：循环领取指定阶段的任务并执行，后台线程定期发送心跳延长租约"""
+
+    def __init__(self, location=WORK_QUEUE_FILE, stages=STAGES, worker_id=None, config=None, backend='ollama',
+                 token=None):
+        from jrecin_config import ScraperConfig
+
+        self.queue = open_queue(location, token)
+        self.stages = list(stages)
+        self.worker_id = worker_id or new_worker_id()
+        self.config = config or ScraperConfig()
+        self.backend = backend
+        self.session = None
+        self.parse_cache = None
+        self.current = set()
+        self._stop = threading.Event()
+
+    def handle_fetch(self, task):
+        job = task['payload']['job']
+        if self.session is None:
+            self.session = self.config.new_session()
+        # 请求间隔由队列统一分配的时间槽保证（所有工作进程合计），这里只等待到本任务的时间槽
+        if task.get('delay', 0) > 0:
+            time.sleep(task['delay'])
+        response = self.session.get(job['url'])
+        response.raise_for_status()
+        payload = {'job': job, 'html': response.text, 'llm': task['payload'].get('llm', False)}
+        return {'status_code': response.status_code}, [('parse', task['key'], payload, task['priority'])]
+
+    def handle_parse(self, task):
+        from jrecin_analyzer import PARSER_VERSION, parse_job_details_cached
+        from jrecin_parse_cache import ParseCache
+
+        if self.parse_cache is None:
+            self.parse_cache = ParseCache(PARSER_VERSION)
+        payload = task['payload']
+        job_data, _ = parse_job_details_cached(payload['html'], payload['job']['url'], task['key'], self.parse_cache)
+        self.parse_cache.save()
+        follow_ups = []
+        if payload.get('llm'):
+            follow_ups.append(('llm', task['key'], {'html': payload['html']}, task['priority']))
+        return job_data, follow_ups
+
+    def handle_llm(self, task):
+        if self.backend == 'claude':
+            from jrecin_llm_analyzer_claude import analyze_html_content
+        else:
+            from jrecin_llm_analyzer import analyze_html_content
+        llm_data = analyze_html_content(task['payload']['html'])
+        if llm_data is None:
+            raise RuntimeError('LLM没有返回有效结果')
+        return llm_data, []
+
+    def _heartbeat_loop(self):
+        interval = LEASE_SECONDS / 4
+        while not self._stop.wait(interval):
+            try:
+                self.queue.heartbeat(self.worker_id, self.stages, list(self.current))
+            except Exception as e:
+                print(f"发送心跳失败: {e}")
+
+    def run(self, max_tasks=None, idle_timeout=None, poll_interval=2.0):
+        """执行任务直到完成max_tasks个，或连续idle_timeout秒没有任务（None表示一直运行），返回完成的任务数"""
+        self.queue.heartbeat(self.worker_id, self.stages)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        print(f"工作进程 {self.worker_id} 已启动，阶段: {','.join(self.stages)}")
+
+        done = 0
+        idle_since = time.monotonic()
+        try:
+            while max_tasks is None or done < max_tasks:
+                task = self.queue.lease(self.stages, self.worker_id)
+                if task is None:
+                    if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                self.current.add(task['id'])
+                try:
+                    result, follow_ups = getattr(self, f"handle_{task['stage']}")(task)
+                except Exception as e:
+                    print(f"任务失败 {task['stage']} {task['key']}: {e}")
+                    self.queue.fail(task['id'], self.worker_id, str(e))
+                else:
+                    if self.queue.complete(task['id'], self.worker_id, result, follow_ups):
+                        done += 1
+                    else:
+                        print(f"任务 {task['stage']} {task['key']} 的租约已被收回，结果丢弃")
+                finally:
+                    self.current.discard(task['id'])
+                idle_since = time.monotonic()
+        finally:
+            self._stop.set()
+            if self.session is not None:
+                self.session.close()
+            if self.parse_cache is not None:
+                self.parse_cache.close()
+        print(f"工作进程 {self.worker_id} 结束，完成{done}个任务")
+        return done
+
+
+def run_worker(location=WORK_QUEUE_FILE, stages=STAGES, max_tasks=None, idle_timeout=None, backend='ollama',
+               config=None, token=None):
+    return Worker(location, stages, config=config, backend=backend, token=token).run(max_tasks, idle_timeout)
+
+
+def run_local_workers(count=4, location=WORK_QUEUE_FILE, stages=STAGES, idle_timeout=10.0, backend='ollama',
+                      token=None):
+    """在本机启动count个工作进程，全部空闲idle_timeout秒后结束（用于测试或单机并行处理）"""
+    processes = [multiprocessing.Process(target=run_worker, args=(location, stages),
+                                         kwargs={'idle_timeout': idle_timeout, 'backend': backend, 'token': token})
+                 for _ in range(count)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return [process.exitcode for process in processes]
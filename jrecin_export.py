@@ -0,0 +1,310 @@
+"""
+JRec-IN Portal 导出
+一次读取职位存储（或任意职位记录的迭代器），把每一行同时写入多个输出（CSV / Excel / Parquet / JSONL），
+不为每种格式单独遍历一遍数据，也不在内存中保存全部行（Parquet按批写出）。支持选择列和筛选条件（与关注列表相同的条件写法）
+
+增量导出：记录每个输出上次导出的各职位行的哈希。JSONL只追加新增或有变化的行（不再符合条件的职位追加删除标记）；
+其他格式需要整体重写，所有行都没有变化时保留原文件不动。所有输出都先写临时文件再替换，中断时不会留下写了一半的文件
+
+字段映射统一使用 jrecin_record.FIELDS；列名可以用字段名（job_id）或表头（职位ID）
+"""
+
+import csv
+import hashlib
+import json
+import os
+
+from jrecin_record import FIELDS, as_dict, as_record
+
+EXPORT_STATE_FILE = 'jrecin_data/export_state.json'
+PARQUET_BATCH_SIZE = 5000
+
+FIELD_NAMES = [field for _, field, _ in FIELDS]
+FIELD_LABELS = {field: header for _, field, header in FIELDS}
+_COLUMN_ALIASES = dict({header: field for _, field, header in FIELDS}, **{field: field for field in FIELD_NAMES})
+
+
+def resolve_columns(columns=None):
+    """把列名（字段名或表头）转换为字段名列表，None表示全部列"""
+    if not columns:
+        return list(FIELD_NAMES)
+    fields = []
+    for column in columns:
+        if column not in _COLUMN_ALIASES:
+            raise ValueError(f"未知的列: {column}（可用: {', '.join(FIELD_NAMES)}）")
+        fields.append(_COLUMN_ALIASES[column])
+    return fields
+
+
+class Sink:
+    """导出目标：open() 后逐行 write(row)，close() 结束；row 为 {字段名: 值}
+
+    header: 'label' 使用中文表头，'field' 使用字段名
+    """
+
+    extension = ''
+    incremental = False  # 是否支持只追加有变化的行
+
+    def __init__(self, path, columns=None, header='label'):
+        self.path = path
+        self.fields = resolve_columns(columns)
+        self.header = header
+        self.count = 0
+        self.temp_path = None
+        self.append = False
+
+    @property
+    def names(self):
+        return [FIELD_LABELS[field] if self.header == 'label' else field for field in self.fields]
+
+    @property
+    def state_key(self):
+        return f"{type(self).__name__}:{self.path}:{','.join(self.fields)}"
+
+    def open(self, append=False):
+        """append=True 时在原文件后追加（只有incremental格式支持），否则写入临时文件"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.temp_path = self.path + '.tmp'
+
+    def write(self, row):
+        raise NotImplementedError
+
+    def delete(self, job_id):
+        """记录职位不再符合条件（只有增量格式需要）"""
+
+    def close(self, keep=True):
+        """keep=False 时丢弃本次写出的内容，保留原文件"""
+        if keep:
+            os.replace(self.temp_path, self.path)
+        elif os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class CsvSink(Sink):
+    extension = '.csv'
+
+    def __init__(self, path, columns=None, header='label', encoding='utf-8-sig'):
+        super().__init__(path, columns, header)
+        self.encoding = encoding
+
+    def open(self, append=False):
+        super().open(append)
+        self._file = open(self.temp_path, 'w', encoding=self.encoding, newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.names)
+
+    def write(self, row):
+        self._writer.writerow([row[field] for field in self.fields])
+        self.count += 1
+
+    def close(self, keep=True):
+        self._file.close()
+        super().close(keep)
+
+
+class JsonlSink(Sink):
+    """每行一个扁平的JSON对象；增量导出时追加写入，同一job_id以最后一行为准，删除标记为 {"job_id": ..., "_deleted": true}"""
+
+    extension = '.jsonl'
+    incremental = True
+
+    def __init__(self, path, columns=None, header='field'):
+        super().__init__(path, columns, header)
+        if 'job_id' not in self.fields:
+            self.fields.insert(0, 'job_id')
+
+    def open(self, append=False):
+        super().open(append)
+        self.append = append and os.path.exists(self.path)
+        # 追加时直接写入目标文件（追加不会破坏已有的行）
+        self._file = open(self.path if self.append else self.temp_path, 'a' if self.append else 'w',
+                          encoding='utf-8')
+
+    def write(self, row):
+        self._file.write(json.dumps(dict(zip(self.names, (row[field] for field in self.fields))),
+                                    ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def delete(self, job_id):
+        self._file.write(json.dumps({self.names[self.fields.index('job_id')]: job_id, '_deleted': True}) + '\n')
+
+    def close(self, keep=True):
+        self._file.close()
+        if not self.append:
+            super().close(keep)
+
+
+class ExcelSink(Sink):
+    """Excel工作簿（openpyxl的只写模式，逐行写出）"""
+
+    extension = '.xlsx'
+
+    def open(self, append=False):
+        from openpyxl import Workbook  # 需要先安装: pip install openpyxl
+
+        super().open(append)
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet('jobs')
+        self._sheet.append(self.names)
+
+    def write(self, row):
+        self._sheet.append([row[field] for field in self.fields])
+        self.count += 1
+
+    def close(self, keep=True):
+        if keep:
+            self._workbook.save(self.temp_path)
+        else:
+            self._workbook.close()
+        super().close(keep)
+
+
+class ParquetSink(Sink):
+    """Parquet文件（pyarrow），每batch_size行写出一个行组"""
+
+    extension = '.parquet'
+
+    def __init__(self, path, columns=None, header='field', batch_size=PARQUET_BATCH_SIZE):
+        super().__init__(path, columns, header)
+        self.batch_size = batch_size
+
+    def open(self, append=False):
+        import pyarrow as pa  # 需要先安装: pip install pyarrow
+        import pyarrow.parquet as pq
+
+        super().open(append)
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.bool_() if field == 'is_active' else pa.string())
+                                  for field, name in zip(self.fields, self.names)])
+        self._writer = pq.ParquetWriter(self.temp_path, self._schema)
+        self._batch = []
+
+    def _flush(self):
+        if self._batch:
+            columns = list(zip(*self._batch))
+            self._writer.write_table(self._pa.Table.from_arrays(
+                [self._pa.array(column, type=self._schema.field(i).type) for i, column in enumerate(columns)],
+                schema=self._schema))
+            self._batch = []
+
+    def write(self, row):
+        self._batch.append(tuple(row[field] for field in self.fields))
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def close(self, keep=True):
+        self._flush()
+        self._writer.close()
+        super().close(keep)
+
+
+SINKS = {sink.extension.lstrip('.'): sink for sink in (CsvSink, JsonlSink, ExcelSink, ParquetSink)}
+
+
+def make_sink(format_name, path, columns=None):
+    """按格式名（csv / jsonl / xlsx / parquet）创建导出目标，path的扩展名替换为该格式的扩展名"""
+    if format_name not in SINKS:
+        raise ValueError(f"未知的导出格式: {format_name}（可用: {', '.join(SINKS)}）")
+    sink = SINKS[format_name]
+    return sink(os.path.splitext(path)[0] + sink.extension, columns)
+
+
+def _load_state(path):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def _state_path(key):
+    """状态键（"类名:路径:列|条件"）中的输出路径"""
+    return key.split('|', 1)[0].split(':', 1)[1].rsplit(':', 1)[0]
+
+
+def _row_hash(row, fields):
+    return hashlib.sha1(json.dumps([row[field] for field in fields], ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+def export_jobs(jobs, sinks, where=None, incremental=False, state_path=EXPORT_STATE_FILE):
+    """一次遍历jobs（嵌套字典或JobRecord），把符合条件的行写入所有sinks，返回 {输出路径: 写出的行数}
+
+    where: 可选的筛选条件（关注列表条件的写法，例如 {'keywords': [...], 'regions': ['関東']}），默认不限是否有效
+    incremental: 只写出与上次导出相比有变化的行（见模块说明）
+    """
+    predicate = None
+    if where:
+        from jrecin_watchlist import compile_watchlist
+        predicate = compile_watchlist(dict({'active_only': False}, **where))
+    where_key = json.dumps(where or {}, ensure_ascii=False, sort_keys=True)
+
+    state = _load_state(state_path) if incremental else {}
+    previous, current, changed = {}, {}, {}
+    for sink in sinks:
+        key = f'{sink.state_key}|{where_key}'
+        entry = state.get(key) or {}
+        # 没有上次的状态或输出文件已不存在时只能完整导出
+        previous[sink] = entry if os.path.exists(sink.path) else {}
+        current[sink] = {}
+        changed[sink] = not previous[sink]
+        sink.open(append=incremental and sink.incremental and bool(previous[sink]))
+
+    fields = sorted({field for sink in sinks for field in sink.fields}, key=FIELD_NAMES.index)
+    # 中途出错时丢弃所有临时文件，保留原有的输出
+    keep = dict.fromkeys(sinks, False)
+    try:
+        for job in jobs:
+            if predicate is not None and not predicate(as_dict(job)):
+                continue
+            record = as_record(job)
+            row = {field: getattr(record, field) for field in fields}
+            for sink in sinks:
+                if incremental:
+                    digest = _row_hash(row, sink.fields)
+                    current[sink][record.job_id] = digest
+                    if previous[sink].get(record.job_id) != digest:
+                        changed[sink] = True
+                    elif sink.append:
+                        continue
+                sink.write(row)
+        for sink in sinks:
+            removed = set(previous[sink]) - set(current[sink])
+            if removed:
+                changed[sink] = True
+                for job_id in sorted(removed):
+                    sink.delete(job_id)
+            # 整体重写的格式在增量导出且没有任何变化时保留原文件
+            keep[sink] = changed[sink] or not incremental
+    finally:
+        for sink in sinks:
+            sink.close(keep=keep[sink])
+
+    # 输出文件已被本次导出覆盖：同一路径下其他列、其他条件或非增量导出留下的状态都已失效
+    if not incremental:
+        state = _load_state(state_path)
+    stale = [key for key in state if any(_state_path(key) == sink.path for sink in sinks)]
+    for key in stale:
+        del state[key]
+    if incremental:
+        for sink in sinks:
+            state[f'{sink.state_key}|{where_key}'] = current[sink]
+    if incremental or stale:
+        directory = os.path.dirname(state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(state_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(state_path + '.tmp', state_path)
+
+    results = {}
+    for sink in sinks:
+        if sink.append:
+            print(f"已向{sink.path}追加{sink.count}条有变化的职位信息")
+        elif keep[sink]:
+            print(f"已将{sink.count}条职位信息保存至{sink.path}")
+        else:
+            print(f"{sink.path} 没有变化，保留原文件")
+        results[sink.path] = sink.count
+    return results
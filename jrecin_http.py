@@ -0,0 +1,176 @@
+"""
+JRec-IN Portal HTTP客户端
+爬虫和LLM后端共用的HTTP层：连接池和keep-alive复用、显式的连接/读取超时、gzip（安装brotli时还有br）压缩。
+安装了httpx时使用httpx（同时安装h2且服务器支持时使用HTTP/2），否则使用requests会话并调整连接池大小。
+每个爬取任务仍然使用独立的客户端（各自的cookies和CSRF令牌），无状态的LLM请求共用一个客户端
+
+测量单次请求开销: python jrecin_http.py
+"""
+
+import importlib.util
+import threading
+import time
+
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 30.0
+POOL_SIZE = 10  # 每个客户端保持的最大连接数（爬虫通常只访问一个主机）
+
+
+def _installed(module_name):
+    return importlib.util.find_spec(module_name) is not None
+
+
+def accept_encoding():
+    """客户端能够解码的压缩格式"""
+    if _installed('brotli') or _installed('brotlicffi'):
+        return 'gzip, deflate, br'
+    return 'gzip, deflate'
+
+
+def http_errors():
+    """已安装的HTTP库的请求异常类型，用于 except http_errors() as e"""
+    errors = []
+    if _installed('requests'):
+        import requests
+        errors.append(requests.exceptions.RequestException)
+    if _installed('httpx'):
+        import httpx
+        errors.append(httpx.HTTPError)
+    return tuple(errors)
+
+
+class HttpClient:
+    """带连接池的HTTP客户端，接口与requests会话相同（get/post/headers）
+
+    backend: 'auto'（有httpx时用httpx）、'httpx' 或 'requests'
+    timeout: (连接超时, 读取超时) 秒
+    session_archive: 可选的jrecin_replay.SessionArchive，在传输层录制或回放所有请求
+    """
+
+    def __init__(self, headers=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), pool_size=POOL_SIZE,
+                 backend='auto', http2=True, session_archive=None):
+        if backend == 'auto':
+            backend = 'httpx' if _installed('httpx') else 'requests'
+        self.backend = backend
+        self.timeout = timeout
+
+        if backend == 'httpx':
+            import httpx
+
+            self.http2 = http2 and _installed('h2')
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            transport = session_archive.httpx_transport(self.http2, limits) if session_archive is not None else None
+            self._client = httpx.Client(
+                http2=self.http2,
+                timeout=self._httpx_timeout(timeout),
+                limits=limits,
+                follow_redirects=True,
+                transport=transport,
+            )
+        else:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self.http2 = False
+            self._client = requests.Session()
+            if session_archive is not None:
+                adapter = session_archive.requests_adapter(pool_size)
+            else:
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self._client.mount('https://', adapter)
+            self._client.mount('http://', adapter)
+
+        self.headers = self._client.headers
+        self.headers['Accept-Encoding'] = accept_encoding()
+        if headers:
+            self.headers.update(headers)
+
+    @staticmethod
+    def _httpx_timeout(timeout):
+        import httpx
+
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """发送请求；timeout为 (连接超时, 读取超时)，省略时使用客户端的默认值"""
+        timeout = timeout or self.timeout
+        if self.backend == 'httpx':
+            timeout = self._httpx_timeout(timeout)
+        return self._client.request(method, url, timeout=timeout, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    """无状态请求（LLM API等）共用的客户端，保持连接复用"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
+
+
+def benchmark(count=300):
+    """在本地测试服务器上比较单次请求的平均耗时：每次新建连接的requests.get / requests会话 / httpx客户端"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    body = ('<html>' + 'JRec-IN ' * 2000 + '</html>').encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # 支持keep-alive
+        disable_nagle_algorithm = True  # 响应头和正文分两次写出，避免与延迟ACK叠加产生约40ms的等待
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/'
+
+    def measure(name, get):
+        get(url)  # 预热
+        start = time.perf_counter()
+        for _ in range(count):
+            get(url).text
+        print(f"{name:<28}{(time.perf_counter() - start) / count * 1000:8.3f} ms/请求")
+
+    try:
+        if _installed('requests'):
+            import requests
+            measure('requests.get（无会话）', lambda u: requests.get(u, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)))
+            with HttpClient(backend='requests') as client:
+                measure('HttpClient(requests)', client.get)
+        if _installed('httpx'):
+            with HttpClient(backend='httpx') as client:
+                measure('HttpClient(httpx)', client.get)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -5,11 +5,14 @@ JRec-IN Portal职位详情LLM分析器
 
 import json
 import os
-import requests
 import argparse
-from bs4 import BeautifulSoup
 import time
 
+from jrecin_llm_sections import MAX_PROMPT_CHARS, extract_in_sections, page_text
+from jrecin_normalize import normalize_record
+from jrecin_output import atomic_write_json
+from jrecin_profile import stage
+
 # Ollama API设置
 OLLAMA_API_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "gemma3:12b"
@@ -17,6 +20,9 @@ MODEL_NAME = "gemma3:12b"
 
 # MODEL_NAME = "deepseek-r1:14b"
 
+# 本地模型生成较慢，读取超时单独设置（秒）
+OLLAMA_READ_TIMEOUT = 600.0
+
 
 def load_html_file(file_path):
     """加载HTML文件"""
@@ -31,6 +37,8 @@ def load_html_file(file_path):
 
 def preprocess_html(html_content):
     """预处理HTML内容，简化以适应LLM处理"""
+    from bs4 import BeautifulSoup
+
     try:
         # 使用BeautifulSoup解析HTML
         soup = BeautifulSoup(html_content, 'html.parser')
@@ -53,19 +61,19 @@ def preprocess_html(html_content):
         return html_content
 
 
-def generate_prompt(html_content):
+def generate_prompt(page_content):
     """生成发送给LLM的提示"""
     prompt = """
-你是一名专业的HTML文档分析器，专门负责从JRec-IN Portal的职位详情页面提取结构化信息。
-我会提供一个职位详情页面的HTML内容，请你分析并提取以下信息，并且以json的格式输出：
+你是一名专业的文档分析器，专门负责从JRec-IN Portal的职位详情页面提取结构化信息。
+我会提供一个职位详情页面的正文（已去掉HTML标记，按【小标题】分节），请你分析并提取以下信息，并且以json的格式输出：
 
 
 
-请仔细阅读HTML内容，尽可能准确地提取每个字段的信息。如果无法找到某个字段的信息，请将该字段值设为空字符串""或适当的默认值。
+请仔细阅读页面内容，尽可能准确地提取每个字段的信息。如果无法找到某个字段的信息，请将该字段值设为空字符串""或适当的默认值。
 特别注意tenure_status字段，需要判断职位是否为テニュアトラック（终身教职轨道）。
 对于teaching_requirements，请从职位描述中提取与教学相关的要求。
 
-HTML内容:
+页面内容:
 """
 
     prompt_end = """
@@ -96,11 +104,13 @@ HTML内容:
 }
 以上是我所需要的信息。具体如何申请并不是我所关心的。请以以上给出的JSON格式返回提取的相关信息，不要包含任何其他解释或评论。"""
 
-    return prompt + html_content + prompt_end
+    return prompt + page_content + prompt_end
 
 
 def query_ollama(prompt, max_retries=3, retry_delay=2):
-    """向Ollama API发送请求并获取响应"""
+    """向Ollama API发送请求并获取响应（复用共享HTTP客户端的连接）"""
+    from jrecin_http import CONNECT_TIMEOUT, http_errors, shared_client
+
     data = {
         "model": MODEL_NAME,
         "prompt": prompt,
@@ -109,11 +119,11 @@ def query_ollama(prompt, max_retries=3, retry_delay=2):
 
     for attempt in range(max_retries):
         try:
-            response = requests.post(OLLAMA_API_URL, json=data)
+            response = shared_client().post(OLLAMA_API_URL, json=data, timeout=(CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT))
             response.raise_for_status()
             response_data = response.json()
             return response_data.get('response', '')
-        except requests.exceptions.RequestException as e:
+        except http_errors() as e:
             print(f"尝试 {attempt + 1}/{max_retries} 请求Ollama API时出错: {e}")
             if attempt < max_retries - 1:
                 print(f"等待 {retry_delay} 秒后重试...")
@@ -134,7 +144,8 @@ def extract_json_from_response(response_text):
         if json_start >= 0 and json_end > json_start:
             json_str = response_text[json_start:json_end]
             # 验证JSON是否有效
-            return json.loads(json_str)
+            # 统一全角/半角等写法，与正则分析器的输出保持一致
+            return normalize_record(json.loads(json_str))
         else:
             print("无法在响应中找到JSON块")
             return None
@@ -144,24 +155,36 @@ def extract_json_from_response(response_text):
         return None
 
 
-def analyze_job_html(file_path, output_file=None):
-    """分析职位HTML文件并提取信息"""
-    # 加载HTML文件
-    html_content = load_html_file(file_path)
-    if not html_content:
-        return None
+def load_archived_html(job_id):
+    """从HTML归档中读取职位的最新版本"""
+    from jrecin_archive import HtmlArchive
+    html_content = HtmlArchive().get(job_id)
+    if html_content is None:
+        print(f"归档中找不到职位: {job_id}")
+    return html_content
+
 
+def analyze_html_content(html_content):
+    """用LLM分析一个职位详情页面的HTML内容，返回提取的JSON（失败时返回None）"""
     # 预处理HTML
     print("预处理HTML内容...")
     processed_html = preprocess_html(html_content)
 
-    # 生成提示
+    # 生成提示（只包含去掉HTML标记的正文）；提示过长时按章节分段并行提取
+    prompt = generate_prompt(page_text(processed_html))
+    if len(prompt) > MAX_PROMPT_CHARS:
+        print(f"提示长度 {len(prompt)} 字符，改为分段提取...")
+        start_time = time.time()
+        with stage('llm_sections'):
+            job_data = extract_in_sections(processed_html, query_ollama, extract_json_from_response)
+        print(f"LLM处理用时: {time.time() - start_time:.2f}秒")
+        return job_data
     print("生成提示并发送到Ollama...")
-    prompt = generate_prompt(processed_html)
 
     # 查询Ollama
     start_time = time.time()
-    response_text = query_ollama(prompt)
+    with stage('llm'):
+        response_text = query_ollama(prompt)
     end_time = time.time()
 
     if not response_text:
@@ -171,32 +194,111 @@ def analyze_job_html(file_path, output_file=None):
     print(f"LLM处理用时: {end_time - start_time:.2f}秒")
 
     # 提取JSON
-    job_data = extract_json_from_response(response_text)
+    return extract_json_from_response(response_text)
+
+
+def analyze_job_html(file_path, output_file=None, job_id=None):
+    """分析职位HTML文件（或按job_id从归档中读取）并提取信息"""
+    # 加载HTML文件
+    html_content = load_archived_html(job_id) if job_id else load_html_file(file_path)
+    if not html_content:
+        return None
+
+    job_data = analyze_html_content(html_content)
 
     # 保存结果
     if job_data and output_file:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(job_data, f, ensure_ascii=False, indent=2)
+        atomic_write_json(output_file, job_data, encoding='utf-8')
         print(f"分析结果已保存至 {output_file}")
 
     return job_data
 
 
+# 时间预算紧张时，剩余天数（优先级）超过该值的职位不做LLM分析
+LOW_PRIORITY_DAYS = 60
+
+
+def analyze_jobs_by_priority(max_jobs=None, analyze=None, output_dir='jrecin_data/job_details/llm_json',
+                             time_budget=None, job_ids=None):
+    """按紧急程度依次对职位存储中尚未分析的职位进行LLM分析，跳过已过期的职位
+
+    time_budget: 可选的时间预算（秒）；预算紧张时跳过低优先级职位，预算用尽时停止，推迟的职位记入运行摘要
+    job_ids: 可选的职位ID集合（例如质量监控列出的needs_llm），提供时只分析这些职位，已有结果的也重新分析
+    """
+    from jrecin_budget import TimeBudget
+    from jrecin_dedup import NearDupIndex
+    from jrecin_scheduler import PriorityScheduler
+    from jrecin_store import JOB_STORE_FILE, JobStore
+
+    analyze = analyze or analyze_job_html
+    near_dup = NearDupIndex()
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 用已解析的截止日期、任期状态和更新日期排序
+    scheduler = PriorityScheduler()
+    for record in JobStore(JOB_STORE_FILE):
+        job_id = record['基本信息']['job_id']
+        if job_ids is not None:
+            if job_id in job_ids:
+                scheduler.push({'job_id': job_id}, record)
+        elif not os.path.exists(os.path.join(output_dir, f'{job_id}.json')):
+            scheduler.push({'job_id': job_id}, record)
+    print(f"待分析{len(scheduler)}个职位，跳过{len(scheduler.skipped)}个已过期职位")
+
+    budget = TimeBudget(time_budget)
+    pending = min(len(scheduler), max_jobs) if max_jobs is not None else len(scheduler)
+    results = {}
+    for i, (priority, job) in enumerate(scheduler.items(), 1):
+        if max_jobs is not None and i > max_jobs:
+            break
+        pending -= 1
+
+        # 近似重复的职位直接复用已分析职位的结果，不再调用LLM
+        output_file = os.path.join(output_dir, f"{job['job_id']}.json")
+        canonical = near_dup.duplicate_of(job['job_id'])
+        canonical_file = os.path.join(output_dir, f'{canonical}.json') if canonical else None
+        if canonical_file and os.path.exists(canonical_file):
+            with open(canonical_file, 'r', encoding='utf-8') as f:
+                results[job['job_id']] = json.load(f)
+            atomic_write_json(output_file, results[job['job_id']], encoding='utf-8')
+            print(f"职位 {job['job_id']} 与 {canonical} 近似重复，复用其LLM分析结果")
+            continue
+
+        if not budget.can_afford('llm'):
+            budget.defer('llm', [job['job_id']] + [rest['job_id'] for rest in scheduler])
+            break
+        # 预测剩余工作超出预算时，低优先级的职位不做LLM分析
+        if priority > LOW_PRIORITY_DAYS and budget.is_tight('llm', pending + 1):
+            budget.defer('llm', [job['job_id']])
+            continue
+
+        print(f"LLM分析第 {i} 个职位 - {job['job_id']}")
+        start_time = time.monotonic()
+        results[job['job_id']] = analyze(None, output_file, job_id=job['job_id'])
+        budget.record('llm', time.monotonic() - start_time)
+
+    budget.write_summary('jrecin_data/llm_run_summary.json')
+    return results
+
+
 def main():
     # 设置命令行参数
     parser = argparse.ArgumentParser(description='使用LLM分析JRec-IN Portal职位HTML')
-    parser.add_argument('html_file', help='要分析的HTML文件路径')
+    parser.add_argument('html_file', nargs='?', help='要分析的HTML文件路径')
+    parser.add_argument('--job-id', help='从HTML归档中读取该职位的最新版本，代替HTML文件')
     parser.add_argument('--output', '-o', help='输出JSON文件路径')
     args = parser.parse_args()
+    if not args.html_file and not args.job_id:
+        parser.error('需要提供HTML文件路径或 --job-id')
 
     # 生成默认输出文件名
     if not args.output:
-        base_name = os.path.splitext(os.path.basename(args.html_file))[0]
+        base_name = args.job_id or os.path.splitext(os.path.basename(args.html_file))[0]
         args.output = f"{base_name}_llm_analysis.json"
 
     # 分析HTML
-    print(f"开始分析HTML文件: {args.html_file}")
-    job_data = analyze_job_html(args.html_file, args.output)
+    print(f"开始分析HTML: {args.job_id or args.html_file}")
+    job_data = analyze_job_html(args.html_file, args.output, job_id=args.job_id)
 
     if job_data:
         print("分析成功完成")
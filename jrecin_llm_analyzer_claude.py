@@ -5,12 +5,13 @@ JRec-IN Portal职位详情LLM分析器
 
 import json
 import os
-import requests
 import argparse
-from bs4 import BeautifulSoup
 import time
 
-import anthropic  # 需要先安装: pip install anthropic
+from jrecin_llm_sections import MAX_PROMPT_CHARS, extract_in_sections, page_text
+from jrecin_normalize import normalize_record
+from jrecin_output import atomic_write_json
+from jrecin_profile import stage
 
 CLAUDE_API_KEY = "your-api-key-here"  # 请替换为您的API密钥
 CLAUDE_MODEL = "claude-3-opus-20240229"
@@ -29,6 +30,8 @@ def load_html_file(file_path):
 
 def preprocess_html(html_content):
     """预处理HTML内容，简化以适应LLM处理"""
+    from bs4 import BeautifulSoup
+
     try:
         # 使用BeautifulSoup解析HTML
         soup = BeautifulSoup(html_content, 'html.parser')
@@ -51,19 +54,19 @@ def preprocess_html(html_content):
         return html_content
 
 
-def generate_prompt(html_content):
+def generate_prompt(page_content):
     """生成发送给LLM的提示"""
     prompt = """
-你是一名专业的HTML文档分析器，专门负责从JRec-IN Portal的职位详情页面提取结构化信息。
-我会提供一个职位详情页面的HTML内容，请你分析并提取以下信息，并且以json的格式输出：
+你是一名专业的文档分析器，专门负责从JRec-IN Portal的职位详情页面提取结构化信息。
+我会提供一个职位详情页面的正文（已去掉HTML标记，按【小标题】分节），请你分析并提取以下信息，并且以json的格式输出：
 
 
 
-请仔细阅读HTML内容，尽可能准确地提取每个字段的信息。如果无法找到某个字段的信息，请将该字段值设为空字符串""或适当的默认值。
+请仔细阅读页面内容，尽可能准确地提取每个字段的信息。如果无法找到某个字段的信息，请将该字段值设为空字符串""或适当的默认值。
 特别注意tenure_status字段，需要判断职位是否为テニュアトラック（终身教职轨道）。
 对于teaching_requirements，请从职位描述中提取与教学相关的要求。
 
-HTML内容:
+页面内容:
 """
 
     prompt_end = """
@@ -94,12 +97,24 @@ HTML内容:
 }
 以上是我所需要的信息。具体如何申请并不是我所关心的。请以以上给出的JSON格式返回提取的相关信息，不要包含任何其他解释或评论。"""
 
-    return prompt + html_content + prompt_end
+    return prompt + page_content + prompt_end
+
+
+_client = None
+
+
+def get_client():
+    """所有请求共用一个客户端，复用其连接池"""
+    global _client
+    if _client is None:
+        import anthropic  # 需要先安装: pip install anthropic
+        _client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+    return _client
 
 
 def query_claude(prompt, max_retries=3, retry_delay=2):
     """向Claude API发送请求并获取响应"""
-    client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+    client = get_client()
 
     for attempt in range(max_retries):
         try:
@@ -135,7 +150,8 @@ def extract_json_from_response(response_text):
 
         if json_start >= 0 and json_end > json_start:
             json_str = response_text[json_start:json_end]
-            return json.loads(json_str)
+            # 统一全角/半角等写法，与正则分析器的输出保持一致
+            return normalize_record(json.loads(json_str))
         else:
             print("无法在响应中找到JSON块")
             return None
@@ -145,24 +161,36 @@ def extract_json_from_response(response_text):
         return None
 
 
-def analyze_job_html(file_path, output_file=None):
-    """分析职位HTML文件并提取信息"""
-    # 加载HTML文件
-    html_content = load_html_file(file_path)
-    if not html_content:
-        return None
+def load_archived_html(job_id):
+    """从HTML归档中读取职位的最新版本"""
+    from jrecin_archive import HtmlArchive
+    html_content = HtmlArchive().get(job_id)
+    if html_content is None:
+        print(f"归档中找不到职位: {job_id}")
+    return html_content
 
+
+def analyze_html_content(html_content):
+    """用LLM分析一个职位详情页面的HTML内容，返回提取的JSON（失败时返回None）"""
     # 预处理HTML
     print("预处理HTML内容...")
     processed_html = preprocess_html(html_content)
 
-    # 生成提示
+    # 生成提示（只包含去掉HTML标记的正文）；提示过长时按章节分段并行提取
+    prompt = generate_prompt(page_text(processed_html))
+    if len(prompt) > MAX_PROMPT_CHARS:
+        print(f"提示长度 {len(prompt)} 字符，改为分段提取...")
+        start_time = time.time()
+        with stage('llm_sections'):
+            job_data = extract_in_sections(processed_html, query_claude, extract_json_from_response)
+        print(f"LLM处理用时: {time.time() - start_time:.2f}秒")
+        return job_data
     print("生成提示并发送到Ollama...")
-    prompt = generate_prompt(processed_html)
 
     # 查询Ollama
     start_time = time.time()
-    response_text = query_claude(prompt)
+    with stage('llm'):
+        response_text = query_claude(prompt)
     end_time = time.time()
 
     if not response_text:
@@ -172,12 +200,21 @@ def analyze_job_html(file_path, output_file=None):
     print(f"LLM处理用时: {end_time - start_time:.2f}秒")
 
     # 提取JSON
-    job_data = extract_json_from_response(response_text)
+    return extract_json_from_response(response_text)
+
+
+def analyze_job_html(file_path, output_file=None, job_id=None):
+    """分析职位HTML文件（或按job_id从归档中读取）并提取信息"""
+    # 加载HTML文件
+    html_content = load_archived_html(job_id) if job_id else load_html_file(file_path)
+    if not html_content:
+        return None
+
+    job_data = analyze_html_content(html_content)
 
     # 保存结果
     if job_data and output_file:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(job_data, f, ensure_ascii=False, indent=2)
+        atomic_write_json(output_file, job_data, encoding='utf-8')
         print(f"分析结果已保存至 {output_file}")
 
     return job_data
@@ -186,18 +223,21 @@ def analyze_job_html(file_path, output_file=None):
 def main():
     # 设置命令行参数
     parser = argparse.ArgumentParser(description='使用LLM分析JRec-IN Portal职位HTML')
-    parser.add_argument('html_file', help='要分析的HTML文件路径')
+    parser.add_argument('html_file', nargs='?', help='要分析的HTML文件路径')
+    parser.add_argument('--job-id', help='从HTML归档中读取该职位的最新版本，代替HTML文件')
     parser.add_argument('--output', '-o', help='输出JSON文件路径')
     args = parser.parse_args()
+    if not args.html_file and not args.job_id:
+        parser.error('需要提供HTML文件路径或 --job-id')
 
     # 生成默认输出文件名
     if not args.output:
-        base_name = os.path.splitext(os.path.basename(args.html_file))[0]
+        base_name = args.job_id or os.path.splitext(os.path.basename(args.html_file))[0]
         args.output = f"{base_name}_llm_analysis.json"
 
     # 分析HTML
-    print(f"开始分析HTML文件: {args.html_file}")
-    job_data = analyze_job_html(args.html_file, args.output)
+    print(f"开始分析HTML: {args.job_id or args.html_file}")
+    job_data = analyze_job_html(args.html_file, args.output, job_id=args.job_id)
 
     if job_data:
         print("分析成功完成")
@@ -0,0 +1,208 @@
+"""
+JRec-IN Portal 长职位的分段LLM提取
+整页提示词过长时（备考、申请方法等部分很长），按详情页的小标题（card_subTitle / card_listTitle）把正文切分为章节，
+按字段组只发送相关章节：
+- basic:  职位标题、机构、地点、研究领域、雇佣类型、任期状态等（页面开头的概要部分）
+- terms:  薪资和工作条件
+- duties: 职位描述、部门、资格要求、教学要求
+申请方法、提交材料、联系方式等与提取字段无关的章节不发送。每个字段组的文本超过 MAX_CHUNK_CHARS 时再切分为多次调用
+（最多 MAX_CHUNKS_PER_GROUP 次），所有调用并行发出，最后合并各部分JSON并校验字段（只接受该字段组负责的字段，统一转换为字符串）
+
+两个LLM后端共用：analyze_html_content 的整页提示词也只包含 page_text（去掉HTML标记、按【小标题】分节的正文），
+提示词超过 MAX_PROMPT_CHARS 时调用 extract_in_sections；判断的长度就是实际发送的长度
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from jrecin_normalize import normalize_text
+from jrecin_record import FIELDS, LLM_FIELDS
+
+# 整页提示词超过该长度（字符）时改为分段提取（gemma3:12b等本地模型的默认上下文较短，超出部分会被静默截断）
+MAX_PROMPT_CHARS = 8000
+# 每次调用发送的正文上限（字符）
+MAX_CHUNK_CHARS = 3000
+# 每个字段组最多的调用次数，超出部分（通常是很长的备考的后半部分）不发送
+MAX_CHUNKS_PER_GROUP = 2
+# 同时发出的LLM请求数（Ollama需要 OLLAMA_NUM_PARALLEL 大于1才会并行处理）
+PARALLEL_CALLS = 3
+
+HEADING_CLASSES = ('card_subTitle', 'card_listTitle')
+# 页面开头（第一个小标题之前）的概要部分
+SUMMARY_HEADING = '概要'
+
+# 字段组：{负责的字段: 字段说明}
+FIELD_GROUPS = {
+    'basic': {
+        'position_title': '职位标题(比如教授，副教授，讲师，或者几个的组合？)',
+        'institution': '机构名称',
+        'institution_type': '机构类型（比如大学，民间公司等）',
+        'location': '工作地点',
+        'research_field': '研究领域',
+        'position_type': '职位类型',
+        'employment_type': '雇佣类型',
+        'tenure_status': '任期状态（是否为テニュアトラック）',
+    },
+    'terms': {
+        'salary': '薪资范围',
+        'salary_description': '薪资说明',
+        'working_hours_description': '工作时间说明',
+    },
+    'duties': {
+        'job_description': '职位描述',
+        'department': '所属部门',
+        'qualifications': '资格要求',
+        'teaching_requirements': '教学要求（具体教学哪几门课，是否可以日语教学）',
+    },
+}
+# 小标题包含这些关键词时归入对应字段组；都不包含时归入basic
+HEADING_GROUPS = (
+    ('skip', ('応募方法', '提出書類', '応募書類', '選考', '問い合わせ', '問合せ', '連絡先', '送付先', '応募期間')),
+    ('terms', ('給与', '給料', '年収', '待遇', '勤務', '休日', '休暇', '保険', '手当')),
+    ('duties', ('仕事内容', '職務', '配属', '資格', '担当', '授業', '教育', '備考')),
+)
+
+_FIELD_SECTIONS = {field: section for section, field, _ in FIELDS}
+
+
+def split_sections(card_html):
+    """按小标题把预处理后的HTML切分为 [(小标题, 正文)]，正文为逐行的纯文本"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(card_html, 'html.parser')
+    sections = []
+    heading, lines = SUMMARY_HEADING, []
+    for node in soup.find_all(string=True):
+        if node.parent.name in ('script', 'style'):
+            continue
+        text = normalize_text(node)
+        if not text:
+            continue
+        classes = node.parent.get('class') or []
+        if node.parent.name == 'p' and any(c in HEADING_CLASSES for c in classes):
+            if lines:
+                sections.append((heading, '\n'.join(lines)))
+            heading, lines = text, []
+        else:
+            lines.append(text)
+    if lines:
+        sections.append((heading, '\n'.join(lines)))
+    return sections
+
+
+def section_group(heading):
+    if heading == SUMMARY_HEADING:
+        return 'basic'
+    for group, keywords in HEADING_GROUPS:
+        if any(keyword in heading for keyword in keywords):
+            return group
+    return 'basic'
+
+
+def pack_chunks(sections, limit=MAX_CHUNK_CHARS):
+    """把章节按顺序装入不超过limit字符的块，单个章节过长时按长度硬切分"""
+    chunks, current = [], ''
+    for heading, text in sections:
+        block = f'【{heading}】\n{text}\n'
+        while len(block) > limit:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(block[:limit])
+            block = f'【{heading}（续）】\n' + block[limit:]
+        if current and len(current) + len(block) > limit:
+            chunks.append(current)
+            current = ''
+        current += block
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def group_prompt(group, text):
+    """生成只要求一个字段组的提示词"""
+    template = {}
+    for field, hint in FIELD_GROUPS[group].items():
+        template.setdefault(_FIELD_SECTIONS[field], {})[field] = hint
+    schema = json.dumps(template, ensure_ascii=False, indent=2)
+    return f"""
+你是一名专业的文档分析器，专门负责从JRec-IN Portal的职位详情页面提取结构化信息。
+下面是一个职位详情页面的部分内容（按【小标题】分节），请只从中提取以下JSON中的字段。
+如果内容中没有某个字段的信息，请将该字段值设为空字符串""。
+
+页面内容:
+{text}
+{schema}
+请以以上给出的JSON格式返回提取的相关信息，不要包含任何其他解释或评论。"""
+
+
+def _field_values(partial):
+    """在部分JSON的任意分区中查找字段值（模型有时会把字段放在错误的分区下）"""
+    values = {}
+    if not isinstance(partial, dict):
+        return values
+    for section_data in partial.values():
+        if isinstance(section_data, dict):
+            for field, value in section_data.items():
+                values.setdefault(field, value)
+    return values
+
+
+def _as_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return '、'.join(_as_text(item) for item in value if item not in (None, ''))
+    if isinstance(value, dict):
+        return '、'.join(f'{key}: {_as_text(item)}' for key, item in value.items())
+    return normalize_text(str(value))
+
+
+def merge_partials(partials):
+    """合并 [(字段组, 部分JSON)]：每个字段只接受负责它的字段组的结果，按块的顺序取第一个非空值"""
+    merged = {}
+    for field in LLM_FIELDS:
+        merged.setdefault(_FIELD_SECTIONS[field], {})[field] = ''
+    for group, partial in partials:
+        values = _field_values(partial)
+        for field in FIELD_GROUPS[group]:
+            value = _as_text(values.get(field))
+            section = _FIELD_SECTIONS[field]
+            if value and not merged[section][field]:
+                merged[section][field] = value
+    return merged
+
+
+def page_text(card_html):
+    """整页提示词使用的正文：去掉HTML标记，按【小标题】分节（与分段提取发送的格式相同）"""
+    return ''.join(f'【{heading}】\n{text}\n' for heading, text in split_sections(card_html))
+
+
+def extract_in_sections(card_html, query, extract):
+    """分段并行提取：query(prompt) 返回响应文本，extract(text) 从响应中解析JSON；所有调用都失败时返回None"""
+    calls = []
+    grouped = {}
+    for heading, text in split_sections(card_html):
+        grouped.setdefault(section_group(heading), []).append((heading, text))
+    for group in FIELD_GROUPS:
+        for chunk in pack_chunks(grouped.get(group, []))[:MAX_CHUNKS_PER_GROUP]:
+            calls.append((group, group_prompt(group, chunk)))
+    if not calls:
+        return None
+    print(f"分段提取: {len(calls)}次调用（" +
+          "，".join(f"{group} {sum(1 for g, _ in calls if g == group)}" for group in FIELD_GROUPS) + "）")
+
+    def run(prompt):
+        response_text = query(prompt)
+        return extract(response_text) if response_text else None
+
+    with ThreadPoolExecutor(max_workers=PARALLEL_CALLS) as executor:
+        results = list(executor.map(run, [prompt for _, prompt in calls]))
+
+    partials = [(group, result) for (group, _), result in zip(calls, results) if result is not None]
+    failed = len(calls) - len(partials)
+    if failed:
+        print(f"分段提取中有{failed}次调用失败，对应字段留空")
+    if not partials:
+        return None
+    return merge_partials(partials)
@@ -0,0 +1,172 @@
+"""
+JRec-IN Portal 文本规范化工具
+集中管理预编译的正则表达式，提供全角/半角（NFKC）规范化、标签去除、
+和暦/西暦日期解析和薪资范围解析，供正则分析器、搜索页解析和LLM结果后处理共用；
+以及去掉每次请求都不同的部分（CSRF令牌、脚本等）之后的页面内容哈希，供HTML归档和解析缓存去重
+"""
+
+import hashlib
+import re
+import unicodedata
+from datetime import date
+
+# 预编译的正则表达式（NFKC规范化后全角冒号等已转为半角，这里仍同时兼容两种写法）
+JOB_ID_RE = re.compile(r'D\d+')
+TENURE_RE = re.compile(r'任期(あり|なし)|テニュアトラック')
+TRIAL_RE = re.compile(r'試用期間(あり|なし)')
+TEACHING_RE = re.compile(r'(担当科目|教育負担|授業)\s*[:：].*')
+ITAG_RE = re.compile(r'<i.*')
+WHITESPACE_RE = re.compile(r'\s+')
+LABEL_SEPARATOR_RE = re.compile(r'^\s*[:：]?\s*')
+
+# 每次请求都会变化、与职位内容无关的页面部分：CSRF令牌（meta和隐藏输入框）、脚本、注释和URL中的会话ID
+VOLATILE_HTML_RE = re.compile(
+    r'<script\b.*?</script\s*>'
+    r'|<meta\b[^>]*\bname\s*=\s*["\']_csrf[^>]*>'
+    r'|<input\b[^>]*\bname\s*=\s*["\']_csrf["\'][^>]*>'
+    r'|<!--.*?-->'
+    r'|;jsessionid=[^"\'?#>\s]*',
+    re.DOTALL | re.IGNORECASE)
+
+# 日期：和暦（令和6年3月31日、令和元年、R6.3.31）和西暦（2025年3月31日、2025/03/31、2025-03-31）
+ERA_START_YEARS = {'令和': 2018, 'R': 2018, '平成': 1988, 'H': 1988, '昭和': 1925, 'S': 1925}
+ERA_DATE_RE = re.compile(r'(令和|平成|昭和|[RHS])\s*(元|\d{1,2})\s*[年.\-/]\s*(\d{1,2})\s*[月.\-/]\s*(\d{1,2})')
+WESTERN_DATE_RE = re.compile(r'(\d{4})\s*[年.\-/]\s*(\d{1,2})\s*[月.\-/]\s*(\d{1,2})')
+
+# 薪资：数字（可含千位分隔符、小数）+ 可选单位，范围分隔符为 ～ ~ - から
+SALARY_AMOUNT_RE = re.compile(r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*(億|万|千)?\s*(円)?')
+SALARY_RANGE_GAP_RE = re.compile(r'\s*(?:[~〜\-－–]|から)\s*')
+SALARY_UNITS = {'億': 100000000, '万': 10000, '千': 1000, '': 1}
+SALARY_PERIODS = (
+    ('year', ('年収', '年俸', '年額')),
+    ('month', ('月給', '月額', '月収')),
+    ('day', ('日給', '日額')),
+    ('hour', ('時給', '時間額')),
+)
+# 没有「円」的数字只有紧跟在这些词之后时才视为金额（'年俸 600万'）
+SALARY_KEYWORD_RE = re.compile(
+    r'(?:%s)\s*:?\s*$' % '|'.join(keyword for _, keywords in SALARY_PERIODS for keyword in keywords))
+# 换算为年薪时各计薪周期的倍数（期间未知时按年薪处理）
+ANNUAL_FACTORS = {'year': 1, 'month': 12, 'day': 240, 'hour': 1920, None: 1}
+
+
+def normalize_text(text):
+    """NFKC规范化（全角英数字和符号转半角、半角片假名转全角）并合并连续空白"""
+    if not text:
+        return ''
+    return WHITESPACE_RE.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def strip_label(text, label):
+    """去掉文本开头的标签及其后的冒号，如 '勤務地 : 東京都' -> '東京都'"""
+    text = text.strip()
+    if text.startswith(label):
+        return LABEL_SEPARATOR_RE.sub('', text[len(label):], count=1)
+    return text
+
+
+def page_hash(html_content):
+    """去掉CSRF令牌、脚本等每次请求都不同的部分后的sha256，同一职位内容不变时两次抓取的哈希相同"""
+    return hashlib.sha256(VOLATILE_HTML_RE.sub('', html_content).encode('utf-8')).hexdigest()
+
+
+def parse_date(text):
+    """解析和暦或西暦日期，返回datetime.date，无法解析时返回None"""
+    if not text:
+        return None
+    text = unicodedata.normalize('NFKC', text)
+    try:
+        match = ERA_DATE_RE.search(text)
+        if match:
+            era, year, month, day = match.groups()
+            year = 1 if year == '元' else int(year)
+            return date(ERA_START_YEARS[era] + year, int(month), int(day))
+        match = WESTERN_DATE_RE.search(text)
+        if match:
+            return date(*(int(part) for part in match.groups()))
+    except ValueError:
+        return None
+    return None
+
+
+def parse_salary_range(text):
+    """解析薪资范围，返回 {'min', 'max', 'period'}（金额单位为日元），无法解析时返回None
+
+    支持 '500万円～800万円'、'500～800万円'（单位只写在最后时作用于两端）、
+    '5,000,000円-8,000,000円'、'月給30万円'、'年俸 600万' 等写法；
+    只有后面带「円」或紧跟在年俸、月給等词之后的数字才视为金额（不会把 '2名'、'2025年4月1日' 当作薪资）
+    """
+    if not text:
+        return None
+    text = unicodedata.normalize('NFKC', text)
+
+    matches = list(SALARY_AMOUNT_RE.finditer(text))
+    for i, match in enumerate(matches):
+        if match.group(3) or SALARY_KEYWORD_RE.search(text, 0, match.start()):
+            break
+    else:
+        return None
+
+    # 范围的另一端：只用分隔符与该金额相连的前一个数字（'500～800万円'）或后一个数字（'月給30万～40万'）
+    amounts = [match]
+    if i > 0 and SALARY_RANGE_GAP_RE.fullmatch(text, matches[i - 1].end(), match.start()):
+        amounts.insert(0, matches[i - 1])
+    elif i + 1 < len(matches) and SALARY_RANGE_GAP_RE.fullmatch(text, match.end(), matches[i + 1].start()):
+        amounts.append(matches[i + 1])
+    amounts = [(float(amount.group(1).replace(',', '')), amount.group(2) or '') for amount in amounts]
+
+    # '500～800万円' 这种只在最后写单位的情况，单位同时作用于下限
+    last_unit = amounts[-1][1]
+    values = [int(number * SALARY_UNITS[unit or last_unit]) for number, unit in amounts]
+
+    period = None
+    for name, keywords in SALARY_PERIODS:
+        if any(keyword in text for keyword in keywords):
+            period = name
+            break
+
+    return {'min': min(values), 'max': max(values), 'period': period}
+
+
+def annual_salary(text):
+    """解析薪资并换算为年薪上限（日元），无法解析时返回None"""
+    salary = parse_salary_range(text)
+    if salary is None:
+        return None
+    return salary['max'] * ANNUAL_FACTORS[salary['period']]
+
+
+def normalize_record(value):
+    """递归规范化嵌套字典/列表中的所有字符串（用于LLM输出的后处理）"""
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, dict):
+        return {key: normalize_record(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize_record(item) for item in value]
+    return value
+
+
+def benchmark(number=20000):
+    """测量各函数单次调用耗时（微秒），用于评估批量重新解析时的CPU开销"""
+    import timeit
+
+    samples = {
+        'normalize_text': lambda: normalize_text('勤務地 ： 東京都　千代田区 ＡＢＣ１２３'),
+        'strip_label': lambda: strip_label('勤務地 : 東京都千代田区', '勤務地'),
+        'parse_date (era)': lambda: parse_date('令和7年3月31日'),
+        'parse_date (western)': lambda: parse_date('2025年03月31日'),
+        'parse_salary_range': lambda: parse_salary_range('年収 500万円～800万円'),
+        'TENURE_RE.search': lambda: TENURE_RE.search('常勤 - 任期あり - 試用期間なし'),
+        're.search (inline pattern)': lambda: re.search(r'任期(あり|なし)|テニュアトラック', '常勤 - 任期あり - 試用期間なし'),
+    }
+    results = {}
+    for name, func in samples.items():
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        results[name] = seconds / number * 1e6
+        print(f"{name:<28} {results[name]:8.3f} µs/次")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
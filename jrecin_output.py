@@ -0,0 +1,143 @@
+"""
+JRec-IN Portal 文件输出
+- 原子写入：先写同目录下的临时文件再用 os.replace 替换，中断时目标文件要么是旧内容要么是完整的新内容，
+  不会留下写了一半的JSON
+- 后台写入：BackgroundWriter 在后台线程中批量执行原子写入（包括JSON序列化），抓取循环只把内容放入有界队列，
+  不等待磁盘；同一批次中对同一文件的多次写入只保留最后一次；写入出错不会使后台线程退出，错误在flush()/close()时抛出
+- 批量清理：clear_directory 把整个目录改名后重建空目录，旧目录在后台线程中整体删除，不逐个删除文件
+"""
+
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+# 队列中最多等待写入的文件数，写入跟不上时抓取线程在这里等待（避免内存无限增长）
+MAX_PENDING = 256
+BATCH_SIZE = 64
+TRASH_SUFFIX = '.trash-'
+
+
+def atomic_write_text(path, text, encoding='utf-8', fsync=False):
+    """原子地写入文本文件；fsync=True 时在替换前把数据刷到磁盘（防止断电，代价是每个文件一次同步）"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    try:
+        with open(temp_path, 'w', encoding=encoding) as f:
+            f.write(text)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def atomic_write_json(path, data, encoding='utf-8-sig', indent=2, fsync=False):
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=indent), encoding, fsync)
+
+
+class BackgroundWriter:
+    """后台批量原子写入；flush() 等待已提交的写入全部完成，close() 之后不能再提交
+
+    后台写入出现任何异常时记录并打印，继续写入其余文件，在下一次 flush()/close() 时抛出第一个异常
+    """
+
+    def __init__(self, max_pending=MAX_PENDING, batch_size=BATCH_SIZE, fsync=False):
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.errors = []  # [(路径, 异常)]
+        self.written = 0
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run, name='jrecin-writer', daemon=True)
+        self._thread.start()
+
+    def write_text(self, path, text, encoding='utf-8'):
+        self._queue.put((path, text, encoding, None))
+
+    def write_json(self, path, data, encoding='utf-8-sig', indent=2):
+        """data在写出之前不能再被修改（序列化在后台线程中进行）"""
+        self._queue.put((path, data, encoding, indent))
+
+    def _write_batch(self, batch):
+        latest = {}
+        for path, content, encoding, indent in batch:
+            latest[path] = (content, encoding, indent)
+        for path, (content, encoding, indent) in latest.items():
+            try:
+                if indent is None:
+                    atomic_write_text(path, content, encoding, self.fsync)
+                else:
+                    atomic_write_json(path, content, encoding, indent, self.fsync)
+                self.written += 1
+            except Exception as e:
+                print(f"后台写入 {path} 失败: {e!r}")
+                self.errors.append((path, e))
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # 停止标记之后不会再有写入（close() 之后不能再提交）
+            if None in batch:
+                stopping = True
+            try:
+                self._write_batch([item for item in batch if item is not None])
+            finally:
+                # 无论写入是否出错都要标记完成，否则 flush() 会一直等待
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+        if self.errors:
+            errors, self.errors = self.errors, []
+            if len(errors) > 1:
+                print(f"后台写入共有{len(errors)}个文件失败: " + '; '.join(path for path, _ in errors[:5]))
+            raise errors[0][1]
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _remove_tree(path):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def clear_directory(directory, background=True):
+    """清空目录：整个目录改名后重建空目录，旧目录（以及以前残留的）在后台线程中删除"""
+    parent = os.path.dirname(directory.rstrip('/')) or '.'
+    name = os.path.basename(directory.rstrip('/'))
+    leftovers = [os.path.join(parent, entry) for entry in os.listdir(parent)
+                 if entry.startswith(name + TRASH_SUFFIX)] if os.path.isdir(parent) else []
+    if os.path.exists(directory):
+        trash = f'{directory.rstrip("/")}{TRASH_SUFFIX}{os.getpid()}-{time.time_ns()}'
+        os.replace(directory, trash)
+        leftovers.append(trash)
+    os.makedirs(directory, exist_ok=True)
+    for trash in leftovers:
+        if background:
+            threading.Thread(target=_remove_tree, args=(trash,), daemon=True).start()
+        else:
+            _remove_tree(trash)
+    return len(leftovers)
@@ -0,0 +1,101 @@
+"""
+JRec-IN Portal 解析结果缓存
+以 (HTML内容哈希（不含CSRF令牌等易变部分）, 解析器版本) 为键保存 parse_job_details 的结果，页面内容和解析规则都没有变化时直接返回，
+不再重新构建BeautifulSoup树。解析器版本变化时，打开缓存会删除旧版本的条目；条目数超过上限时按最近使用时间淘汰
+
+缓存保存在SQLite文件中，跨运行保留
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+from jrecin_normalize import page_hash
+
+PARSE_CACHE_FILE = 'jrecin_data/parse_cache.sqlite3'
+MAX_ENTRIES = 20000
+# 超过上限这么多比例后才批量淘汰，避免每次写入都执行删除
+EVICT_SLACK = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parse_cache (
+    html_sha TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    job_data TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (html_sha, parser_version)
+);
+CREATE INDEX IF NOT EXISTS parse_cache_lru ON parse_cache (last_used);
+"""
+
+
+def html_hash(html_content):
+    """缓存键：去掉CSRF令牌、脚本等每次请求都不同的部分后的内容哈希"""
+    return page_hash(html_content)
+
+
+class ParseCache:
+    """解析结果缓存；新条目和命中条目的使用时间在 save() 时统一提交"""
+
+    def __init__(self, parser_version, path=PARSE_CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.parser_version = str(parser_version)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._used = {}
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.executescript(_SCHEMA)
+        # 解析器版本变化：旧版本的结果全部失效
+        removed = self.db.execute('DELETE FROM parse_cache WHERE parser_version != ?',
+                                  (self.parser_version,)).rowcount
+        self.db.commit()
+        if removed:
+            print(f"解析器版本已变为 {self.parser_version}，清除了{removed}条旧的解析缓存")
+
+    def get(self, html_sha):
+        """返回缓存的解析结果（每次返回新的字典），没有时返回None"""
+        row = self.db.execute('SELECT job_data FROM parse_cache WHERE html_sha = ? AND parser_version = ?',
+                              (html_sha, self.parser_version)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used[html_sha] = time.time()
+        return json.loads(row[0])
+
+    def put(self, html_sha, job_data):
+        self.db.execute('INSERT OR REPLACE INTO parse_cache (html_sha, parser_version, job_data, last_used) '
+                        'VALUES (?, ?, ?, ?)',
+                        (html_sha, self.parser_version, json.dumps(job_data, ensure_ascii=False), time.time()))
+
+    def evict(self):
+        """条目数超过上限（加上余量）时删除最久未使用的条目，返回删除的数量"""
+        count = self.db.execute('SELECT COUNT(*) FROM parse_cache').fetchone()[0]
+        if count <= self.max_entries * (1 + EVICT_SLACK):
+            return 0
+        return self.db.execute('DELETE FROM parse_cache WHERE rowid IN '
+                               '(SELECT rowid FROM parse_cache ORDER BY last_used LIMIT ?)',
+                               (count - self.max_entries,)).rowcount
+
+    def save(self):
+        """写回命中条目的使用时间、按需淘汰并提交"""
+        self.db.executemany('UPDATE parse_cache SET last_used = ? WHERE html_sha = ? AND parser_version = ?',
+                            [(used, sha, self.parser_version) for sha, used in self._used.items()])
+        self._used.clear()
+        self.evict()
+        self.db.commit()
+
+    def close(self):
+        self.save()
+        self.db.close()
+
+    def stats_text(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"解析缓存命中 {self.hits}/{total}（{rate:.0%}）"
@@ -0,0 +1,181 @@
+"""
+JRec-IN Portal 性能分析
+可选的分析模式（main(profile=True) 或 jrecin_cli.py --profile），在不修改各阶段代码逻辑的前提下回答"时间花在哪里"：
+- 按阶段统计墙钟时间和CPU时间（两者之差主要是网络等待、sleep等），阶段可以嵌套，记为 parse/tree 这样的路径
+- cProfile记录启动分析的线程中每个函数的调用次数和耗时
+- 采样线程每隔几毫秒记录所有线程的调用栈（包括正在等待网络的线程），按阶段前缀输出为折叠栈格式，
+  可以用 flamegraph.pl stacks.folded > flame.svg 或在 https://www.speedscope.app 中查看火焰图
+
+结果写入 jrecin_data/profile/<时间>/：report.txt、stages.json、profile.pstats、stacks.folded
+
+各模块用 `with stage('名称'):` 标记阶段；没有启动分析时 stage() 返回空的上下文管理器，开销可以忽略
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+PROFILE_DIR = 'jrecin_data/profile'
+SAMPLE_INTERVAL = 0.005  # 采样间隔（秒）
+TOP_FUNCTIONS = 30
+
+_NULL_STAGE = nullcontext()
+_active = None
+
+
+class RunProfiler:
+    """一次运行的分析器：阶段计时、cProfile和调用栈采样"""
+
+    def __init__(self, output_dir=PROFILE_DIR, sample_interval=SAMPLE_INTERVAL, use_cprofile=True):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.stages = {}  # 阶段路径 -> [次数, 墙钟时间, CPU时间]
+        self.samples = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_stages = {}  # 线程ID -> 当前阶段路径（供采样线程读取）
+        self._stop = threading.Event()
+        self._sampler = None
+        self._cprofile = cProfile.Profile() if use_cprofile else None
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._sampler = threading.Thread(target=self._sample_loop, name='jrecin-profiler', daemon=True)
+        self._sampler.start()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self._stop.set()
+        self._sampler.join()
+        self.wall = time.perf_counter() - self.started
+        self.cpu = time.process_time() - self._cpu_started
+
+    @contextmanager
+    def stage(self, name):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(name)
+        path = '/'.join(stack)
+        thread_id = threading.get_ident()
+        self._thread_stages[thread_id] = path
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            stack.pop()
+            self._thread_stages[thread_id] = '/'.join(stack)
+            with self._lock:
+                totals = self.stages.setdefault(path, [0, 0.0, 0.0])
+                totals[0] += 1
+                totals[1] += wall
+                totals[2] += cpu
+
+    def _sample_loop(self):
+        sampler_id = threading.get_ident()
+        while not self._stop.wait(self.sample_interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_id:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                stage_path = self._thread_stages.get(thread_id) or '(no stage)'
+                self.samples[';'.join(stage_path.split('/') + frames[::-1])] += 1
+
+    def stage_rows(self):
+        """[(阶段路径, 次数, 墙钟时间, CPU时间, 等待时间)]，按墙钟时间从大到小"""
+        rows = [(path, calls, wall, cpu, max(wall - cpu, 0.0)) for path, (calls, wall, cpu) in self.stages.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def report_text(self):
+        lines = [f"总墙钟时间 {self.wall:.2f} s，进程CPU时间 {self.cpu:.2f} s，调用栈采样 {sum(self.samples.values())} 次",
+                 '',
+                 f"{'阶段':<36}{'次数':>8}{'墙钟(s)':>10}{'CPU(s)':>10}{'等待(s)':>10}{'占比':>8}"]
+        for path, calls, wall, cpu, wait in self.stage_rows():
+            lines.append(f"{path:<36}{calls:>8}{wall:>10.2f}{cpu:>10.2f}{wait:>10.2f}{wall / self.wall:>8.1%}")
+        lines.append('')
+        lines.append('CPU时间按阶段线程计算（time.thread_time），等待时间 = 墙钟时间 - CPU时间，主要是网络、磁盘和sleep')
+        if self._cprofile is not None:
+            for sort_key, title in (('cumulative', '累计耗时'), ('tottime', '自身耗时')):
+                stream = io.StringIO()
+                pstats.Stats(self._cprofile, stream=stream).sort_stats(sort_key).print_stats(TOP_FUNCTIONS)
+                lines += ['', f'===== cProfile：按{title}排列的前{TOP_FUNCTIONS}个函数（仅启动分析的线程） =====',
+                          stream.getvalue()]
+        return '\n'.join(lines)
+
+    def write(self):
+        """写出分析结果，返回输出目录"""
+        directory = os.path.join(self.output_dir, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'report.txt'), 'w', encoding='utf-8') as f:
+            f.write(self.report_text())
+        with open(os.path.join(directory, 'stages.json'), 'w', encoding='utf-8') as f:
+            json.dump({'wall': self.wall, 'cpu': self.cpu,
+                       'stages': [{'stage': path, 'calls': calls, 'wall': wall, 'cpu': cpu, 'wait': wait}
+                                  for path, calls, wall, cpu, wait in self.stage_rows()]},
+                      f, ensure_ascii=False, indent=2)
+        with open(os.path.join(directory, 'stacks.folded'), 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(os.path.join(directory, 'profile.pstats'))
+        return directory
+
+
+def stage(name):
+    """标记一个阶段：with stage('fetch'): ...；没有启动分析时不做任何事"""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name)
+
+
+def start_profiling(**kwargs):
+    """启动分析（已经在分析时沿用当前的分析器），返回分析器"""
+    global _active
+    if _active is None:
+        _active = RunProfiler(**kwargs)
+        _active.start()
+    return _active
+
+
+def stop_profiling():
+    """停止分析并写出结果，返回输出目录（没有在分析时返回None）"""
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return None
+    profiler.stop()
+    directory = profiler.write()
+    print('\n'.join(profiler.report_text().splitlines()[:len(profiler.stages) + 3]))
+    print(f"性能分析结果已保存至 {directory}（火焰图: flamegraph.pl {directory}/stacks.folded > flame.svg）")
+    return directory
+
+
+@contextmanager
+def profiling(enabled=True, **kwargs):
+    """with profiling(enabled): ... 在块内启动分析，结束时写出结果；外层已在分析时由外层负责写出"""
+    if not enabled or _active is not None:
+        yield _active
+        return
+    profiler = start_profiling(**kwargs)
+    try:
+        yield profiler
+    finally:
+        stop_profiling()
@@ -0,0 +1,193 @@
+"""
+JRec-IN Portal 提取质量与漂移监控
+比较正则解析器（job_details/json、职位存储）和LLM分析器（job_details/llm_json）的输出：
+按字段统计填充率和两者的一致率，记录每次运行的填充率历史，某个字段的填充率突然下降时报警
+（通常说明网站改版导致正则解析失效），并列出值得调用LLM的职位（两者不一致或正则结果缺少关键字段）
+所有比较都在pandas的列上向量化完成，可以快速处理整个语料库
+（pandas在函数内导入，爬虫导入本模块时不加载pandas和numpy）
+"""
+
+import glob
+import json
+import os
+from datetime import datetime
+
+from jrecin_output import atomic_write_json
+from jrecin_record import as_dict
+
+QUALITY_DIR = 'jrecin_data/quality'
+LLM_JSON_DIR = 'jrecin_data/job_details/llm_json'
+
+# 两个提取器共有的字段（与LLM提示词中的JSON格式一致）
+FIELDS = [
+    ('基本信息', 'position_title'),
+    ('基本信息', 'institution'),
+    ('基本信息', 'institution_type'),
+    ('职位属性', 'location'),
+    ('职位属性', 'research_field'),
+    ('职位属性', 'position_type'),
+    ('职位属性', 'employment_type'),
+    ('职位属性', 'tenure_status'),
+    ('薪资和工作条件', 'salary'),
+    ('薪资和工作条件', 'salary_description'),
+    ('薪资和工作条件', 'working_hours_description'),
+    ('职位详情', 'job_description'),
+    ('职位详情', 'department'),
+    ('职位详情', 'qualifications'),
+    ('职位详情', 'teaching_requirements'),
+]
+COLUMNS = [f'{section}.{field}' for section, field in FIELDS]
+# 正则结果缺少这些字段时值得调用LLM补充
+KEY_COLUMNS = ['基本信息.position_title', '基本信息.institution', '职位属性.research_field', '职位详情.job_description']
+
+# 比较时只看规范化后的前若干个字符，容忍两者对长文本截取范围的差异
+COMPARE_PREFIX = 30
+# 本次运行的填充率比历史平均低这么多（绝对值）时报警；职位太少时不判断
+DROP_THRESHOLD = 0.3
+MIN_RUN_SIZE = 5
+HISTORY_RUNS = 10
+
+
+def to_frame(records):
+    """把职位记录转换为以job_id为索引、每个字段一列的DataFrame（缺失值为空字符串）"""
+    import pandas as pd
+
+    records = [as_dict(record) for record in records]
+    if not records:
+        return pd.DataFrame(columns=COLUMNS, dtype=str)
+    frame = pd.json_normalize(records)
+    frame = frame.reindex(columns=['基本信息.job_id'] + COLUMNS)
+    frame = frame.set_index('基本信息.job_id')
+    frame.index.name = 'job_id'
+    return frame.fillna('').astype(str).apply(lambda column: column.str.strip())
+
+
+def load_llm_frame(directory=LLM_JSON_DIR):
+    """读取LLM分析结果（文件名为job_id）"""
+    records = []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            record = json.load(f)
+        if isinstance(record, dict):
+            record.setdefault('基本信息', {})['job_id'] = os.path.splitext(os.path.basename(path))[0]
+            records.append(record)
+    return to_frame(records)
+
+
+def fill_rates(frame):
+    """每个字段非空的比例"""
+    import pandas as pd
+
+    if frame.empty:
+        return pd.Series(0.0, index=COLUMNS)
+    return (frame[COLUMNS] != '').mean()
+
+
+def _comparable(frame):
+    return frame.apply(lambda column: column.str.replace(r'\W+', '', regex=True).str.lower().str[:COMPARE_PREFIX])
+
+
+def agreement(regex_frame, llm_frame):
+    """对两个提取器都处理过的职位逐字段比较，返回 (一致率Series, 不一致矩阵DataFrame)
+
+    只统计至少一方有值的单元格；一方为空另一方有值计为不一致
+    """
+    common = regex_frame.index.intersection(llm_frame.index)
+    regex_values = _comparable(regex_frame.loc[common, COLUMNS])
+    llm_values = _comparable(llm_frame.loc[common, COLUMNS])
+    compared = (regex_values != '') | (llm_values != '')
+    disagree = compared & (regex_values != llm_values)
+    counts = compared.sum()
+    rates = (1 - disagree.sum() / counts).where(counts > 0)
+    return rates, disagree
+
+
+def llm_candidates(regex_frame, llm_frame, disagree):
+    """值得调用（或重新调用）LLM的职位：关键字段两者不一致，或尚未经LLM分析且正则结果缺少关键字段"""
+    disputed = disagree.index[disagree[KEY_COLUMNS].any(axis=1)]
+    missing = (regex_frame[KEY_COLUMNS] == '').any(axis=1)
+    unanalyzed = regex_frame.index[missing & ~regex_frame.index.isin(llm_frame.index)]
+    return sorted(set(disputed) | set(unanalyzed))
+
+
+def evaluate_corpus(job_store=None, llm_dir=LLM_JSON_DIR, output_dir=QUALITY_DIR):
+    """评估整个语料库，写出 quality_report.json 和 needs_llm.json 并返回报告"""
+    import pandas as pd
+
+    from jrecin_store import JOB_STORE_FILE, JobStore
+
+    regex_frame = to_frame(job_store or JobStore(JOB_STORE_FILE))
+    llm_frame = load_llm_frame(llm_dir)
+    rates, disagree = agreement(regex_frame, llm_frame)
+    candidates = llm_candidates(regex_frame, llm_frame, disagree)
+    regex_rates, llm_rates = fill_rates(regex_frame), fill_rates(llm_frame)
+
+    report = {
+        'evaluated_at': datetime.now().isoformat(timespec='seconds'),
+        'regex_count': len(regex_frame),
+        'llm_count': len(llm_frame),
+        'compared_count': len(disagree),
+        'fields': {
+            column: {
+                'regex_fill_rate': round(float(regex_rates[column]), 4),
+                'llm_fill_rate': round(float(llm_rates[column]), 4),
+                'agreement': None if pd.isna(rates[column]) else round(float(rates[column]), 4),
+            }
+            for column in COLUMNS
+        },
+        'needs_llm': len(candidates),
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    atomic_write_json(os.path.join(output_dir, 'quality_report.json'), report)
+    atomic_write_json(os.path.join(output_dir, 'needs_llm.json'), candidates)
+    return report
+
+
+def print_report(report):
+    print(f"正则结果 {report['regex_count']} 个，LLM结果 {report['llm_count']} 个，"
+          f"共同 {report['compared_count']} 个")
+    print(f"{'字段':<40}{'正则填充率':>10}{'LLM填充率':>10}{'一致率':>8}")
+    for column, stats in report['fields'].items():
+        agreement_text = '-' if stats['agreement'] is None else f"{stats['agreement']:.2f}"
+        print(f"{column:<40}{stats['regex_fill_rate']:>10.2f}{stats['llm_fill_rate']:>10.2f}{agreement_text:>8}")
+    print(f"建议调用LLM的职位: {report['needs_llm']} 个（见 {QUALITY_DIR}/needs_llm.json）")
+
+
+def monitor_run(job_data_list, output_dir=QUALITY_DIR):
+    """记录本次运行解析结果的填充率，与最近几次运行的平均值比较，返回填充率骤降的字段"""
+    import pandas as pd
+
+    frame = to_frame(job_data_list)
+    if len(frame) < MIN_RUN_SIZE:
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    history_path = os.path.join(output_dir, 'fill_rate_history.jsonl')
+    history = []
+    if os.path.exists(history_path):
+        with open(history_path, 'r', encoding='utf-8') as f:
+            history = [json.loads(line) for line in f if line.strip()]
+
+    rates = fill_rates(frame)
+    alerts = []
+    if history:
+        baseline = pd.DataFrame([run['fill_rates'] for run in history[-HISTORY_RUNS:]]).mean()
+        drops = (baseline.reindex(COLUMNS) - rates).dropna()
+        alerts = sorted(drops.index[drops >= DROP_THRESHOLD])
+        for column in alerts:
+            print(f"警告: 字段 {column} 的填充率从平均 {baseline[column]:.2f} 降至 {rates[column]:.2f}，"
+                  f"网站页面结构可能已变化")
+
+    with open(history_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({
+            'run_at': datetime.now().isoformat(timespec='seconds'),
+            'count': len(frame),
+            'fill_rates': {column: round(float(rate), 4) for column, rate in rates.items()},
+            'alerts': alerts,
+        }, ensure_ascii=False) + '\n')
+    return alerts
+
+
+if __name__ == "__main__":
+    print_report(evaluate_corpus())
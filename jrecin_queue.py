@@ -0,0 +1,358 @@
+"""
+JRec-IN Portal 持久化工作队列
+基于SQLite的任务队列，供协调进程和多个工作进程（可以在不同主机上）共享：
+任务按阶段（fetch / parse / llm）领取并带有租约，工作进程定期发送心跳延长租约，
+租约过期（工作进程崩溃或失联）的任务自动重新排队，超过最大尝试次数后标记为失败。
+有请求间隔的阶段（fetch，默认为ScraperConfig的job_interval）由队列统一分配时间槽：每次领取时预约下一个时间槽，
+任务带有 delay（秒），工作进程等待之后再发出请求，所以无论有多少个工作进程，对网站的总请求速率都不超过一个间隔一次
+
+同一主机上的进程可以直接打开同一个数据库文件；其他主机通过 serve_queue() 提供的HTTP接口访问（RemoteQueue）。
+HTTP接口默认只监听本机，每个请求都必须带有共享令牌（--token 或环境变量 JRECIN_QUEUE_TOKEN）
+"""
+
+import hmac
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+WORK_QUEUE_FILE = 'jrecin_data/work_queue.sqlite3'
+TOKEN_ENV = 'JRECIN_QUEUE_TOKEN'
+LEASE_SECONDS = 120.0
+MAX_ATTEMPTS = 3
+# 时间槽最多预约到这么多秒之后，更远的时间槽暂不分配（工作进程稍后再领取）
+MAX_SLOT_AHEAD = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stage TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated REAL NOT NULL,
+    UNIQUE (stage, key)
+);
+CREATE INDEX IF NOT EXISTS tasks_pending ON tasks (stage, status, priority, id);
+CREATE TABLE IF NOT EXISTS rate_limits (
+    stage TEXT PRIMARY KEY,
+    next_time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    stages TEXT NOT NULL,
+    host TEXT NOT NULL,
+    last_heartbeat REAL NOT NULL
+);
+"""
+
+
+def new_worker_id():
+    return f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}'
+
+
+def _task(row):
+    """把数据库行转换为任务字典"""
+    if row is None:
+        return None
+    task = dict(row)
+    task['payload'] = json.loads(task['payload'])
+    task['result'] = json.loads(task['result']) if task['result'] is not None else None
+    return task
+
+
+class WorkQueue:
+    """SQLite工作队列；每个线程使用自己的连接，写操作在 BEGIN IMMEDIATE 事务中完成，多进程并发安全
+
+    stage_intervals: {阶段: 请求间隔（秒）}，默认 fetch 阶段使用ScraperConfig的job_interval；
+    时间槽保存在数据库中，打开同一个文件的所有进程共享
+    """
+
+    def __init__(self, path=WORK_QUEUE_FILE, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS,
+                 stage_intervals=None):
+        if stage_intervals is None:
+            from jrecin_config import ScraperConfig
+            stage_intervals = {'fetch': ScraperConfig().job_interval}
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.stage_intervals = stage_intervals
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def enqueue(self, stage, key, payload, priority=0):
+        """加入任务，返回是否新加入或重新排队"""
+        return self.enqueue_many(stage, [(key, payload, priority)]) == 1
+
+    def enqueue_many(self, stage, items):
+        """批量加入 (key, payload, priority) 任务，返回新加入或重新排队的数量
+
+        同一阶段同一键的任务正在排队或执行时忽略；已完成、已汇总或失败的任务重新排队（例如下次运行再次抓取）
+        """
+        now = time.time()
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany(
+                "INSERT INTO tasks (stage, key, payload, priority, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (stage, key) DO UPDATE SET payload = excluded.payload, priority = excluded.priority, "
+                "status = 'pending', attempts = 0, result = NULL, error = NULL, updated = excluded.updated "
+                "WHERE tasks.status IN ('done', 'collected', 'failed')",
+                [(stage, key, json.dumps(payload, ensure_ascii=False), priority, now) for key, payload, priority in items])
+            return db.total_changes - before
+
+    def _requeue_expired(self, db, now):
+        expired = db.execute("SELECT id, attempts FROM tasks WHERE status = 'leased' AND lease_expires < ?",
+                             (now,)).fetchall()
+        for row in expired:
+            status = 'failed' if row['attempts'] >= self.max_attempts else 'pending'
+            db.execute("UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                       "error = 'lease expired', updated = ? WHERE id = ?", (status, now, row['id']))
+        return len(expired)
+
+    def requeue_expired(self):
+        """把租约过期的任务重新排队，返回数量"""
+        with self._transaction() as db:
+            return self._requeue_expired(db, time.time())
+
+    def lease(self, stages, worker_id):
+        """为工作进程领取一个任务（按stages顺序、优先级数值从小到大），没有可领取的任务时返回None
+
+        有请求间隔的阶段同时预约一个时间槽，任务的 delay 为需要等待的秒数
+        """
+        now = time.time()
+        with self._transaction() as db:
+            self._requeue_expired(db, now)
+            for stage in stages:
+                interval = self.stage_intervals.get(stage)
+                slot = now
+                if interval:
+                    row = db.execute('SELECT next_time FROM rate_limits WHERE stage = ?', (stage,)).fetchone()
+                    slot = max(now, row['next_time']) if row else now
+                    if slot - now > MAX_SLOT_AHEAD:
+                        continue
+                row = db.execute("SELECT id FROM tasks WHERE stage = ? AND status = 'pending' "
+                                 "ORDER BY priority, id LIMIT 1", (stage,)).fetchone()
+                if row is None:
+                    continue
+                if interval:
+                    db.execute('INSERT OR REPLACE INTO rate_limits (stage, next_time) VALUES (?, ?)',
+                               (stage, slot + interval))
+                db.execute("UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                           "attempts = attempts + 1, updated = ? WHERE id = ?",
+                           (worker_id, slot + self.lease_seconds, now, row['id']))
+                task = _task(db.execute('SELECT * FROM tasks WHERE id = ?', (row['id'],)).fetchone())
+                task['delay'] = slot - now
+                return task
+        return None
+
+    def heartbeat(self, worker_id, stages=(), task_ids=()):
+        """记录工作进程存活，并延长它持有的任务的租约；返回仍由它持有的任务ID（租约已被收回的不在其中）"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute('INSERT OR REPLACE INTO workers (worker_id, stages, host, last_heartbeat) VALUES (?, ?, ?, ?)',
+                       (worker_id, ','.join(stages), worker_id.rsplit('-', 2)[0], now))
+            held = []
+            for task_id in task_ids:
+                cursor = db.execute("UPDATE tasks SET lease_expires = ? WHERE id = ? AND status = 'leased' "
+                                    "AND lease_owner = ?", (now + self.lease_seconds, task_id, worker_id))
+                if cursor.rowcount:
+                    held.append(task_id)
+            return held
+
+    def complete(self, task_id, worker_id, result=None, follow_ups=()):
+        """完成任务并在同一事务中加入后续任务 [(stage, key, payload, priority)]；租约已被收回时返回False"""
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute("UPDATE tasks SET status = 'done', result = ?, lease_owner = NULL, "
+                                "lease_expires = NULL, error = NULL, updated = ? "
+                                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                                (json.dumps(result, ensure_ascii=False), now, task_id, worker_id))
+            if not cursor.rowcount:
+                return False
+            # 后续任务可能因重新抓取而已存在，替换为最新内容并重新排队；正在执行（leased）的任务不改动
+            db.executemany(
+                "INSERT INTO tasks (stage, key, payload, priority, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (stage, key) DO UPDATE SET payload = excluded.payload, priority = excluded.priority, "
+                "status = 'pending', attempts = 0, result = NULL, error = NULL, updated = excluded.updated "
+                "WHERE tasks.status != 'leased'",
+                [(stage, key, json.dumps(payload, ensure_ascii=False), priority, now)
+                 for stage, key, payload, priority in follow_ups])
+            return True
+
+    def fail(self, task_id, worker_id, error):
+        """任务失败：未超过最大尝试次数时重新排队，否则标记为failed"""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute("SELECT attempts FROM tasks WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                             (task_id, worker_id)).fetchone()
+            if row is None:
+                return False
+            status = 'failed' if row['attempts'] >= self.max_attempts else 'pending'
+            db.execute("UPDATE tasks SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, "
+                       "updated = ? WHERE id = ?", (status, str(error), now, task_id))
+            return True
+
+    def take_results(self, stage, limit=500, after_id=0):
+        """读取已完成任务的结果（按id顺序，只取id大于after_id的任务），返回任务列表，不改变任务状态
+
+        协调进程保存好结果后再调用 mark_collected()，中途出错时结果仍留在队列中，下次汇总时重新读取
+        """
+        rows = self._connection().execute(
+            "SELECT * FROM tasks WHERE stage = ? AND status = 'done' AND id > ? ORDER BY id LIMIT ?",
+            (stage, after_id, limit)).fetchall()
+        return [_task(row) for row in rows]
+
+    def mark_collected(self, tasks):
+        """把已保存结果的任务 [(id, updated)] 标记为collected并清空payload，返回标记的数量
+
+        读取结果之后任务又被重新执行（updated已变化）时不标记，新的结果留到下次汇总
+        """
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany("UPDATE tasks SET status = 'collected', payload = '{}' "
+                           "WHERE id = ? AND status = 'done' AND updated = ?",
+                           [(task_id, updated) for task_id, updated in tasks])
+            return db.total_changes - before
+
+    def stats(self):
+        """各阶段各状态的任务数，以及最近心跳的工作进程"""
+        db = self._connection()
+        counts = {}
+        for row in db.execute('SELECT stage, status, COUNT(*) AS n FROM tasks GROUP BY stage, status'):
+            counts.setdefault(row['stage'], {})[row['status']] = row['n']
+        workers = {row['worker_id']: {'stages': row['stages'], 'last_heartbeat': row['last_heartbeat']}
+                   for row in db.execute('SELECT * FROM workers')}
+        return {'tasks': counts, 'workers': workers}
+
+
+# 远程访问：协调进程通过HTTP提供队列，其他主机上的工作进程使用RemoteQueue（接口与WorkQueue相同）
+_REMOTE_METHODS = ('enqueue', 'enqueue_many', 'lease', 'heartbeat', 'complete', 'fail', 'take_results',
+                   'mark_collected', 'stats', 'requeue_expired')
+
+
+def queue_token(token=None):
+    """共享令牌：参数优先，否则读取环境变量 JRECIN_QUEUE_TOKEN"""
+    return token or os.environ.get(TOKEN_ENV) or None
+
+
+def serve_queue(queue, host='127.0.0.1', port=8765, token=None):
+    """以HTTP方式提供工作队列（POST /<方法名>，请求和响应均为JSON），阻塞运行
+
+    每个请求都必须在 Authorization: Bearer <令牌> 中带有共享令牌，没有配置令牌时拒绝启动
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    token = queue_token(token)
+    if not token:
+        raise ValueError(f"提供工作队列服务需要共享令牌（--token 或环境变量 {TOKEN_ENV}）")
+    expected = f'Bearer {token}'.encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not hmac.compare_digest(self.headers.get('Authorization', '').encode('utf-8'), expected):
+                self.send_error(401)
+                return
+            method = self.path.strip('/')
+            if method not in _REMOTE_METHODS:
+                self.send_error(404)
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            kwargs = json.loads(self.rfile.read(length) or b'{}')
+            try:
+                body = json.dumps({'result': getattr(queue, method)(**kwargs)}, ensure_ascii=False)
+                status = 200
+            except Exception as e:
+                body = json.dumps({'error': str(e)}, ensure_ascii=False)
+                status = 500
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"工作队列服务已启动: http://{host}:{server.server_address[1]}/ （{queue.path}）")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+class RemoteQueue:
+    """通过HTTP访问serve_queue()提供的工作队列"""
+
+    def __init__(self, url, token=None):
+        from jrecin_http import HttpClient
+
+        token = queue_token(token)
+        if not token:
+            raise ValueError(f"访问远程工作队列需要共享令牌（--token 或环境变量 {TOKEN_ENV}）")
+        self.url = url.rstrip('/')
+        self.path = self.url
+        self.client = HttpClient(headers={'Authorization': f'Bearer {token}'})
+
+    def _call(self, method, **kwargs):
+        response = self.client.post(f'{self.url}/{method}', json=kwargs)
+        if response.status_code == 401:
+            raise RuntimeError(f"工作队列 {self.url} 拒绝了共享令牌")
+        data = response.json()
+        if 'error' in data:
+            raise RuntimeError(f"工作队列 {method} 出错: {data['error']}")
+        return data['result']
+
+    def __getattr__(self, method):
+        if method not in _REMOTE_METHODS:
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self._call(method, **self._named(method, args, kwargs))
+
+    @staticmethod
+    def _named(method, args, kwargs):
+        import inspect
+
+        names = list(inspect.signature(getattr(WorkQueue, method)).parameters)[1:]
+        return dict(zip(names, args), **kwargs)
+
+
+def open_queue(location=WORK_QUEUE_FILE, token=None):
+    """按位置打开工作队列：http(s)://开头时使用RemoteQueue（需要共享令牌），否则视为SQLite文件路径"""
+    if location.startswith(('http://', 'https://')):
+        return RemoteQueue(location, token)
+    return WorkQueue(location)
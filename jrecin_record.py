@@ -0,0 +1,230 @@
+"""
+JRec-IN Portal 紧凑的职位记录
+用 __slots__ 类代替每个职位一份的五层嵌套字典，取值重复率高的分类字段（机构、地点、研究领域等）
+用 sys.intern 共享同一个字符串对象；提供与原有嵌套JSON、CSV和LLM输出格式之间的显式转换，
+原有的JSON输出格式保持不变
+
+字段映射（分区、字段名、CSV表头）只在这里定义一次，CSV导出等处共用
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# (分区, 字段名, CSV表头)，顺序即CSV列顺序
+FIELDS = (
+    ('基本信息', 'position_title', '职位标题'),
+    ('基本信息', 'institution', '机构名称'),
+    ('基本信息', 'job_id', '职位ID'),
+    ('基本信息', 'institution_type', '机构类型'),
+    ('基本信息', 'update_date', '更新日期'),
+    ('基本信息', 'application_deadline', '申请截止日期'),
+    ('职位属性', 'location', '工作地点'),
+    ('职位属性', 'research_field', '研究领域'),
+    ('职位属性', 'position_type', '职位类型'),
+    ('职位属性', 'employment_type', '雇佣类型'),
+    ('职位属性', 'tenure_status', '任期状态'),
+    ('职位属性', 'trial_period', '试用期'),
+    ('薪资和工作条件', 'salary', '薪资'),
+    ('薪资和工作条件', 'salary_description', '薪资说明'),
+    ('薪资和工作条件', 'working_hours_description', '工作时间说明'),
+    ('职位详情', 'job_description', '职位描述'),
+    ('职位详情', 'department', '部门'),
+    ('职位详情', 'qualifications', '资格要求'),
+    ('职位详情', 'teaching_requirements', '教学要求'),
+    ('职位详情', 'application_method', '申请方法'),
+    ('其他信息', 'notes', '备注'),
+    ('其他信息', 'is_active', '是否有效'),
+    ('其他信息', 'original_url', '原始链接'),
+)
+SECTIONS = ('基本信息', '职位属性', '薪资和工作条件', '职位详情', '其他信息')
+# LLM提示词要求输出的字段（不含job_id、日期、申请方法等由正则解析器负责的字段）
+LLM_FIELDS = (
+    'position_title', 'institution', 'institution_type',
+    'location', 'research_field', 'position_type', 'employment_type', 'tenure_status',
+    'salary', 'salary_description', 'working_hours_description',
+    'job_description', 'department', 'qualifications', 'teaching_requirements',
+)
+# 取值种类少、在职位之间大量重复的字段，驻留后所有职位共用同一个字符串对象
+INTERNED_FIELDS = frozenset([
+    'institution', 'institution_type', 'update_date', 'application_deadline', 'location', 'research_field',
+    'position_type', 'employment_type', 'tenure_status', 'trial_period',
+])
+
+_SECTION_FIELDS = {section: tuple(field for s, field, _ in FIELDS if s == section) for section in SECTIONS}
+_FIELD_SECTIONS = {field: section for section, field, _ in FIELDS}
+
+
+class JobRecord:
+    """一个职位的全部字段；record['基本信息'] 等按分区取值的写法仍然可用（每次返回新的字典）"""
+
+    __slots__ = tuple(field for _, field, _ in FIELDS)
+
+    def __init__(self, **values):
+        for _, field, _ in FIELDS:
+            value = values.get(field, True if field == 'is_active' else '')
+            if field in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, field, value):
+        if field in INTERNED_FIELDS and isinstance(value, str):
+            value = sys.intern(value)
+        object.__setattr__(self, field, value)
+
+    def __eq__(self, other):
+        return isinstance(other, JobRecord) and all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __repr__(self):
+        return f'JobRecord(job_id={self.job_id!r}, position_title={self.position_title!r})'
+
+    # 与嵌套字典兼容的读取方式
+    def __getitem__(self, section):
+        return {field: getattr(self, field) for field in _SECTION_FIELDS[section]}
+
+    def get(self, section, default=None):
+        return self[section] if section in _SECTION_FIELDS else default
+
+    # 嵌套JSON（原有格式）
+    @classmethod
+    def from_dict(cls, job_data):
+        values = {}
+        for section in SECTIONS:
+            values.update(job_data.get(section, {}))
+        return cls(**{field: values[field] for field in _FIELD_SECTIONS if field in values})
+
+    def to_dict(self):
+        return {section: self[section] for section in SECTIONS}
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def to_json(self, indent=None):
+        """序列化为原有的嵌套JSON；indent为None时输出紧凑格式"""
+        separators = None if indent else (',', ':')
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent, separators=separators)
+
+    # CSV
+    def to_csv_row(self):
+        return {header: getattr(self, field) for _, field, header in FIELDS}
+
+    @classmethod
+    def from_csv_row(cls, row):
+        values = {field: row.get(header, '') for _, field, header in FIELDS}
+        values['is_active'] = str(values['is_active']) in ('True', 'true', '1')
+        return cls(**values)
+
+    # LLM输出格式
+    @classmethod
+    def from_llm(cls, llm_data, job_id='', original_url=''):
+        """用LLM分析结果（与提示词中的JSON格式一致）构建记录"""
+        values = {'job_id': job_id, 'original_url': original_url}
+        for section in SECTIONS:
+            section_data = llm_data.get(section)
+            if isinstance(section_data, dict):
+                values.update({field: str(section_data.get(field) or '') for field in LLM_FIELDS
+                               if field in section_data and _FIELD_SECTIONS[field] == section})
+        return cls(**values)
+
+    def to_llm(self):
+        """只保留LLM提示词中要求的字段"""
+        llm_data = {}
+        for field in LLM_FIELDS:
+            llm_data.setdefault(_FIELD_SECTIONS[field], {})[field] = getattr(self, field)
+        return llm_data
+
+
+def as_record(job):
+    """嵌套字典或JobRecord统一转换为JobRecord"""
+    return job if isinstance(job, JobRecord) else JobRecord.from_dict(job)
+
+
+def as_dict(job):
+    """嵌套字典或JobRecord统一转换为原有的嵌套字典"""
+    return job.to_dict() if isinstance(job, JobRecord) else job
+
+
+def write_json_list(records, file_path, indent=2, encoding='utf-8-sig'):
+    """逐条写出JSON数组（格式与 json.dump(list, indent=2) 相同），不在内存中拼出整个列表的字典
+
+    先写临时文件再替换，中断时不会留下不完整的JSON
+    """
+    count = 0
+    temp_path = file_path + '.tmp'
+    with open(temp_path, 'w', encoding=encoding) as f:
+        f.write('[')
+        for record in records:
+            text = json.dumps(as_dict(record), ensure_ascii=False, indent=indent)
+            if indent:
+                text = '\n' + ' ' * indent + text.replace('\n', '\n' + ' ' * indent)
+            f.write((',' if count else '') + text)
+            count += 1
+        f.write('\n]' if indent and count else ']')
+    os.replace(temp_path, file_path)
+    return count
+
+
+def _sample_posting(i):
+    return {
+        "基本信息": {"position_title": f"准教授または講師（経済学）{i}", "institution": f"国立大学法人 大学{i % 400}",
+                   "job_id": f"D{111000000 + i}", "institution_type": "国立大学",
+                   "update_date": f"2025年{i % 12 + 1}月{i % 28 + 1}日",
+                   "application_deadline": f"2025年{(i + 2) % 12 + 1}月{i % 28 + 1}日"},
+        "职位属性": {"location": ["東京都", "大阪府", "京都府", "愛知県"][i % 4],
+                   "research_field": ["経済学 - 理論経済学", "経済学 - 経済政策", "経済学 - 経済統計"][i % 3],
+                   "position_type": "准教授", "employment_type": "常勤", "tenure_status": "テニュアトラック",
+                   "trial_period": "試用期間あり"},
+        "薪资和工作条件": {"salary": "年俸制 600万円～900万円", "salary_description": "本学規程による",
+                     "working_hours_description": "専門業務型裁量労働制"},
+        "职位详情": {"job_description": f"経済学部における講義・演習の担当および研究 {i} " * 8, "department": "経済学部",
+                   "qualifications": "博士の学位を有する者 " * 4, "teaching_requirements": "ミクロ経済学",
+                   "application_method": "JREC-IN Portalの電子応募による"},
+        "其他信息": {"notes": "", "is_active": True, "original_url": f"https://jrecin.jst.go.jp/{111000000 + i}"},
+    }
+
+
+def _measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark(count=50000):
+    """比较嵌套字典和JobRecord在count个职位上的峰值内存和加载耗时（模拟从JSON读入后保存在内存中）
+
+    序列化按相同的格式比较（all_job_data.json使用的indent=2，以及紧凑格式）：JobRecord序列化时先转换回嵌套字典，
+    所以序列化不会更快，节省的是常驻内存
+    """
+    payloads = [json.dumps(_sample_posting(i), ensure_ascii=False) for i in range(count)]
+
+    dicts, dict_load, dict_peak = _measure(lambda: [json.loads(text) for text in payloads])
+    records, record_load, record_peak = _measure(lambda: [JobRecord.from_json(text) for text in payloads])
+
+    def timed(dump, items):
+        start = time.perf_counter()
+        for item in items:
+            dump(item)
+        return time.perf_counter() - start
+
+    dict_indent = timed(lambda job: json.dumps(job, ensure_ascii=False, indent=2), dicts)
+    dict_compact = timed(lambda job: json.dumps(job, ensure_ascii=False, separators=(',', ':')), dicts)
+    record_indent = timed(lambda record: record.to_json(indent=2), records)
+    record_compact = timed(lambda record: record.to_json(), records)
+    record_csv = timed(lambda record: record.to_csv_row(), records)
+
+    print(f"{count}个职位")
+    print(f"嵌套字典:  峰值内存 {dict_peak / 1048576:7.1f} MB  加载 {dict_load:5.2f} s  "
+          f"JSON(indent=2) {dict_indent:5.2f} s  JSON(紧凑) {dict_compact:5.2f} s")
+    print(f"JobRecord: 峰值内存 {record_peak / 1048576:7.1f} MB  加载 {record_load:5.2f} s  "
+          f"JSON(indent=2) {record_indent:5.2f} s  JSON(紧凑) {record_compact:5.2f} s  CSV行 {record_csv:5.2f} s")
+
+
+if __name__ == "__main__":
+    benchmark()
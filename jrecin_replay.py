@@ -0,0 +1,220 @@
+"""
+JRec-IN Portal 会话录制与回放
+在HTTP传输层（requests的HTTPAdapter / httpx的Transport）记录一次真实运行的所有请求和响应
+（CSRF初始页面、搜索结果页、职位详情页），保存为一个SQLite存档；回放时由同一个传输层直接返回存档中的响应，
+爬虫、会话和解析代码不需要任何修改，也不发出网络请求，可以离线、可重复地测试和测量整个流程
+
+- 请求按 方法 + 规范化的URL（查询参数排序后重新编码）+ 请求体哈希 匹配，不比较请求头（CSRF令牌和cookies每次不同）
+- 同一请求录制了多次时按录制顺序依次返回，次数用完后重复返回最后一次的响应
+- 存档中没有的请求按连接错误处理（与网络故障相同的异常类型），由原有的错误处理逻辑跳过
+- 响应正文保存解压后的内容（zlib压缩存储），去掉Content-Encoding等传输相关的响应头
+
+使用: python jrecin_cli.py --record jrecin_data/sessions/run.sqlite3 urls
+      python jrecin_cli.py --replay jrecin_data/sessions/run.sqlite3 urls
+回放时ScraperConfig的请求间隔为0
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+SESSION_DIR = 'jrecin_data/sessions'
+# 不保存的响应头：正文已经解压，长度和分块方式由回放时的响应重新决定
+DROP_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exchanges (
+    id INTEGER PRIMARY KEY,
+    request_key TEXT NOT NULL,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    elapsed REAL NOT NULL,
+    recorded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exchanges_key ON exchanges (request_key, id);
+"""
+
+
+def canonical_url(url):
+    """查询参数排序并统一编码（requests和httpx对空格等字符的编码不同），去掉片段"""
+    parts = urlsplit(str(url))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or '/', query, ''))
+
+
+def request_key(method, url, body=None):
+    key = f'{method.upper()} {canonical_url(url)}'
+    if body:
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        key += ' ' + hashlib.sha1(body).hexdigest()
+    return key
+
+
+def _kept_headers(items):
+    return [(name, value) for name, value in items if name.lower() not in DROP_HEADERS]
+
+
+class SessionArchive:
+    """一次运行的HTTP交换存档
+
+    mode: 'record' 清空已有内容后记录所有交换；'replay' 只从存档返回响应
+    同一个存档可以同时供多个HttpClient（多个线程）使用
+    """
+
+    def __init__(self, path, mode='replay'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"未知的模式: {mode}（可用: record, replay）")
+        if mode == 'replay' and not os.path.exists(path):
+            raise FileNotFoundError(f"会话存档不存在: {path}")
+        self.path = path
+        self.mode = mode
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        if mode == 'record':
+            # 一个存档对应一次运行
+            self.db.execute('DELETE FROM exchanges')
+            self.db.commit()
+            self._entries = {}
+        else:
+            # request_key -> [id...]（按录制顺序），正文在回放时才读取
+            self._entries = {}
+            for row_id, key in self.db.execute('SELECT id, request_key FROM exchanges ORDER BY id'):
+                self._entries.setdefault(key, []).append(row_id)
+        self._served = {}
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    def __len__(self):
+        return sum(len(ids) for ids in self._entries.values())
+
+    def record(self, method, url, body, status, reason, headers, content, elapsed=0.0):
+        """记录一次交换；headers为 [(名称, 值)]，content为解压后的正文"""
+        with self._lock:
+            self.db.execute('INSERT INTO exchanges (request_key, method, url, status, reason, headers, body, elapsed, '
+                            'recorded) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                            (request_key(method, url, body), method.upper(), str(url), status, reason or '',
+                             json.dumps(_kept_headers(headers), ensure_ascii=False), zlib.compress(content),
+                             elapsed, time.time()))
+            self.db.commit()
+            self.recorded += 1
+
+    def lookup(self, method, url, body=None):
+        """返回 (状态码, 原因, [(名称, 值)], 正文)，存档中没有该请求时返回None"""
+        key = request_key(method, url, body)
+        with self._lock:
+            ids = self._entries.get(key)
+            if not ids:
+                self.missed += 1
+                return None
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+            row = self.db.execute('SELECT status, reason, headers, body FROM exchanges WHERE id = ?',
+                                  (ids[min(served, len(ids) - 1)],)).fetchone()
+            self.replayed += 1
+        status, reason, headers, body = row
+        return status, reason, json.loads(headers), zlib.decompress(body)
+
+    def miss_message(self, method, url):
+        return f"会话存档 {self.path} 中没有该请求: {method.upper()} {canonical_url(url)}"
+
+    def requests_adapter(self, pool_size):
+        """requests会话使用的传输适配器"""
+        import io
+
+        from requests.adapters import HTTPAdapter
+        from requests.exceptions import ConnectionError
+        from urllib3 import HTTPResponse
+        from urllib3._collections import HTTPHeaderDict
+
+        archive = self
+
+        class SessionArchiveAdapter(HTTPAdapter):
+            def send(self, request, **kwargs):
+                if not archive.replaying:
+                    response = super().send(request, **kwargs)
+                    archive.record(request.method, request.url, request.body, response.status_code,
+                                   response.reason, response.headers.items(), response.content,
+                                   response.elapsed.total_seconds())
+                    return response
+                exchange = archive.lookup(request.method, request.url, request.body)
+                if exchange is None:
+                    raise ConnectionError(archive.miss_message(request.method, request.url), request=request)
+                status, reason, headers, body = exchange
+                raw = HTTPResponse(body=io.BytesIO(body), headers=HTTPHeaderDict(headers), status=status,
+                                   reason=reason, preload_content=False, decode_content=False)
+                return self.build_response(request, raw)
+
+        return SessionArchiveAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    def httpx_transport(self, http2, limits):
+        """httpx客户端使用的传输层"""
+        import httpx
+
+        archive = self
+        inner = None if self.replaying else httpx.HTTPTransport(http2=http2, limits=limits)
+
+        class SessionArchiveTransport(httpx.BaseTransport):
+            def handle_request(self, request):
+                body = request.read()
+                if not archive.replaying:
+                    start = time.perf_counter()
+                    response = inner.handle_request(request)
+                    try:
+                        content = response.read()
+                    finally:
+                        response.close()
+                    headers = _kept_headers(response.headers.multi_items())
+                    archive.record(request.method, request.url, body, response.status_code,
+                                   response.reason_phrase, headers, content, time.perf_counter() - start)
+                    return httpx.Response(response.status_code, headers=headers, content=content, request=request,
+                                          extensions={'reason_phrase': response.reason_phrase.encode('ascii')})
+                exchange = archive.lookup(request.method, request.url, body)
+                if exchange is None:
+                    raise httpx.ConnectError(archive.miss_message(request.method, request.url), request=request)
+                status, reason, headers, body = exchange
+                return httpx.Response(status, headers=headers, content=body, request=request,
+                                      extensions={'reason_phrase': reason.encode('ascii', 'replace')})
+
+            def close(self):
+                if inner is not None:
+                    inner.close()
+
+        return SessionArchiveTransport()
+
+    def stats_text(self):
+        if self.replaying:
+            text = f"从会话存档 {self.path} 回放了{self.replayed}个请求"
+            return text + (f"，{self.missed}个请求不在存档中" if self.missed else '')
+        return f"已录制{self.recorded}个请求至会话存档 {self.path}"
+
+    def close(self):
+        with self._lock:
+            self.db.commit()
+            self.db.close()
+        print(self.stats_text())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
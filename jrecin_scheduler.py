@@ -0,0 +1,93 @@
+"""
+JRec-IN Portal 职位优先级调度
+按紧急程度（截止日期越近越优先、テニュアトラック优先、最近更新优先）排列待处理职位，
+已过截止日期的职位直接跳过，使详情抓取和LLM分析在被max_jobs或时间预算截断时先完成最有价值的部分
+"""
+
+import heapq
+from datetime import date
+
+from jrecin_normalize import parse_date
+
+# 截止日期未知时假定的剩余天数（通常是尚未抓取过详情的新职位）
+UNKNOWN_DEADLINE_DAYS = 45
+# テニュアトラック职位相当于提前的天数
+TENURE_BONUS_DAYS = 30
+# 最近更新的职位相当于提前的天数
+RECENT_UPDATE_DAYS = 7
+RECENT_BONUS_DAYS = 10
+
+
+def job_priority(job, record=None, today=None):
+    """计算职位的优先级（数值越小越优先），已过期的职位返回None
+
+    job: URL记录（可含搜索结果卡片中的信息）；record: 之前解析过的职位详情（可选）
+    """
+    today = today or date.today()
+    basic = (record or {}).get('基本信息', {})
+    attributes = (record or {}).get('职位属性', {})
+
+    deadline = parse_date(basic.get('application_deadline') or job.get('application_deadline', ''))
+    if deadline and deadline < today:
+        return None
+    days_left = (deadline - today).days if deadline else UNKNOWN_DEADLINE_DAYS
+
+    tenure_text = (attributes.get('tenure_status', '') + job.get('tenure_status', '') +
+                   job.get('title', '') + basic.get('position_title', ''))
+    if 'テニュアトラック' in tenure_text:
+        days_left -= TENURE_BONUS_DAYS
+
+    updated = parse_date(basic.get('update_date') or job.get('update_date', ''))
+    if updated and (today - updated).days <= RECENT_UPDATE_DAYS:
+        days_left -= RECENT_BONUS_DAYS
+
+    return days_left
+
+
+class PriorityScheduler:
+    """基于堆的优先队列，优先级相同时保持加入顺序"""
+
+    def __init__(self, today=None):
+        self.today = today or date.today()
+        self._heap = []
+        self._counter = 0
+        self.skipped = []
+
+    def push(self, job, record=None):
+        """加入一个职位，已过期的职位记入skipped并返回False"""
+        priority = job_priority(job, record, self.today)
+        if priority is None:
+            self.skipped.append(job)
+            return False
+        heapq.heappush(self._heap, (priority, self._counter, job))
+        self._counter += 1
+        return True
+
+    def pop(self):
+        """取出优先级最高的职位"""
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        """按优先级依次取出所有职位"""
+        while self._heap:
+            yield self.pop()
+
+    def items(self):
+        """按优先级依次取出 (优先级, 职位)"""
+        while self._heap:
+            priority, _, job = heapq.heappop(self._heap)
+            yield priority, job
+
+
+def prioritize_jobs(jobs, job_store=None, today=None):
+    """按优先级重新排列URL记录，已知已过期的职位被跳过；job_store用于查询之前解析过的详情"""
+    scheduler = PriorityScheduler(today)
+    for job in jobs:
+        record = job_store.get(job['job_id']) if job_store is not None and job.get('job_id') else None
+        scheduler.push(job, record)
+    if scheduler.skipped:
+        print(f"跳过{len(scheduler.skipped)}个已过截止日期的职位")
+    return list(scheduler)
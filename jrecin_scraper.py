@@ -7,14 +7,29 @@ JRec-IN Portal 爬虫 with only regex analysis
 2. 获取职位详情页面并解析关键信息
 """
 
-import requests
-from bs4 import BeautifulSoup
 import os
 import time
 import json
 import re
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin
-from jrecin_analyzer import *
+from jrecin_analyzer import parse_summary_fields, process_job_urls
+from jrecin_budget import TimeBudget, load_deferred_jobs, save_deferred_jobs
+from jrecin_checkpoint import CheckpointJournal
+from jrecin_config import BASE_URL, SEARCH_URL, ScraperConfig
+from jrecin_corpus import CorpusTable
+from jrecin_export import CsvSink, export_jobs
+from jrecin_http import http_errors
+from jrecin_normalize import JOB_ID_RE, normalize_text, parse_date
+from jrecin_output import atomic_write_json, clear_directory
+from jrecin_profile import profiling, stage
+from jrecin_scheduler import prioritize_jobs
+from jrecin_session import ManagedSession, SessionPool
+from jrecin_store import JOB_STORE_FILE, URL_STORE_FILE, JobStore, iter_json_list
+from jrecin_trends import record_snapshot, update_trends
+from jrecin_watchlist import WatchlistEngine
 
 
 # 创建数据目录结构
@@ -41,56 +56,52 @@ def create_directories():
     ]
 
     for directory in ['jrecin_data/job_details/html']:
-        # 如果目录存在，清空其内容
-        if os.path.exists(directory):
-            print(f"清空目录: {directory}")
-            # 列出目录中的所有文件和子目录
-            for item in os.listdir(directory):
-                item_path = os.path.join(directory, item)
-                try:
-                    if os.path.isfile(item_path):
-                        # 如果是文件，直接删除
-                        os.unlink(item_path)
-                except Exception as e:
-                    print(f"清空过程中出错: {e}")
-
-
-# 设置请求头，模拟浏览器
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'ja,en-US;q=0.9,en;q=0.8',  # 设置为日语优先
-    'Connection': 'keep-alive',
-    'Upgrade-Insecure-Requests': '1',
-}
-
-# 目标URL
-base_url = 'https://jrecin.jst.go.jp'
-search_url = 'https://jrecin.jst.go.jp/seek/SeekJorSearch'
+        # 整个目录改名后重建，旧文件在后台一次性删除
+        print(f"清空目录: {directory}")
+        try:
+            clear_directory(directory)
+        except OSError as e:
+            print(f"清空过程中出错: {e}")
+
+
+class RateLimiter:
+    """线程安全的请求限速器，多个查询并发爬取时共享同一个请求间隔"""
+
+    def __init__(self, interval=2.0):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        """等待到下一个允许发出请求的时间点"""
+        with self._lock:
+            now = time.monotonic()
+            wait_time = max(0.0, self._next_time - now)
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
 
 
 # 第一部分：获取职位URL列表
-def submit_search_request(session, keywords='理論経済学 経済学説 経済思想 経済政策', page=1, test_optimal=False):
-    """提交搜索请求并获取结果页面"""
+def submit_search_request(session, keywords='理論経済学 経済学説 経済思想 経済政策', page=1, test_optimal=False,
+                          init_session=False, filters=None, query_name=None, search_url=SEARCH_URL):
+    """提交搜索请求并获取结果页面
+
+    session可以是SessionPool分配的ManagedSession，也可以是普通的HTTP客户端（自动包装）
+    """
+    if not isinstance(session, ManagedSession):
+        session = ManagedSession(session, search_url)
+    prefix = f'{query_name}_' if query_name else ''
     try:
-        # 如果是第一页，先获取初始页面以获取必要的表单字段和cookies
-        if page == 1:
+        # 会话尚未初始化（或要求强制刷新）时，先获取初始页面以获取cookies和CSRF令牌
+        if init_session or not session.bootstrapped:
             print(f"获取初始页面...")
-            response = session.get(search_url, headers=headers)
-            response.raise_for_status()
+            initial_html = session.refresh_csrf()
             if test_optimal == True:
                 # 保存初始页面（可选，用于调试）
-                with open('jrecin_data/initial_page.html', 'w', encoding='utf-8-sig') as f:
-                    f.write(response.text)
-                print(f"初始页面已保存至 jrecin_data/initial_page.html")
-
-            # 从页面中提取CSRF令牌
-            soup = BeautifulSoup(response.text, 'html.parser')
-            csrf_meta = soup.find('meta', {'name': '_csrf'})
-            if csrf_meta:
-                csrf_token = csrf_meta['content']
-                csrf_header = soup.find('meta', {'name': '_csrf_header'})['content']
-                headers[csrf_header] = csrf_token
+                with open(f'jrecin_data/{prefix}initial_page.html', 'w', encoding='utf-8-sig') as f:
+                    f.write(initial_html)
+                print(f"初始页面已保存至 jrecin_data/{prefix}initial_page.html")
 
         # 准备搜索表单数据
         form_data = {
@@ -99,31 +110,43 @@ def submit_search_request(session, keywords='理論経済学 経済学説 経済
             'fn': '0',  # 猜测是form number或function
             'page': str(page)  # 页码
         }
+        # 附加筛选条件（直接作为搜索表单字段提交）
+        if filters:
+            form_data.update(filters)
 
-        # 提交GET请求
+        # 提交GET请求（令牌被服务器拒绝时会自动刷新并重试）
         print(f"提交第{page}页搜索请求...")
         search_response = session.get(
             search_url,
-            params=form_data,
-            headers=headers
+            params=form_data
         )
         search_response.raise_for_status()
 
         if test_optimal == True:
             # 保存搜索结果页面（可选，用于调试）
-            with open(f'jrecin_data/search_pages/page{page}.html', 'w', encoding='utf-8-sig') as f:
+            with open(f'jrecin_data/search_pages/{prefix}page{page}.html', 'w', encoding='utf-8-sig') as f:
                 f.write(search_response.text)
-            print(f"搜索结果第{page}页已保存至 jrecin_data/search_pages/page{page}.html")
+            print(f"搜索结果第{page}页已保存至 jrecin_data/search_pages/{prefix}page{page}.html")
 
         return search_response.text
 
-    except requests.exceptions.RequestException as e:
+    except http_errors() as e:
         print(f"请求出错: {e}")
         return None
 
 
-def parse_search_results(html_content, page=1):
-    """解析搜索结果页面，提取职位链接"""
+def find_result_card(link):
+    """找到职位链接所在的搜索结果卡片（找不到时退回链接的父元素）"""
+    return link.find_parent(class_='card') or link.find_parent('li') or link.parent
+
+
+def parse_search_results(html_content, page=1, query_name=None, base_url=BASE_URL):
+    """解析搜索结果页面，提取职位链接和卡片上显示的机构、职位类型、工作地点、截止日期等信息
+
+    卡片上没有显示的字段记入missing_fields，这些字段只能从详情页面获得
+    """
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html_content, 'html.parser')
     job_links = []
 
@@ -131,8 +154,9 @@ def parse_search_results(html_content, page=1):
     links = soup.find_all('a', href=lambda href: href and ('D?id=' in href or 'Detail' in href))
 
     for link in links:
-        title_elem = link.find('h3') or link.find('strong') or link
-        title = title_elem.get_text(strip=True)
+        card = find_result_card(link)
+        title_elem = card.find('h5', class_='card_title_min') or link.find('h3') or link.find('strong') or link
+        title = normalize_text(title_elem.get_text(strip=True))
 
         # 构建完整URL
         href = link['href']
@@ -140,14 +164,16 @@ def parse_search_results(html_content, page=1):
             href = urljoin(base_url, href)
 
         # 提取职位ID
-        job_id_match = re.search(r'D\d+', href)
+        job_id_match = JOB_ID_RE.search(href)
         job_id = job_id_match.group(0) if job_id_match else None
 
-        job_links.append({
+        # 用与详情页面相同的提取规则从卡片中读取摘要字段
+        card_fields = parse_summary_fields(card)
+        job_links.append(dict({
             'url': href,
             'title': title,
             'job_id': job_id
-        })
+        }, **card_fields, missing_fields=[field for field, value in card_fields.items() if not value]))
 
     # 查找分页信息，检查是否有下一页
     has_next_page = False
@@ -177,28 +203,63 @@ def parse_search_results(html_content, page=1):
     }
 
     # 将结果保存为JSON文件
-    with open(f'jrecin_data/search_pages/parsed_page{page}.json', 'w', encoding='utf-8-sig') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    prefix = f'{query_name}_' if query_name else ''
+    atomic_write_json(f'jrecin_data/search_pages/{prefix}parsed_page{page}.json', result)
 
     print(f"第{page}页解析完成，找到{len(job_links)}个职位链接")
     return result
 
 
-def collect_all_job_urls(max_pages=10, keywords='理論経済学 経済学説 経済思想 経済政策', test_optimal=False):
-    """收集所有搜索页面中的职位URL，并进行去重"""
-    session = requests.Session()
+def crawl_search_pages(keywords, max_pages=10, filters=None, test_optimal=False, journal=None, rate_limiter=None,
+                       query_name=None, config=None, pool=None, budget=None, url_fraction=1.0):
+    """按页爬取一组关键词的搜索结果，返回未去重的职位链接列表
+
+    budget: 可选的TimeBudget；预计在预算的url_fraction以内无法再完成一页时提前结束翻页
+    """
+    config = config or ScraperConfig()
+    # 每页从会话池中取得一个独立会话，cookies和CSRF令牌互不影响；没有传入会话池时使用自己的并在结束时关闭
+    if pool is None:
+        with SessionPool(1, config) as pool:
+            return crawl_search_pages(keywords, max_pages, filters, test_optimal, journal, rate_limiter, query_name,
+                                      config, pool, budget, url_fraction)
     all_job_links = []
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(config.page_interval)
 
     # 爬取指定页数的搜索结果
     for page in range(1, max_pages + 1):
-        # 提交搜索请求
-        search_result = submit_search_request(session, page=page, keywords=keywords, test_optimal=test_optimal)
-        if not search_result:
-            print(f"获取第{page}页失败，停止爬取")
-            break
-
-        # 解析搜索结果
-        parsed_result = parse_search_results(search_result, page)
+        # 断点日志中已完成的页面直接复用解析结果
+        parsed_result = journal.page_result(keywords, page, filters) if journal else None
+        if parsed_result:
+            print(f"第{page}页已在断点日志中，跳过请求")
+        else:
+            if budget and not budget.can_afford('page', limit_fraction=url_fraction):
+                print(f"时间预算不足，第{page}页及之后的页面推迟到下次运行")
+                budget.defer('page', [f"{query_name or keywords}#{page}"])
+                break
+            page_start = time.monotonic()
+
+            # 页面间延迟，避免请求过快（并发查询共享同一个限速器）
+            with stage('rate_limit'):
+                rate_limiter.wait()
+
+            # 提交搜索请求
+            with stage('search_request'), pool.session() as session:
+                search_result = submit_search_request(session, page=page, keywords=keywords,
+                                                      test_optimal=test_optimal, filters=filters,
+                                                      query_name=query_name, search_url=config.search_url)
+            if not search_result:
+                print(f"获取第{page}页失败，停止爬取")
+                break
+
+            # 解析搜索结果
+            with stage('search_parse'):
+                parsed_result = parse_search_results(search_result, page, query_name=query_name,
+                                                     base_url=config.base_url)
+            if journal:
+                journal.mark_page(keywords, page, parsed_result, filters)
+            if budget:
+                budget.record('page', time.monotonic() - page_start)
 
         # 添加职位链接到总列表
         all_job_links.extend(parsed_result['job_links'])
@@ -208,10 +269,20 @@ def collect_all_job_urls(max_pages=10, keywords='理論経済学 経済学説 
             print("没有更多页面，结束爬取")
             break
 
-        # 页面间延迟，避免请求过快
-        if page < max_pages:
-            print("等待2秒后爬取下一页...")
-            time.sleep(2)
+    return all_job_links
+
+
+def save_job_urls(unique_job_links):
+    """保存去重后的URL列表，并追加到带索引的URL存储中（保留历史上出现过的所有职位）"""
+    atomic_write_json('jrecin_data/all_job_urls.json', unique_job_links)
+    JobStore(URL_STORE_FILE).put_many(unique_job_links)
+
+
+def collect_all_job_urls(max_pages=10, keywords='理論経済学 経済学説 経済思想 経済政策', test_optimal=False,
+                         journal=None, config=None, budget=None, url_fraction=1.0):
+    """收集所有搜索页面中的职位URL，并进行去重"""
+    all_job_links = crawl_search_pages(keywords, max_pages=max_pages, test_optimal=test_optimal, journal=journal,
+                                       config=config, budget=budget, url_fraction=url_fraction)
 
     # 去重处理
     unique_job_links = []
@@ -223,15 +294,79 @@ def collect_all_job_urls(max_pages=10, keywords='理論経済学 経済学説 
             unique_job_links.append(job)
 
     # 保存去重后的URL列表
-    with open('jrecin_data/all_job_urls.json', 'w', encoding='utf-8-sig') as f:
-        json.dump(unique_job_links, f, ensure_ascii=False, indent=2)
+    save_job_urls(unique_job_links)
 
     print(f"成功收集并去重，共找到{len(unique_job_links)}个职位链接")
     return unique_job_links
 
 
+def normalize_queries(queries):
+    """将查询集统一为 {'name', 'keywords', 'filters'} 字典列表，纯字符串视为一组关键词
+
+    名称中的特殊字符替换为下划线后，与前面的查询重名时（'経済/政策' 与 '経済_政策'）依次加上 _2、_3 等后缀
+    """
+    normalized = []
+    names = set()
+    for i, query in enumerate(queries, 1):
+        if isinstance(query, str):
+            query = {'keywords': query}
+        name = re.sub(r'[^\w-]', '_', query.get('name') or f'q{i}')
+        unique_name, suffix = name, 1
+        while unique_name in names:
+            suffix += 1
+            unique_name = f'{name}_{suffix}'
+        if unique_name != name:
+            print(f"查询名称 {name} 重复，改为 {unique_name}")
+        names.add(unique_name)
+        normalized.append({
+            'name': unique_name,
+            'keywords': query['keywords'],
+            'filters': query.get('filters') or None
+        })
+    return normalized
+
+
+def collect_query_set(queries, max_pages=10, test_optimal=False, journal=None, max_workers=4, config=None,
+                      budget=None, url_fraction=1.0):
+    """并发爬取多组关键词/筛选条件，在共享限速下运行，并在获取详情前跨查询去重"""
+    config = config or ScraperConfig()
+    queries = normalize_queries(queries)
+    rate_limiter = RateLimiter(config.page_interval)
+    results = {}
+
+    print(f"开始并发爬取{len(queries)}组查询...")
+    # 所有查询结束后（包括出错时）关闭会话池中的全部会话
+    with SessionPool(max_workers, config) as pool, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(crawl_search_pages, query['keywords'], max_pages, query['filters'], test_optimal,
+                            journal, rate_limiter, query['name'], config, pool, budget, url_fraction): query['name']
+            for query in queries
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    # 按查询集顺序跨查询去重，并记录每个职位命中的查询
+    unique_jobs = {}
+    for query in queries:
+        for job in results.get(query['name'], []):
+            if not job['job_id']:
+                continue
+            if job['job_id'] not in unique_jobs:
+                unique_jobs[job['job_id']] = dict(job, matched_queries=[])
+            matched = unique_jobs[job['job_id']]['matched_queries']
+            if query['name'] not in matched:
+                matched.append(query['name'])
+
+    unique_job_links = list(unique_jobs.values())
+    save_job_urls(unique_job_links)
+
+    total = sum(len(links) for links in results.values())
+    print(f"{len(queries)}组查询共找到{total}个职位链接，跨查询去重后剩余{len(unique_job_links)}个")
+    return unique_job_links
+
+
 def compare_with_previous_urls():
-    """比较当前URL列表与之前保存的URL列表，找出新增的URL"""
+    """比较当前URL列表与之前保存的URL列表，找出新增的URL和卡片上显示已更新的URL，并记录URL快照摘要"""
     # 加载当前的URL列表
     try:
         with open('jrecin_data/all_job_urls.json', 'r', encoding='utf-8-sig') as f:
@@ -246,79 +381,223 @@ def compare_with_previous_urls():
             previous_urls = json.load(f)
     except FileNotFoundError:
         print("之前URL列表不存在，所有URL视为新增")
-        # 将当前列表复制为之前的列表，用于下次比较
-        with open('jrecin_data/previous_job_urls.json', 'w', encoding='utf-8-sig') as f:
-            json.dump(current_urls, f, ensure_ascii=False, indent=2)
+        record_snapshot(current_urls, [], current_urls)
+        # 将当前列表复制为之前的列表，用于下次比较（先写新增列表，中断时下次比较仍能找出这些职位）
+        atomic_write_json('jrecin_data/new_job_urls.json', current_urls)
+        atomic_write_json('jrecin_data/previous_job_urls.json', current_urls)
         return current_urls
 
-    # 获取之前的job_id集合
-    previous_job_ids = {job['job_id'] for job in previous_urls if job.get('job_id')}
+    # 获取之前的job_id及卡片上的更新日期
+    previous_updates = {job['job_id']: job.get('update_date', '') for job in previous_urls if job.get('job_id')}
 
     # 找出新增的URL
-    new_urls = [job for job in current_urls if job.get('job_id') and job['job_id'] not in previous_job_ids]
+    new_urls = [job for job in current_urls if job.get('job_id') and job['job_id'] not in previous_updates]
 
-    # 更新之前的URL列表
-    with open('jrecin_data/previous_job_urls.json', 'w', encoding='utf-8-sig') as f:
-        json.dump(current_urls, f, ensure_ascii=False, indent=2)
+    # 卡片上的更新日期变化的职位也需要重新抓取详情
+    updated_urls = [dict(job, updated=True) for job in current_urls
+                    if job.get('job_id') in previous_updates and job.get('update_date')
+                    and previous_updates[job['job_id']] and job['update_date'] != previous_updates[job['job_id']]]
+    if updated_urls:
+        print(f"{len(updated_urls)}个已有职位的更新日期发生变化")
+        new_urls += updated_urls
 
     print(f"与之前的URL列表比较，找到{len(new_urls)}个新增的职位链接")
+    record_snapshot(current_urls, previous_urls, new_urls)
 
-    # 保存新增的URL列表
-    with open('jrecin_data/new_job_urls.json', 'w', encoding='utf-8-sig') as f:
-        json.dump(new_urls, f, ensure_ascii=False, indent=2)
+    # 先保存新增的URL列表，再更新之前的URL列表（中断时下次比较仍能找出这些职位）
+    atomic_write_json('jrecin_data/new_job_urls.json', new_urls)
+    atomic_write_json('jrecin_data/previous_job_urls.json', current_urls)
 
     return new_urls
 
 
-def main(max_pages=10, max_jobs=None, keywords='理論経済学 経済学説 経済思想 経済政策', mode='full', test_optimal=False):
-    """主函数，执行整个爬取过程"""
-    # 创建目录
-    create_directories()
-
-    if mode in ['full', 'urls_only']:
-        # 第一部分：收集所有职位URL并去重
-        print("开始收集职位URL...")
-        all_job_urls = collect_all_job_urls(max_pages=max_pages, keywords=keywords, test_optimal=test_optimal)
-
-        # 比较与之前的URL列表，找出新增的URL
-        new_job_urls = compare_with_previous_urls()
-
-        if mode == 'urls_only':
-            print("已完成URL收集和比较")
-            return
-
-    if mode in ['full', 'details_only']:
-        # 第二部分：处理职位详情
-        # 加载URL列表
-        try:
-            if mode == 'details_only':
-                # 尝试加载新增的URL列表
-                try:
-                    with open('jrecin_data/new_job_urls.json', 'r', encoding='utf-8-sig') as f:
-                        job_urls = json.load(f)
-                    print(f"加载了{len(job_urls)}个新增的职位URL")
-                except FileNotFoundError:
-                    # 如果没有新增URL列表，则使用完整URL列表
-                    with open('jrecin_data/all_job_urls.json', 'r', encoding='utf-8-sig') as f:
-                        job_urls = json.load(f)
-                    print(f"未找到新增URL列表，加载了{len(job_urls)}个完整职位URL")
+def skip_by_card(jobs, job_store=None, exclude_keywords=None, skipped=None, journal=None, today=None):
+    """根据搜索结果卡片上的信息跳过不需要抓取详情的职位，逐条返回需要抓取的职位
+
+    跳过的情况（按原因计入skipped字典）：卡片显示已过截止日期；已抓取过且卡片上的更新日期未变；
+    标题、职位类型或雇佣类型包含exclude_keywords中的关键词（例如 '非常勤'）。
+    断点日志中已完成的职位不跳过，由process_job_urls直接读取已保存的结果
+    """
+    today = today or date.today()
+    skipped = {} if skipped is None else skipped
+    for job in jobs:
+        if journal and job.get('job_id') and journal.job_done(job['job_id']):
+            yield job
+            continue
+        reason = None
+        deadline = parse_date(job.get('application_deadline', ''))
+        if deadline and deadline < today:
+            reason = 'expired'
+        elif exclude_keywords and any(keyword in job.get(field, '') for keyword in exclude_keywords
+                                      for field in ('title', 'position_type', 'employment_type')):
+            reason = 'irrelevant'
+        elif job_store is not None and job.get('update_date') and job.get('job_id') in job_store:
+            previous = job_store.get(job['job_id'])['基本信息'].get('update_date', '')
+            if previous == job['update_date']:
+                reason = 'unchanged'
+        if reason:
+            skipped[reason] = skipped.get(reason, 0) + 1
+            continue
+        yield job
+
+
+def still_deferred_jobs(previous, deferred, attempted, job_store=None, exclude_keywords=None):
+    """下次运行需要处理的推迟职位：本次因时间预算推迟的职位，加上上次推迟、本次仍未处理的职位（例如被max_jobs截断）
+
+    上次推迟的职位按卡片已不需要抓取时（已过截止日期、未更新或不相关）不再保留
+    """
+    remaining = list(deferred)
+    handled = {job['job_id'] for job in remaining} | set(attempted)
+    remaining += skip_by_card([job for job in previous if job.get('job_id') not in handled], job_store,
+                              exclude_keywords)
+    return remaining
+
+
+def finish_details(job_data_list):
+    """详情处理完成后的汇总步骤：关注列表、趋势统计和质量监控只针对本次处理的职位；
+    本次的职位合并到当前职位表后，CSV导出全部有效职位
+    """
+    # 只对本次处理（新增或重新抓取）的职位求值关注列表
+    with stage('watchlist'):
+        WatchlistEngine().run(job_data_list)
+    # 增量更新按周汇总的趋势统计
+    with stage('trends'):
+        update_trends(job_data_list)
+    # 检查本次解析结果的字段填充率是否骤降（网站改版）
+    with stage('quality'):
+        # 在这里才导入（会加载pandas），保持爬虫模块的导入轻量
+        from jrecin_quality import monitor_run
+        monitor_run(job_data_list)
+
+    if not job_data_list:
+        print("没有职位URL需要处理")
+    # 合并到当前职位表（同时删除已过截止日期的职位），表从未合并过时用职位存储初始化
+    corpus = CorpusTable()
+    try:
+        with stage('corpus'):
+            corpus.merge(job_data_list if corpus.version else JobStore(JOB_STORE_FILE))
+
+        # 导出全部有效职位；与上次导出相比没有变化时不重写
+        with stage('export_csv'):
+            export_jobs(corpus.iter_jobs(), [CsvSink('jrecin_data/economic_jobs.csv', encoding='utf-8-sig')],
+                        incremental=True)
+    finally:
+        corpus.close()
+
+
+def main(max_pages=10, max_jobs=None, keywords='理論経済学 経済学説 経済思想 経済政策', mode='full', test_optimal=False,
+         resume=True, queries=None, config=None, prioritize=True, time_budget=None, card_exclude=None,
+         profile=False):
+    """主函数，执行整个爬取过程
+
+    queries: 可选的查询集（关键词字符串或 {'name', 'keywords', 'filters'} 字典的列表），
+    提供时并发爬取所有查询并跨查询去重，忽略keywords参数
+    config: 可选的ScraperConfig，未提供时使用默认配置
+    prioritize: 按截止日期等紧急程度排列待处理职位，并跳过已过期的职位
+    time_budget: 可选的墙钟时间预算（秒），预算不足时提前结束翻页并推迟低优先级的详情抓取
+    card_exclude: 可选的关键词列表，搜索结果卡片上的标题、职位类型或雇佣类型包含这些关键词时不抓取详情
+    profile: 记录各阶段的墙钟和CPU时间、cProfile统计和调用栈采样，结果写入 jrecin_data/profile/
+    """
+    with profiling(profile):
+        config = config or ScraperConfig()
+        budget = TimeBudget(time_budget)
+        # full模式下URL收集最多使用40%的预算，其余留给详情抓取
+        url_fraction = 0.4 if mode == 'full' else 1.0
+
+        # 创建目录
+        create_directories()
+
+        # 断点日志：resume=True 时从上次中断的位置继续
+        journal = CheckpointJournal()
+        if not resume:
+            journal.clear()
+
+        if mode in ['full', 'urls_only']:
+            # 第一部分：收集所有职位URL并去重
+            print("开始收集职位URL...")
+            with stage('collect_urls'):
+                if queries:
+                    all_job_urls = collect_query_set(queries, max_pages=max_pages, test_optimal=test_optimal,
+                                                     journal=journal, config=config, budget=budget,
+                                                     url_fraction=url_fraction)
+                else:
+                    all_job_urls = collect_all_job_urls(max_pages=max_pages, keywords=keywords,
+                                                        test_optimal=test_optimal, journal=journal, config=config,
+                                                        budget=budget, url_fraction=url_fraction)
+
+            # 比较与之前的URL列表，找出新增的URL
+            # 比较会覆盖previous_job_urls.json，恢复运行时直接读取上次比较的结果
+            if journal.stage_done('compare'):
+                with open('jrecin_data/new_job_urls.json', 'r', encoding='utf-8-sig') as f:
+                    new_job_urls = json.load(f)
             else:
-                # 在full模式下，使用刚刚获取的新增URL
-                job_urls = new_job_urls if new_job_urls else all_job_urls
-        except FileNotFoundError:
-            print("找不到URL列表文件，请先执行URL收集步骤")
-            return
-
-        # 处理职位详情
-        if job_urls:
-            print(f"开始处理{min(len(job_urls), max_jobs or len(job_urls))}个职位详情...")
-            job_data_list = process_job_urls(job_urls, max_jobs)
-
-            # 保存为CSV
-            if job_data_list:
-                save_to_csv(job_data_list, encoding='utf-8-sig')
-        else:
-            print("没有职位URL需要处理")
+                with stage('compare'):
+                    new_job_urls = compare_with_previous_urls()
+                journal.mark_stage('compare')
+
+            if mode == 'urls_only':
+                journal.clear()
+                budget.write_summary()
+                print("已完成URL收集和比较")
+                return
+
+        if mode in ['full', 'details_only']:
+            # 第二部分：处理职位详情
+            # 加载URL列表
+            try:
+                if mode == 'details_only':
+                    # 按需逐条读取新增的URL列表，不一次性加载整个文件
+                    if os.path.exists('jrecin_data/new_job_urls.json'):
+                        job_urls = iter_json_list('jrecin_data/new_job_urls.json')
+                        print("按需读取新增的职位URL")
+                    else:
+                        # 如果没有新增URL列表，则使用完整URL列表
+                        if not os.path.exists('jrecin_data/all_job_urls.json'):
+                            raise FileNotFoundError('jrecin_data/all_job_urls.json')
+                        job_urls = iter_json_list('jrecin_data/all_job_urls.json')
+                        print("未找到新增URL列表，按需读取完整职位URL")
+                else:
+                    # 在full模式下，使用刚刚获取的新增URL
+                    job_urls = new_job_urls if new_job_urls else all_job_urls
+            except FileNotFoundError:
+                print("找不到URL列表文件，请先执行URL收集步骤")
+                return
+
+            # 上次因时间预算推迟的职位优先加入本次处理
+            job_urls = job_urls or []
+            deferred_jobs = load_deferred_jobs()
+            if deferred_jobs:
+                print(f"加入上次推迟的{len(deferred_jobs)}个职位")
+                deferred_ids = {job['job_id'] for job in deferred_jobs}
+                job_urls = deferred_jobs + [job for job in job_urls if job.get('job_id') not in deferred_ids]
+
+            # 根据搜索结果卡片跳过已过期、未更新或不相关的职位
+            job_store = JobStore(JOB_STORE_FILE)
+            card_skipped = {}
+            job_urls = skip_by_card(job_urls, job_store, card_exclude, card_skipped, journal=journal)
+
+            # 按紧急程度排序，max_jobs或时间预算截断时先处理最有价值的职位
+            if prioritize:
+                job_urls = prioritize_jobs(job_urls, job_store)
+
+            # 处理职位详情
+            print("开始处理职位详情...")
+            attempted = set()
+            with stage('details'):
+                job_data_list = process_job_urls(job_urls, max_jobs, journal=journal, config=config, budget=budget,
+                                                 attempted=attempted)
+            if card_skipped:
+                reasons = {'expired': '已过截止日期', 'unchanged': '未更新', 'irrelevant': '不相关'}
+                print("根据搜索结果卡片跳过详情抓取: " +
+                      "，".join(f"{reasons[reason]} {count}个" for reason, count in card_skipped.items()))
+            save_deferred_jobs(still_deferred_jobs(deferred_jobs, budget.deferred.get('job', []), attempted,
+                                                   job_store, card_exclude))
+            with stage('finish'):
+                finish_details(job_data_list)
+
+            # 整个流程成功结束，删除断点日志
+            journal.clear()
+            budget.write_summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,370 @@
+"""
+JRec-IN Portal 本地职位检索索引
+对已解析职位的职位描述、研究领域和应聘资格建立本地索引，支持增量加入新职位、
+自由文本查询和"查找相似职位"，完全离线、只使用CPU
+
+后端:
+- embedding: 安装了 sentence-transformers 且本地有模型时使用小型多语言向量模型（numpy矩阵内积检索）；
+  模型在第一次需要计算向量时才加载，只查找相似职位或保存索引时不加载；模型不可用时（auto）改用BM25
+- bm25: 默认后备方案，基于字符2-gram的BM25（TF-IDF的一种），用倒排索引只对候选职位打分；
+  bm25.json 之后的变化追加到 bm25.log.jsonl，保存开销与变化的职位数成正比，日志过长时才重写 bm25.json
+"""
+
+import importlib.util
+import json
+import math
+import os
+
+from jrecin_normalize import normalize_text
+from jrecin_output import atomic_write_json
+
+SEARCH_INDEX_DIR = 'jrecin_data/search_index'
+# 本地向量模型名称或路径（需事先下载到本地缓存，运行时不访问网络）
+EMBEDDING_MODEL = os.environ.get('JRECIN_EMBEDDING_MODEL', 'paraphrase-multilingual-MiniLM-L12-v2')
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+# 出现在超过该比例职位中的词几乎没有区分度，查询时跳过以减少候选职位
+BM25_MAX_DF_RATIO = 0.5
+# 变化日志行数超过 职位数 * 该倍数 + BM25_COMPACT_MIN_LINES 时重写bm25.json
+BM25_COMPACT_RATIO = 1
+BM25_COMPACT_MIN_LINES = 1000
+
+
+class ModelUnavailable(RuntimeError):
+    """本地向量模型无法加载"""
+
+
+def posting_text(job_data):
+    """取出用于检索的文本：职位标题、研究领域、职位描述和应聘资格"""
+    basic = job_data.get('基本信息', {})
+    attributes = job_data.get('职位属性', {})
+    details = job_data.get('职位详情', {})
+    return normalize_text(' '.join([
+        basic.get('position_title', ''),
+        attributes.get('research_field', ''),
+        details.get('job_description', ''),
+        details.get('qualifications', ''),
+    ]))
+
+
+def tokenize(text):
+    """按空白切分后，日语片段使用字符2-gram（不做分词），英文单词整体作为一个词"""
+    tokens = []
+    for word in normalize_text(text).lower().split(' '):
+        if word.isascii():
+            if word:
+                tokens.append(word)
+            continue
+        tokens.extend(word[i:i + 2] for i in range(max(1, len(word) - 1)))
+    return tokens
+
+
+class BM25Index:
+    """支持增量加入的BM25倒排索引"""
+
+    backend = 'bm25'
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.doc_terms = {}  # job_id -> {term: tf}
+        self.doc_lengths = {}
+        self.postings = {}  # term -> {job_id: tf}
+        self.total_length = 0
+        self.log_lines = 0
+        self.pending = {}  # 加载之后变化的职位 job_id -> {term: tf}（删除时为None），save()时追加到变化日志
+
+    def add(self, job_id, text):
+        terms = {}
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0) + 1
+        if self.doc_terms.get(job_id) == terms:
+            return
+        self._remove(job_id)
+        self._add_terms(job_id, terms)
+        self.pending[job_id] = terms
+
+    def _add_terms(self, job_id, terms):
+        self.doc_terms[job_id] = terms
+        length = sum(terms.values())
+        self.doc_lengths[job_id] = length
+        self.total_length += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[job_id] = tf
+
+    def _remove(self, job_id):
+        terms = self.doc_terms.pop(job_id, None)
+        if terms is None:
+            return False
+        self.total_length -= self.doc_lengths.pop(job_id)
+        for term in terms:
+            self.postings[term].pop(job_id, None)
+        return True
+
+    def remove(self, job_id):
+        if self._remove(job_id):
+            self.pending[job_id] = None
+
+    def _search_terms(self, query_terms, k, exclude=None):
+        count = len(self.doc_terms)
+        if not count:
+            return []
+        average_length = self.total_length / count
+        scores = {}
+        for term in set(query_terms):
+            posting = self.postings.get(term)
+            if not posting or (count > 20 and len(posting) > count * BM25_MAX_DF_RATIO):
+                continue
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for job_id, tf in posting.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[job_id] / average_length)
+                scores[job_id] = scores.get(job_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scores.pop(exclude, None)
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+    def search(self, query, k=10):
+        return self._search_terms(tokenize(query), k)
+
+    def similar(self, job_id, k=10):
+        return self._search_terms(list(self.doc_terms.get(job_id, {})), k, exclude=job_id)
+
+    def __contains__(self, job_id):
+        return job_id in self.doc_terms
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def save(self, directory):
+        """把变化的职位追加到变化日志；日志过长时原子地重写bm25.json并清空日志"""
+        if not self.pending:
+            return
+        path = os.path.join(directory, 'bm25.json')
+        log_path = os.path.join(directory, 'bm25.log.jsonl')
+        if (not os.path.exists(path) or
+                self.log_lines + len(self.pending) > len(self.doc_terms) * BM25_COMPACT_RATIO + BM25_COMPACT_MIN_LINES):
+            atomic_write_json(path, self.doc_terms, encoding='utf-8', indent=None)
+            # 日志中每行都是职位的完整词频，重写后中断导致日志没有清空时重放结果也相同
+            open(log_path, 'w').close()
+            self.log_lines = 0
+        else:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps({job_id: terms}, ensure_ascii=False) + '\n'
+                                for job_id, terms in self.pending.items()))
+            self.log_lines += len(self.pending)
+        self.pending = {}
+
+    def load(self, directory):
+        self._reset()
+        path = os.path.join(directory, 'bm25.json')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for job_id, terms in json.load(f).items():
+                    self._add_terms(job_id, terms)
+        log_path = os.path.join(directory, 'bm25.log.jsonl')
+        if os.path.exists(log_path):
+            with open(log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        break  # 中断时未写完的最后一行
+                    for job_id, terms in change.items():
+                        self._remove(job_id)
+                        if terms is not None:
+                            self._add_terms(job_id, terms)
+                    self.log_lines += 1
+
+
+class EmbeddingIndex:
+    """小型向量模型 + numpy内积检索（向量已归一化，内积即余弦相似度）
+
+    新加入的向量先放在列表中，查询或保存时才一次性合并进矩阵，逐个加入时不反复复制整个矩阵；
+    模型在第一次计算向量时才加载
+    """
+
+    backend = 'embedding'
+
+    def __init__(self, model_name=EMBEDDING_MODEL):
+        import numpy
+
+        self.numpy = numpy
+        self.model_name = model_name
+        self.model = None
+        self._reset()
+
+    def _reset(self):
+        self.ids = []
+        self.positions = {}
+        self.vectors = None
+        self.pending = []  # 尚未合并进矩阵的向量，位置紧接在矩阵之后
+        self.changed = False
+
+    def _load_model(self):
+        if self.model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+
+                # 只使用本地缓存的模型，不访问网络
+                self.model = SentenceTransformer(self.model_name, device='cpu', local_files_only=True)
+            except Exception as e:
+                raise ModelUnavailable(f"{self.model_name}: {e}") from e
+        return self.model
+
+    def _encode(self, texts):
+        return self._load_model().encode(texts, normalize_embeddings=True,
+                                         convert_to_numpy=True).astype('float32')
+
+    def add(self, job_id, text):
+        vector = self._encode([text])[0]
+        self.changed = True
+        position = self.positions.get(job_id)
+        if position is None:
+            self.positions[job_id] = len(self.ids)
+            self.ids.append(job_id)
+            self.pending.append(vector)
+        elif position < self._stacked():
+            self.vectors[position] = vector
+        else:
+            self.pending[position - self._stacked()] = vector
+
+    def _stacked(self):
+        return 0 if self.vectors is None else len(self.vectors)
+
+    def _matrix(self):
+        if self.pending:
+            self.vectors = self.numpy.vstack(([] if self.vectors is None else [self.vectors]) + self.pending)
+            self.pending = []
+        return self.vectors
+
+    def _search_vector(self, vector, k, exclude=None):
+        if not self.ids:
+            return []
+        scores = self._matrix() @ vector
+        count = min(k + 1, len(self.ids))
+        top = self.numpy.argpartition(-scores, count - 1)[:count]
+        results = [(self.ids[i], float(scores[i])) for i in top if self.ids[i] != exclude]
+        return sorted(results, key=lambda item: -item[1])[:k]
+
+    def search(self, query, k=10):
+        return self._search_vector(self._encode([query])[0], k)
+
+    def similar(self, job_id, k=10):
+        if job_id not in self.positions:
+            return []
+        return self._search_vector(self._matrix()[self.positions[job_id]], k, exclude=job_id)
+
+    def __contains__(self, job_id):
+        return job_id in self.positions
+
+    def __len__(self):
+        return len(self.ids)
+
+    def save(self, directory):
+        if not self.changed:
+            return
+        path = os.path.join(directory, 'embeddings.npy')
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            self.numpy.save(f, self._matrix())
+        os.replace(temp_path, path)
+        atomic_write_json(os.path.join(directory, 'embedding_ids.json'), self.ids, encoding='utf-8', indent=None)
+        self.changed = False
+
+    def load(self, directory):
+        self._reset()
+        ids_path = os.path.join(directory, 'embedding_ids.json')
+        if os.path.exists(ids_path):
+            with open(ids_path, 'r', encoding='utf-8') as f:
+                ids = json.load(f)
+            vectors = self.numpy.load(os.path.join(directory, 'embeddings.npy'))
+            if len(vectors) != len(ids):
+                # 两个文件分别替换，中途中断时可能不一致：丢弃旧索引，由build_search_index重建
+                print(f"检索索引文件不一致（{len(ids)}个job_id，{len(vectors)}个向量），忽略已有索引")
+                return
+            self.ids = ids
+            self.positions = {job_id: i for i, job_id in enumerate(ids)}
+            self.vectors = vectors
+
+
+class SemanticIndex:
+    """本地职位检索索引；backend为'auto'时优先使用向量模型，模型不可用时（第一次需要计算向量时才知道）退回BM25"""
+
+    def __init__(self, directory=SEARCH_INDEX_DIR, backend='auto'):
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.requested = backend
+        if backend == 'embedding' or (backend == 'auto' and importlib.util.find_spec('sentence_transformers')):
+            self.index = EmbeddingIndex()
+        else:
+            self.index = BM25Index()
+        self.loaded_time = self.modified_time()
+        self.index.load(directory)
+
+    @property
+    def backend(self):
+        return self.index.backend
+
+    def _call(self, method, *args):
+        try:
+            return getattr(self.index, method)(*args)
+        except ModelUnavailable as e:
+            if self.requested != 'auto':
+                raise
+            print(f"向量模型不可用，使用BM25检索: {e}")
+            self.index = BM25Index()
+            self.index.load(self.directory)
+            return getattr(self.index, method)(*args)
+
+    def add_job(self, job_data):
+        """加入或更新一个已解析的职位"""
+        job_id = job_data['基本信息']['job_id']
+        text = posting_text(job_data)
+        if text:
+            self._call('add', job_id, text)
+
+    def add_jobs(self, job_data_list):
+        for job_data in job_data_list:
+            self.add_job(job_data)
+
+    def search(self, query, k=10):
+        """自由文本查询，返回 [(job_id, 得分)]"""
+        return self._call('search', query, k)
+
+    def similar(self, job_id, k=10):
+        """查找与指定职位相似的职位，返回 [(job_id, 得分)]"""
+        return self.index.similar(job_id, k)
+
+    def __len__(self):
+        return len(self.index)
+
+    def modified_time(self):
+        """索引文件的最后修改时间"""
+        return max((entry.stat().st_mtime for entry in os.scandir(self.directory) if entry.is_file()), default=0)
+
+    def refresh(self):
+        """其他进程更新了索引文件时重新读取（已加载的向量模型保留），返回是否重新读取"""
+        modified = self.modified_time()
+        if modified == self.loaded_time:
+            return False
+        self.loaded_time = modified
+        self.index.load(self.directory)
+        return True
+
+    def save(self):
+        self.index.save(self.directory)
+        self.loaded_time = self.modified_time()
+
+
+def build_search_index(job_store=None, backend='auto'):
+    """用职位存储中的全部职位重建检索索引"""
+    from jrecin_store import JOB_STORE_FILE, JobStore
+
+    job_store = job_store or JobStore(JOB_STORE_FILE)
+    index = SemanticIndex(backend=backend)
+    index.add_jobs(job_store)
+    index.save()
+    print(f"检索索引已建立（{index.backend}），共{len(index)}个职位")
+    return index
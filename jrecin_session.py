@@ -0,0 +1,120 @@
+"""
+JRec-IN Portal 会话与CSRF令牌管理
+维护一组相互独立的HTTP会话（各自的cookies和CSRF令牌），线程安全地分配给并发的爬取任务；
+服务器拒绝令牌时自动重新获取令牌并重试，避免令牌过期后后续页面静默失败
+"""
+
+import queue
+import threading
+from contextlib import contextmanager
+
+from jrecin_config import SEARCH_URL, ScraperConfig
+
+# 服务器拒绝CSRF令牌时常见的状态码
+CSRF_REJECT_STATUS = (403, 419)
+
+
+def is_csrf_rejected(response):
+    """判断响应是否表示CSRF令牌失效（状态码拒绝，或被重定向到错误页面）"""
+    if response.status_code in CSRF_REJECT_STATUS:
+        return True
+    return bool(response.history) and 'error' in str(response.url).lower()
+
+
+class ManagedSession:
+    """包装一个HTTP客户端（HttpClient或requests会话），负责获取、保存和按需刷新该会话的CSRF令牌"""
+
+    def __init__(self, session, search_url=SEARCH_URL):
+        self.session = session
+        self.search_url = search_url
+        self.bootstrapped = False
+        self.refresh_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    def refresh_csrf(self):
+        """获取初始页面，从meta标签中提取CSRF令牌写入本会话的请求头，返回初始页面HTML"""
+        from bs4 import BeautifulSoup
+
+        with self._lock:
+            response = self.session.get(self.search_url)
+            response.raise_for_status()
+            soup = BeautifulSoup(response.text, 'html.parser')
+            csrf_meta = soup.find('meta', {'name': '_csrf'})
+            csrf_header = soup.find('meta', {'name': '_csrf_header'})
+            if csrf_meta and csrf_header:
+                self.session.headers[csrf_header['content']] = csrf_meta['content']
+            self.bootstrapped = True
+            self.refresh_count += 1
+            return response.text
+
+    def get(self, url, **kwargs):
+        """发送GET请求；令牌被拒绝时刷新令牌并重试一次"""
+        if not self.bootstrapped:
+            self.refresh_csrf()
+        response = self.session.get(url, **kwargs)
+        if is_csrf_rejected(response):
+            print("CSRF令牌已失效，重新获取令牌后重试...")
+            self.refresh_csrf()
+            response = self.session.get(url, **kwargs)
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+class SessionPool:
+    """线程安全的会话池，按需创建最多size个独立会话并分配给并发任务；用完后close()关闭所有会话的连接"""
+
+    def __init__(self, size=4, config=None):
+        self.size = size
+        self.config = config or ScraperConfig()
+        self._available = queue.Queue()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def _create(self):
+        return ManagedSession(self.config.new_session(), self.config.search_url)
+
+    def acquire(self):
+        """取得一个空闲会话，池未满时新建，否则等待其他任务归还"""
+        try:
+            return self._available.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._sessions) < self.size:
+                managed_session = self._create()
+                self._sessions.append(managed_session)
+                return managed_session
+        return self._available.get()
+
+    def release(self, managed_session):
+        """归还会话"""
+        self._available.put(managed_session)
+
+    @contextmanager
+    def session(self):
+        """with pool.session() as session: ... 用完自动归还"""
+        managed_session = self.acquire()
+        try:
+            yield managed_session
+        finally:
+            self.release(managed_session)
+
+    def close(self):
+        """关闭池中创建的所有会话（包括尚未归还的会话）"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        self._available = queue.Queue()
+        for managed_session in sessions:
+            managed_session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
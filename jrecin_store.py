@@ -0,0 +1,209 @@
+"""
+JRec-IN Portal 职位数据存储
+以JSON Lines格式追加写入职位记录，并维护 job_id -> (字节偏移, 长度) 的磁盘索引，
+支持按job_id随机读取和按需逐条迭代，无需一次性反序列化全部历史数据
+"""
+
+import json
+import os
+import threading
+
+URL_STORE_FILE = 'jrecin_data/url_store.jsonl'
+JOB_STORE_FILE = 'jrecin_data/job_store.jsonl'
+
+
+def record_job_id(record):
+    """从URL记录或职位详情记录中取出job_id"""
+    if 'job_id' in record:
+        return record['job_id']
+    return record.get('基本信息', {}).get('job_id')
+
+
+class JobStore:
+    """追加写入的职位存储，同一job_id多次写入时以最新一条为准"""
+
+    def __init__(self, path=JOB_STORE_FILE):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.offsets = {}
+        self._indexed_size = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        """读取索引文件，并补扫索引之后追加的数据（例如上次写入后未保存索引就中断）"""
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                self.offsets = {job_id: tuple(loc) for job_id, loc in index['offsets'].items()}
+                self._indexed_size = index['size']
+            except (json.JSONDecodeError, KeyError):
+                print(f"索引文件损坏，重新建立索引: {self.index_path}")
+                self.offsets = {}
+                self._indexed_size = 0
+
+        if not os.path.exists(self.path):
+            self.offsets = {}
+            self._indexed_size = 0
+            return
+
+        data_size = os.path.getsize(self.path)
+        if data_size < self._indexed_size:
+            # 数据文件被替换或截断，索引失效
+            self.offsets = {}
+            self._indexed_size = 0
+        if data_size > self._indexed_size:
+            self._scan_from(self._indexed_size)
+            self.save_index()
+
+    def _scan_from(self, position):
+        """从指定偏移开始扫描数据文件并更新索引，截掉中断时写了一半的最后一行"""
+        with open(self.path, 'r+b') as f:
+            f.seek(position)
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b'\n'):
+                    f.truncate(position)
+                    break
+                try:
+                    job_id = record_job_id(json.loads(line))
+                except json.JSONDecodeError:
+                    job_id = None
+                if job_id:
+                    self.offsets[job_id] = (position, len(line))
+                position += len(line)
+        self._indexed_size = position
+
+    def save_index(self):
+        """将索引写入磁盘（先写临时文件再替换，避免索引文件写坏）"""
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'size': self._indexed_size, 'offsets': self.offsets}, f)
+        os.replace(temp_path, self.index_path)
+
+    def put_many(self, records, sync=True):
+        """批量追加记录，sync=True 时写完后保存一次索引（否则由调用方稍后调用save_index）"""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        count = 0
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                position = f.tell()
+                for record in records:
+                    job_id = record_job_id(record)
+                    if not job_id:
+                        continue
+                    line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+                    f.write(line)
+                    self.offsets[job_id] = (position, len(line))
+                    position += len(line)
+                    count += 1
+            self._indexed_size = position
+            if sync:
+                self.save_index()
+        return count
+
+    def put(self, record):
+        """追加单条记录"""
+        return self.put_many([record])
+
+    def get(self, job_id, default=None):
+        """按job_id随机读取最新记录"""
+        location = self.offsets.get(job_id)
+        if location is None:
+            return default
+        offset, length = location
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def ids(self):
+        """按写入顺序返回所有job_id（仅读取索引）"""
+        return sorted(self.offsets, key=lambda job_id: self.offsets[job_id][0])
+
+    def __contains__(self, job_id):
+        return job_id in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        """按文件顺序逐条读取每个job_id的最新记录，跳过已被覆盖的旧版本"""
+        latest = {offset for offset, _ in self.offsets.values()}
+        if not latest:
+            return
+        with open(self.path, 'rb') as f:
+            position = 0
+            for line in f:
+                if position in latest:
+                    yield json.loads(line)
+                position += len(line)
+
+    def iter_slice(self, start, count):
+        """随机读取按写入顺序排列的第start条起的count条记录（用于分页显示）"""
+        for job_id in self.ids()[start:start + count]:
+            yield self.get(job_id)
+
+    def compact(self):
+        """重写数据文件，只保留每个job_id的最新记录"""
+        temp_path = self.path + '.tmp'
+        with self._lock:
+            offsets = {}
+            position = 0
+            with open(temp_path, 'wb') as out:
+                for record in self:
+                    line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+                    out.write(line)
+                    offsets[record_job_id(record)] = (position, len(line))
+                    position += len(line)
+            os.replace(temp_path, self.path)
+            self.offsets = offsets
+            self._indexed_size = position
+            self.save_index()
+        print(f"存储已压缩: {self.path}，保留{len(offsets)}条记录")
+
+
+def iter_json_list(file_path, encoding='utf-8-sig', chunk_size=65536):
+    """逐个读取JSON数组文件中的元素，避免一次性json.load整个列表"""
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding=encoding) as f:
+        buffer = ''
+        started = False
+        eof = False
+        while True:
+            buffer = buffer.lstrip()
+            if not started:
+                if not buffer and not eof:
+                    chunk = f.read(chunk_size)
+                    eof = not chunk
+                    buffer += chunk
+                    continue
+                if not buffer.startswith('['):
+                    raise ValueError(f"不是JSON数组文件: {file_path}")
+                buffer = buffer[1:]
+                started = True
+                continue
+            if buffer.startswith(','):
+                buffer = buffer[1:]
+                continue
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+                # 元素恰好位于缓冲区末尾时可能被截断（如数字），读入更多内容后再解析
+                complete = eof or end < len(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
@@ -0,0 +1,230 @@
+"""
+JRec-IN Portal 历史趋势统计
+每次运行记录一条URL快照摘要（与上次相比新增、更新和消失的job_id），并增量维护按周汇总的统计
+（研究领域、机构类型、任期状态的职位数，年薪分布和截止日期前的天数）。每个职位只保存它计入的分组，
+内容变化时先减去旧的贡献再加上新的，更新开销只与本次处理的职位数成正比，界面直接读取汇总结果绘图，无需扫描历史数据
+
+- trends.json 只保存按周汇总的结果，以及职位分组日志的文件名和有效长度（原子替换）
+- 职位分组日志（JSONL）每次只追加分组有变化的职位；日志行数远多于职位数时重写为新一代日志文件。
+  trends.json 中记录的长度之后的内容是中断时未完成的追加，加载时截掉，汇总和分组日志始终一致
+"""
+
+import json
+import os
+from datetime import date, datetime
+
+from jrecin_normalize import annual_salary, parse_date
+from jrecin_output import atomic_write_json
+
+TRENDS_FILE = 'jrecin_data/trends.json'
+SNAPSHOTS_FILE = 'jrecin_data/history/snapshots.jsonl'
+# 分组日志行数超过 职位数 * 该倍数 + COMPACT_MIN_LINES 时重写
+COMPACT_RATIO = 2
+COMPACT_MIN_LINES = 1000
+
+DIMENSIONS = ('research_field', 'institution_type', 'tenure_status', 'salary', 'deadline_days')
+# 年薪分组的宽度（日元）和截止日期前天数的分组上限
+SALARY_BUCKET = 1000000
+DEADLINE_BUCKETS = ((14, '0-14'), (30, '15-30'), (60, '31-60'), (90, '61-90'))
+UNKNOWN = '不明'
+
+
+def week_key(day):
+    """ISO周，例如 '2025-W14'"""
+    year, week, _ = day.isocalendar()
+    return f'{year}-W{week:02d}'
+
+
+def posting_groups(job_data, today=None):
+    """职位计入的周和各维度的分组"""
+    basic = job_data.get('基本信息', {})
+    attributes = job_data.get('职位属性', {})
+    conditions = job_data.get('薪资和工作条件', {})
+
+    posted = parse_date(basic.get('update_date', '')) or today or date.today()
+    deadline = parse_date(basic.get('application_deadline', ''))
+
+    tenure = attributes.get('tenure_status', '')
+    if 'テニュアトラック' in tenure + basic.get('position_title', ''):
+        tenure = 'テニュアトラック'
+
+    salary = annual_salary(conditions.get('salary', '') + ' ' + conditions.get('salary_description', ''))
+    salary_group = f'{salary // SALARY_BUCKET}00万' if salary else UNKNOWN
+
+    deadline_group = UNKNOWN
+    if deadline:
+        days = (deadline - posted).days
+        deadline_group = next((label for limit, label in DEADLINE_BUCKETS if days <= limit), '90+')
+
+    return {
+        'week': week_key(posted),
+        'research_field': attributes.get('research_field', '') or UNKNOWN,
+        'institution_type': basic.get('institution_type', '') or UNKNOWN,
+        'tenure_status': tenure or UNKNOWN,
+        'salary': salary_group,
+        'deadline_days': deadline_group,
+    }
+
+
+class TrendAggregates:
+    """按周汇总的职位统计；postings记录每个职位计入的分组，用于内容变化时撤销旧的贡献
+
+    postings在第一次用到时才从分组日志读取（界面只读取weeks）
+    """
+
+    def __init__(self, path=TRENDS_FILE):
+        self.path = path
+        self.weeks = {}
+        self.postings_file = None
+        self.postings_size = 0
+        self._postings = None
+        self._log_lines = 0
+        self._pending = {}  # 尚未追加到分组日志的 job_id -> 分组
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.weeks = data.get('weeks', {})
+            self.postings_file = data.get('postings_file')
+            self.postings_size = data.get('postings_size', 0)
+            if 'postings' in data:
+                # 旧格式：分组保存在trends.json中，下次保存时写出分组日志
+                self._postings = data['postings']
+                self._pending = dict(self._postings)
+
+    def _postings_path(self, name):
+        return os.path.join(os.path.dirname(self.path), name)
+
+    @property
+    def postings(self):
+        if self._postings is None:
+            self._postings = {}
+            if self.postings_file and os.path.exists(self._postings_path(self.postings_file)):
+                with open(self._postings_path(self.postings_file), 'rb') as f:
+                    for line in f.read(self.postings_size).splitlines():
+                        self._postings.update(json.loads(line))
+                        self._log_lines += 1
+        return self._postings
+
+    def _apply(self, groups, delta):
+        week = self.weeks.setdefault(groups['week'], {'total': 0})
+        week['total'] += delta
+        for dimension in DIMENSIONS:
+            counts = week.setdefault(dimension, {})
+            counts[groups[dimension]] = counts.get(groups[dimension], 0) + delta
+            if not counts[groups[dimension]]:
+                del counts[groups[dimension]]
+
+    def add(self, job_data):
+        """加入或更新一个职位，分组未变化时不做任何修改"""
+        job_id = job_data['基本信息']['job_id']
+        groups = posting_groups(job_data)
+        previous = self.postings.get(job_id)
+        if previous == groups:
+            return
+        if previous:
+            self._apply(previous, -1)
+        self._apply(groups, 1)
+        self.postings[job_id] = groups
+        self._pending[job_id] = groups
+
+    def update(self, job_data_list):
+        for job_data in job_data_list:
+            self.add(job_data)
+
+    def series(self, dimension=None):
+        """按周排列的统计：dimension为None时返回 {周: 职位数}，否则返回 {周: {分组: 职位数}}"""
+        if dimension is None:
+            return {week: counts['total'] for week, counts in sorted(self.weeks.items())}
+        return {week: counts.get(dimension, {}) for week, counts in sorted(self.weeks.items())}
+
+    def totals(self, dimension):
+        """所有周合计的各分组职位数"""
+        totals = {}
+        for counts in self.weeks.values():
+            for group, count in counts.get(dimension, {}).items():
+                totals[group] = totals.get(group, 0) + count
+        return totals
+
+    def _compact(self):
+        """把当前全部分组写成新一代日志文件，返回文件名"""
+        generation = int(self.postings_file.rsplit('.', 2)[1]) + 1 if self.postings_file else 1
+        name = f'{os.path.splitext(os.path.basename(self.path))[0]}_postings.{generation}.jsonl'
+        with open(self._postings_path(name), 'wb') as f:
+            for job_id, groups in self.postings.items():
+                f.write((json.dumps({job_id: groups}, ensure_ascii=False) + '\n').encode('utf-8'))
+        self._log_lines = len(self.postings)
+        return name
+
+    def save(self):
+        """追加有变化的职位分组，再原子地替换汇总结果；没有变化时不写任何文件"""
+        if not self._pending:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        postings = self.postings
+        old_file = self.postings_file
+        if (old_file is None or
+                self._log_lines + len(self._pending) > len(postings) * COMPACT_RATIO + COMPACT_MIN_LINES):
+            self.postings_file = self._compact()
+        else:
+            with open(self._postings_path(old_file), 'r+b') as f:
+                # 截掉上次中断时未完成的追加
+                f.truncate(self.postings_size)
+                f.seek(self.postings_size)
+                for job_id, groups in self._pending.items():
+                    f.write((json.dumps({job_id: groups}, ensure_ascii=False) + '\n').encode('utf-8'))
+            self._log_lines += len(self._pending)
+        self.postings_size = os.path.getsize(self._postings_path(self.postings_file))
+        atomic_write_json(self.path, {'weeks': self.weeks, 'postings_file': self.postings_file,
+                                      'postings_size': self.postings_size}, encoding='utf-8', indent=None)
+        if old_file and old_file != self.postings_file and os.path.exists(self._postings_path(old_file)):
+            os.remove(self._postings_path(old_file))
+        self._pending = {}
+
+
+def update_trends(job_data_list, path=TRENDS_FILE):
+    """用本次处理的职位增量更新趋势统计"""
+    trends = TrendAggregates(path)
+    trends.update(job_data_list)
+    trends.save()
+    return trends
+
+
+def record_snapshot(current_urls, previous_urls, new_job_urls, path=SNAPSHOTS_FILE):
+    """追加一条URL快照摘要：职位数，以及与上次相比新增、更新日期变化和消失的job_id
+
+    只记录变化的部分，不重复保存每天都在的职位；从第一条快照开始依次应用即可还原任意一次运行时的职位集合
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    current = {job['job_id'] for job in current_urls or [] if job.get('job_id')}
+    snapshot = {
+        'run_at': datetime.now().isoformat(timespec='seconds'),
+        'count': len(current_urls or []),
+        'new_job_ids': [job['job_id'] for job in new_job_urls or [] if job.get('job_id') and not job.get('updated')],
+        'updated_job_ids': [job['job_id'] for job in new_job_urls or [] if job.get('job_id') and job.get('updated')],
+        'closed_job_ids': [job['job_id'] for job in previous_urls or []
+                           if job.get('job_id') and job['job_id'] not in current],
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(snapshot, ensure_ascii=False) + '\n')
+
+
+def rebuild_trends(job_store=None, path=TRENDS_FILE):
+    """用职位存储中的全部职位重建趋势统计（只在首次使用或统计口径变化时需要）"""
+    from jrecin_store import JOB_STORE_FILE, JobStore
+
+    if os.path.exists(path):
+        old = TrendAggregates(path)
+        if old.postings_file and os.path.exists(old._postings_path(old.postings_file)):
+            os.remove(old._postings_path(old.postings_file))
+        os.remove(path)
+    trends = update_trends(job_store or JobStore(JOB_STORE_FILE), path)
+    print(f"趋势统计已重建，共{len(trends.postings)}个职位、{len(trends.weeks)}周")
+    return trends
+
+
+if __name__ == "__main__":
+    rebuild_trends()
@@ -0,0 +1,199 @@
+"""
+JRec-IN Portal 关注列表提醒
+把保存的查询条件（关键词、テニュアトラック、地区、最低年薪等）编译为判断函数，
+每次运行只对本次新增或内容变化的职位求值，匹配结果写成摘要邮件放入本地发件箱
+
+关注列表文件 jrecin_data/watchlists.json 示例:
+[
+  {"name": "kanto-econ-tenure", "keywords": ["経済学", "経済政策"], "tenure_track": true,
+   "regions": ["関東"], "salary_min": 6000000, "email": "me@example.com"}
+]
+"""
+
+import hashlib
+import json
+import os
+import re
+import smtplib
+from datetime import date, datetime
+from email.message import EmailMessage
+from email.utils import formatdate
+
+from jrecin_normalize import annual_salary, parse_date
+from jrecin_record import as_dict
+
+WATCHLIST_FILE = 'jrecin_data/watchlists.json'
+WATCHLIST_STATE_FILE = 'jrecin_data/watchlist_state.json'
+OUTBOX_DIR = 'jrecin_data/outbox'
+# 设置后摘要同时通过该SMTP服务器发送（例如本地的 python -m aiosmtpd -n），否则只写入发件箱
+SMTP_HOST = os.environ.get('JRECIN_SMTP_HOST')
+SMTP_FROM = os.environ.get('JRECIN_SMTP_FROM', 'jrecin@localhost')
+
+REGIONS = {
+    '北海道': ['北海道'],
+    '東北': ['青森', '岩手', '宮城', '秋田', '山形', '福島'],
+    '関東': ['茨城', '栃木', '群馬', '埼玉', '千葉', '東京', '神奈川'],
+    '中部': ['新潟', '富山', '石川', '福井', '山梨', '長野', '岐阜', '静岡', '愛知'],
+    '近畿': ['三重', '滋賀', '京都', '大阪', '兵庫', '奈良', '和歌山'],
+    '中国': ['鳥取', '島根', '岡山', '広島', '山口'],
+    '四国': ['徳島', '香川', '愛媛', '高知'],
+    '九州': ['福岡', '佐賀', '長崎', '熊本', '大分', '宮崎', '鹿児島', '沖縄'],
+}
+
+
+def _keyword_pattern(keywords):
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+
+
+def compile_watchlist(spec):
+    """把一个关注列表条件编译为判断函数 predicate(job_data) -> bool，所有条件都满足时为True"""
+    checks = []
+
+    if spec.get('keywords'):
+        keyword_re = _keyword_pattern(spec['keywords'])
+        checks.append(lambda job: keyword_re.search(_searchable_text(job)) is not None)
+
+    if spec.get('exclude'):
+        exclude_re = _keyword_pattern(spec['exclude'])
+        checks.append(lambda job: exclude_re.search(_searchable_text(job)) is None)
+
+    if spec.get('tenure_track'):
+        checks.append(lambda job: 'テニュアトラック' in (job['职位属性'].get('tenure_status', '') +
+                                                     job['基本信息'].get('position_title', '')))
+
+    if spec.get('regions'):
+        places = [place for region in spec['regions'] for place in REGIONS.get(region, [region])]
+        region_re = _keyword_pattern(places)
+        checks.append(lambda job: region_re.search(job['职位属性'].get('location', '')) is not None)
+
+    if spec.get('institution_types'):
+        type_re = _keyword_pattern(spec['institution_types'])
+        checks.append(lambda job: type_re.search(job['基本信息'].get('institution_type', '')) is not None)
+
+    if spec.get('salary_min'):
+        salary_min = spec['salary_min']
+        checks.append(lambda job: (job_annual_salary(job) or 0) >= salary_min)
+
+    if spec.get('active_only', True):
+        checks.append(_is_open)
+
+    return lambda job: all(check(job) for check in checks)
+
+
+def _searchable_text(job):
+    return ' '.join([
+        job['基本信息'].get('position_title', ''),
+        job['职位属性'].get('research_field', ''),
+        job['职位详情'].get('job_description', ''),
+    ])
+
+
+def job_annual_salary(job):
+    """职位换算后的年薪上限（日元），无法解析时返回None"""
+    conditions = job.get('薪资和工作条件', {})
+    return annual_salary(conditions.get('salary', '') + ' ' + conditions.get('salary_description', ''))
+
+
+def _is_open(job):
+    deadline = parse_date(job['基本信息'].get('application_deadline', ''))
+    return deadline is None or deadline >= date.today()
+
+
+def fingerprint(job_data):
+    """职位内容的指纹（忽略随日期变化的is_active），用于判断职位是否有变化"""
+    record = dict(as_dict(job_data))
+    record['其他信息'] = {key: value for key, value in record.get('其他信息', {}).items() if key != 'is_active'}
+    return hashlib.sha1(json.dumps(record, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_watchlists(path=WATCHLIST_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return json.load(f)
+
+
+class WatchlistEngine:
+    """对本次运行中变化的职位求值所有关注列表；state记录每个关注列表已提醒过的职位及其指纹"""
+
+    def __init__(self, watchlists=None, state_path=WATCHLIST_STATE_FILE, outbox_dir=OUTBOX_DIR):
+        self.watchlists = load_watchlists() if watchlists is None else watchlists
+        self.predicates = [(spec, compile_watchlist(spec)) for spec in self.watchlists]
+        self.state_path = state_path
+        self.outbox_dir = outbox_dir
+        self.state = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def evaluate(self, job_data_list):
+        """返回 {关注列表名称: [新匹配或内容变化的职位]}，已提醒过且内容未变的职位不再返回"""
+        matches = {}
+        for job_data in job_data_list:
+            job_id = job_data['基本信息']['job_id']
+            job_fingerprint = None
+            for spec, predicate in self.predicates:
+                if not predicate(job_data):
+                    continue
+                job_fingerprint = job_fingerprint or fingerprint(job_data)
+                seen = self.state.setdefault(spec['name'], {})
+                if seen.get(job_id) == job_fingerprint:
+                    continue
+                seen[job_id] = job_fingerprint
+                matches.setdefault(spec['name'], []).append(job_data)
+        return matches
+
+    def run(self, job_data_list):
+        """求值并把每个关注列表的匹配结果写成摘要，返回写出的摘要文件列表"""
+        if not self.predicates:
+            return []
+        matches = self.evaluate(job_data_list)
+        specs = {spec['name']: spec for spec in self.watchlists}
+        paths = [deliver_digest(specs[name], jobs, self.outbox_dir) for name, jobs in matches.items()]
+        self.save()
+        return paths
+
+    def save(self):
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(temp_path, self.state_path)
+
+
+def build_digest(spec, jobs):
+    """生成摘要邮件"""
+    message = EmailMessage()
+    message['Subject'] = f"[JRec-IN] {spec['name']}: {len(jobs)}个匹配职位"
+    message['From'] = SMTP_FROM
+    message['To'] = spec.get('email', SMTP_FROM)
+    message['Date'] = formatdate(localtime=True)
+
+    lines = []
+    for job in jobs:
+        basic = job['基本信息']
+        lines.append(f"{basic.get('position_title', '')}\n"
+                     f"  {basic.get('institution', '')} / {job['职位属性'].get('location', '')}\n"
+                     f"  截止日期: {basic.get('application_deadline', '')}\n"
+                     f"  {job['其他信息'].get('original_url', '')}\n")
+    message.set_content('\n'.join(lines))
+    return message
+
+
+def deliver_digest(spec, jobs, outbox_dir=OUTBOX_DIR):
+    """把摘要写入本地发件箱（.eml文件），设置了JRECIN_SMTP_HOST且关注列表有email时同时发送"""
+    os.makedirs(outbox_dir, exist_ok=True)
+    message = build_digest(spec, jobs)
+    slug = re.sub(r'[^\w-]+', '_', spec['name'])
+    path = os.path.join(outbox_dir, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{slug}.eml")
+    with open(path, 'wb') as f:
+        f.write(bytes(message))
+
+    if SMTP_HOST and spec.get('email'):
+        try:
+            with smtplib.SMTP(SMTP_HOST) as smtp:
+                smtp.send_message(message)
+        except (OSError, smtplib.SMTPException) as e:
+            print(f"发送关注列表摘要失败，已保留在发件箱: {e}")
+
+    print(f"关注列表 {spec['name']} 有{len(jobs)}个匹配职位，摘要已写入 {path}")
+    return path
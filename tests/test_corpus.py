@@ -0,0 +1,70 @@
+"""当前职位表：只写入有变化的职位并删除过期职位，变更日志的裁剪，以及按版本增量更新DataFrame"""
+
+from datetime import date
+
+import pytest
+
+import jrecin_corpus
+from jrecin_corpus import CorpusTable
+
+TODAY = date(2024, 6, 1)
+
+
+def job(job_id, title, deadline='2024/12/31'):
+    return {'基本信息': {'job_id': job_id, 'position_title': title},
+            '其他信息': {'application_deadline': deadline}}
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    table = CorpusTable(str(tmp_path / 'corpus.sqlite3'))
+    yield table
+    table.close()
+
+
+def test_merge_skips_unchanged_and_removes_expired(corpus):
+    assert corpus.version == 0
+    assert corpus.merge([job('D1', '教授'), job('D2', '准教授'), job('D3', '講師', '2024/06/10')],
+                        today=TODAY) == (3, 0)
+    assert corpus.version == 1
+
+    # 内容没有变化：不写入，版本号不变
+    assert corpus.merge([job('D1', '教授')], today=TODAY) == (0, 0)
+    assert corpus.version == 1
+
+    # D1有变化；D2的新截止日期已过，直接删除
+    assert corpus.merge([job('D1', '教授（改）'), job('D2', '准教授', '2024/05/01')], today=TODAY) == (1, 1)
+    assert corpus.changed_since(1) == {'D1', 'D2'}
+    # 表中的截止日期到期后，即使本次没有处理也会删除
+    assert corpus.merge([], today=date(2024, 6, 11)) == (0, 1)
+    assert [record.job_id for record in corpus.iter_jobs()] == ['D1']
+    assert corpus.changed_since(1) == {'D1', 'D2', 'D3'}
+    assert corpus.changed_since(2) == {'D3'}
+    assert corpus.changed_since(corpus.version) == set()
+
+
+def test_changelog_is_pruned(corpus, monkeypatch):
+    monkeypatch.setattr(jrecin_corpus, 'CHANGELOG_VERSIONS', 2)
+    for i in range(4):
+        corpus.merge([job('D1', f'教授{i}')], today=TODAY)
+    assert corpus.version == 4
+    # 只保留版本3和4的变更：更早的版本无法增量更新
+    assert corpus.changed_since(1) is None
+    assert corpus.changed_since(2) == {'D1'}
+    assert corpus.db.execute('SELECT MIN(version) FROM changes').fetchone()[0] == 3
+
+
+def test_frame_updates_base_incrementally(corpus):
+    corpus.merge([job('D1', '教授'), job('D2', '准教授')], today=TODAY)
+    base, version = corpus.frame()
+    assert sorted(base.index) == ['D1', 'D2']
+
+    assert corpus.frame(base, version)[0] is base
+    corpus.merge([job('D2', '准教授（改）'), job('D3', '講師'), job('D1', '教授', '2024/05/01')], today=TODAY)
+    frame, new_version = corpus.frame(base, version)
+    assert new_version == version + 1
+    assert sorted(frame.index) == ['D2', 'D3']
+    assert frame.loc['D2', 'position_title'] == '准教授（改）'
+    assert base.loc['D2', 'position_title'] == '准教授'
+    full, _ = corpus.frame()
+    assert full.sort_index().equals(frame.sort_index())
@@ -0,0 +1,58 @@
+"""三个互相近似重复的职位，无论登记顺序如何，都应归入发布最早（job_id最小）的职位；代表被移除后重新选出代表"""
+
+import itertools
+
+import pytest
+
+from jrecin_dedup import NearDupIndex, estimate_similarity, minhash_signature
+
+BASE = ('経済学部において経済理論、計量経済学、公共経済学に関する講義および演習を担当し、'
+        '学部・大学院の教育研究指導に従事する。博士の学位を有する者、または着任時までに取得見込みの者。'
+        '日本語による授業担当が可能であり、大学運営にも積極的に協力できる者。')
+TEXTS = {
+    'D100': BASE + '着任予定は2025年4月1日。',
+    'D200': BASE + '着任予定は2025年4月1日以降。',
+    'D300': BASE + '着任予定は2025年4月1日以降のできるだけ早い時期。',
+}
+
+
+def test_postings_are_mutual_near_duplicates():
+    signatures = {job_id: minhash_signature(text) for job_id, text in TEXTS.items()}
+    for a, b in itertools.combinations(signatures, 2):
+        assert estimate_similarity(signatures[a], signatures[b]) >= 0.8
+
+
+@pytest.mark.parametrize('order', list(itertools.permutations(TEXTS)))
+def test_canonical_is_earliest_posting(tmp_path, order):
+    index = NearDupIndex(path=str(tmp_path / 'near_dup_index.json'))
+    for job_id in order:
+        index.check(job_id, TEXTS[job_id])
+
+    assert index.duplicate_of('D100') is None
+    assert index.duplicate_of('D200') == 'D100'
+    assert index.duplicate_of('D300') == 'D100'
+    assert {canonical: sorted(job_ids) for canonical, job_ids in index.groups().items()} == {'D100': ['D200', 'D300']}
+
+
+def test_removing_canonical_reassigns_members(tmp_path):
+    index = NearDupIndex(path=str(tmp_path / 'near_dup_index.json'))
+    for job_id in TEXTS:
+        index.check(job_id, TEXTS[job_id])
+
+    index.remove('D100')
+    assert index.duplicate_of('D200') is None
+    assert index.duplicate_of('D300') == 'D200'
+    assert index.groups() == {'D200': ['D300']}
+
+
+def test_canonical_with_changed_content_leaves_group(tmp_path):
+    index = NearDupIndex(path=str(tmp_path / 'near_dup_index.json'))
+    for job_id in TEXTS:
+        index.check(job_id, TEXTS[job_id])
+
+    other = ('法学部において民法、商法に関する講義を担当する。司法試験の指導経験を有する者が望ましい。'
+             '研究業績一覧、教育研究に関する抱負を提出すること。')
+    assert index.check('D100', other) is None
+    assert index.duplicate_of('D300') == 'D200'
+    assert 'D100' not in index.groups()
+    assert all(canonical in index.signatures for canonical in index.groups())
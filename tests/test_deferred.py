@@ -0,0 +1,28 @@
+"""上次推迟的职位在本次没有轮到处理时（例如被max_jobs截断）不能丢失"""
+
+from datetime import date, timedelta
+
+from jrecin_scraper import still_deferred_jobs
+
+
+def url(job_id, deadline=None):
+    deadline = deadline or (date.today() + timedelta(days=30))
+    return {'job_id': job_id, 'url': f'https://jrecin.jst.go.jp/seek/SeekJorDetail?id={job_id}',
+            'application_deadline': deadline.strftime('%Y/%m/%d')}
+
+
+def test_unprocessed_previous_deferrals_are_kept():
+    previous = [url('D1'), url('D2'), url('D3')]
+    remaining = still_deferred_jobs(previous, [], attempted={'D1'})
+    assert [job['job_id'] for job in remaining] == ['D2', 'D3']
+
+
+def test_budget_deferrals_come_first_without_duplicates():
+    previous = [url('D1'), url('D2')]
+    remaining = still_deferred_jobs(previous, [url('D2'), url('D9')], attempted={'D2', 'D9'})
+    assert [job['job_id'] for job in remaining] == ['D2', 'D9', 'D1']
+
+
+def test_expired_previous_deferrals_are_dropped():
+    previous = [url('D1', date.today() - timedelta(days=1)), url('D2')]
+    assert [job['job_id'] for job in still_deferred_jobs(previous, [], attempted=set())] == ['D2']
@@ -0,0 +1,66 @@
+"""增量导出：JSONL只追加有变化的行和删除标记，整体重写的格式没有变化时保留原文件，筛选条件改变后旧状态失效"""
+
+import csv
+import json
+
+from jrecin_export import export_jobs, make_sink
+
+
+def job(job_id, title, description=''):
+    return {'基本信息': {'job_id': job_id, 'position_title': title},
+            '职位属性': {}, '职位详情': {'job_description': description}}
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def read_csv_ids(path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+    return sorted(row[rows[0].index('职位ID')] for row in rows[1:])
+
+
+def run(tmp_path, jobs, where=None):
+    sinks = [make_sink('jsonl', str(tmp_path / 'jobs'), ['job_id', 'position_title']),
+             make_sink('csv', str(tmp_path / 'jobs'), ['job_id', 'position_title'])]
+    return export_jobs(jobs, sinks, where=where, incremental=True, state_path=str(tmp_path / 'state.json'))
+
+
+def test_incremental_appends_changes_and_deletions(tmp_path):
+    jsonl, csv_path = str(tmp_path / 'jobs.jsonl'), str(tmp_path / 'jobs.csv')
+    assert run(tmp_path, [job('D1', '教授'), job('D2', '准教授')]) == {jsonl: 2, csv_path: 2}
+
+    # 没有变化：JSONL不追加，CSV保留原文件
+    with open(csv_path, 'a', encoding='utf-8-sig') as f:
+        f.write('marker\n')
+    assert run(tmp_path, [job('D1', '教授'), job('D2', '准教授')])[jsonl] == 0
+    assert len(read_jsonl(jsonl)) == 2
+    assert open(csv_path, encoding='utf-8-sig').read().endswith('marker\n')
+
+    # D1有变化、D3是新职位：只追加这两行，CSV整体重写
+    assert run(tmp_path, [job('D1', '教授（改）'), job('D2', '准教授'), job('D3', '講師')])[jsonl] == 2
+    assert [row['job_id'] for row in read_jsonl(jsonl)] == ['D1', 'D2', 'D1', 'D3']
+    assert read_csv_ids(csv_path) == ['D1', 'D2', 'D3']
+
+    # D2已不在导出范围内：追加删除标记
+    run(tmp_path, [job('D1', '教授（改）'), job('D3', '講師')])
+    assert read_jsonl(jsonl)[-1] == {'job_id': 'D2', '_deleted': True}
+    assert read_csv_ids(csv_path) == ['D1', 'D3']
+
+
+def test_changed_where_rewrites_and_replaces_state(tmp_path):
+    jsonl = str(tmp_path / 'jobs.jsonl')
+    jobs = [job('D1', '教授', '経済学'), job('D2', '准教授', '法学')]
+    run(tmp_path, jobs)
+
+    # 同一路径换了筛选条件：上次的状态不适用，完整重写而不是追加
+    assert run(tmp_path, jobs, where={'keywords': ['経済学']})[jsonl] == 1
+    assert [row['job_id'] for row in read_jsonl(jsonl)] == ['D1']
+    state = json.load(open(tmp_path / 'state.json', encoding='utf-8'))
+    assert len(state) == 2 and all('経済学' in key for key in state)
+
+    # 新条件下再次导出：只追加变化
+    assert run(tmp_path, jobs + [job('D3', '講師', '経済学')], where={'keywords': ['経済学']})[jsonl] == 1
+    assert [row['job_id'] for row in read_jsonl(jsonl)] == ['D1', 'D3']
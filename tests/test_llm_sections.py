@@ -0,0 +1,42 @@
+"""整页提示词只包含去掉HTML标记的正文，是否分段按实际发送的提示词长度判断"""
+
+import jrecin_llm_analyzer
+from jrecin_llm_sections import MAX_PROMPT_CHARS, page_text
+
+
+def card(paragraphs, attributes=''):
+    body = ''.join(f'<p class="text" {attributes}>{text}</p>' for text in paragraphs)
+    return (f'<div class="card"><p class="card_subTitle">仕事内容</p>{body}'
+            f'<p class="card_subTitle">給与</p><p>年俸制</p></div>')
+
+
+def run(monkeypatch, html):
+    sent = []
+    sectioned = []
+    monkeypatch.setattr(jrecin_llm_analyzer, 'query_ollama', lambda prompt: sent.append(prompt) or '{}')
+    monkeypatch.setattr(jrecin_llm_analyzer, 'extract_in_sections',
+                        lambda card_html, query, extract: sectioned.append(card_html) or {})
+    jrecin_llm_analyzer.analyze_html_content(html)
+    return sent, sectioned
+
+
+def test_page_text_strips_markup():
+    text = page_text(card(['講義担当'], 'style="margin:0"'))
+    assert '<' not in text
+    assert '【仕事内容】\n講義担当' in text
+    assert '【給与】\n年俸制' in text
+
+
+def test_markup_heavy_posting_is_sent_without_tags(monkeypatch):
+    # 标签和属性远超上限，正文很短：整页发送，提示词中不含HTML
+    attributes = 'data-x="' + 'x' * 200 + '"'
+    html = card([f'講義担当{i}' for i in range(100)], attributes)
+    assert len(html) > MAX_PROMPT_CHARS
+    sent, sectioned = run(monkeypatch, html)
+    assert not sectioned
+    assert len(sent) == 1 and len(sent[0]) <= MAX_PROMPT_CHARS and '<p' not in sent[0]
+
+
+def test_long_text_is_split(monkeypatch):
+    sent, sectioned = run(monkeypatch, card(['経済学の講義および演習を担当する。' * 20] * 40))
+    assert sectioned and not sent
@@ -0,0 +1,44 @@
+"""同一职位的两次抓取只有CSRF令牌等易变部分不同时，HTML归档和解析缓存都应视为相同内容"""
+
+from jrecin_archive import HtmlArchive
+from jrecin_normalize import page_hash
+from jrecin_parse_cache import ParseCache
+
+PAGE = """<html><head>
+<meta name="_csrf" content="{token}">
+<meta name="_csrf_header" content="X-CSRF-TOKEN">
+<script>var session = "{token}";</script>
+</head><body>
+<form action="/seek/SeekJorDetail;jsessionid={token}"><input type="hidden" name="_csrf" value="{token}"></form>
+<div class="card"><p class="card_subTitle">仕事内容</p><p>{content}</p></div>
+</body></html>"""
+
+
+def fetch(token, content='経済学部における講義・演習の担当'):
+    return PAGE.format(token=token, content=content)
+
+
+def test_page_hash_ignores_volatile_parts():
+    assert page_hash(fetch('a1b2c3')) == page_hash(fetch('ffee99'))
+    assert page_hash(fetch('a1b2c3')) != page_hash(fetch('a1b2c3', content='統計学の担当'))
+
+
+def test_archive_stores_one_version(tmp_path):
+    archive = HtmlArchive(str(tmp_path / 'archive'))
+    first = archive.put('D1', fetch('a1b2c3'))
+    second = archive.put('D1', fetch('ffee99'))
+    assert first == second
+    assert len(archive.history('D1')) == 1
+    assert len(archive.blobs) == 1
+
+
+def test_parse_cache_hits_across_tokens(tmp_path):
+    from jrecin_analyzer import PARSER_VERSION, parse_job_details_cached
+
+    cache = ParseCache(PARSER_VERSION, str(tmp_path / 'parse_cache.sqlite3'))
+    url = 'https://jrecin.jst.go.jp/seek/SeekJorDetail?id=D1'
+    first, first_cached = parse_job_details_cached(fetch('a1b2c3'), url, 'D1', cache)
+    second, second_cached = parse_job_details_cached(fetch('ffee99'), url, 'D1', cache)
+    cache.close()
+    assert (first_cached, second_cached) == (False, True)
+    assert first == second
@@ -0,0 +1,15 @@
+"""查询名称在替换特殊字符后仍然互不相同"""
+
+from jrecin_scraper import normalize_queries
+
+
+def test_sanitized_names_are_unique():
+    queries = normalize_queries([
+        {'name': '経済/政策', 'keywords': '経済政策'},
+        {'name': '経済_政策', 'keywords': '政策'},
+        {'name': 'q4', 'keywords': '経済学'},
+        '経済思想',
+        {'name': '経済 政策', 'keywords': '公共政策'},
+    ])
+    assert [query['name'] for query in queries] == ['経済_政策', '経済_政策_2', 'q4', 'q4_2', '経済_政策_3']
+    assert [query['keywords'] for query in queries] == ['経済政策', '政策', '経済学', '経済思想', '公共政策']
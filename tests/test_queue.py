@@ -0,0 +1,136 @@
+"""工作队列：租约过期、跨进程共享的请求时间槽、汇总时的updated校验，以及RemoteQueue的参数映射和令牌"""
+
+import socket
+import threading
+import time
+
+import pytest
+
+from jrecin_queue import MAX_SLOT_AHEAD, RemoteQueue, WorkQueue, serve_queue
+
+
+def make_queue(tmp_path, **kwargs):
+    kwargs.setdefault('stage_intervals', {})
+    return WorkQueue(str(tmp_path / 'queue.sqlite3'), **kwargs)
+
+
+def test_expired_lease_is_requeued_then_failed(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=-1, max_attempts=2)
+    queue.enqueue('parse', 'D1', {})
+
+    first = queue.lease(['parse'], 'w1')
+    assert first['attempts'] == 1
+    # 租约已过期：下一次领取时重新排队，原工作进程的完成结果被丢弃
+    second = queue.lease(['parse'], 'w2')
+    assert second['id'] == first['id'] and second['attempts'] == 2
+    assert not queue.complete(first['id'], 'w1', {'stale': True})
+
+    assert queue.requeue_expired() == 1
+    assert queue.stats()['tasks']['parse'] == {'failed': 1}
+    assert queue.lease(['parse'], 'w3') is None
+
+
+def test_heartbeat_keeps_only_own_live_leases(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue('parse', 'D1', {})
+    task = queue.lease(['parse'], 'w1')
+    assert queue.heartbeat('w1', ['parse'], [task['id']]) == [task['id']]
+    assert queue.heartbeat('w2', ['parse'], [task['id']]) == []
+
+
+def test_fetch_slots_are_shared_across_queue_handles(tmp_path):
+    interval = MAX_SLOT_AHEAD / 2.5
+    first = make_queue(tmp_path, stage_intervals={'fetch': interval})
+    second = make_queue(tmp_path, stage_intervals={'fetch': interval})
+    first.enqueue_many('fetch', [(f'D{i}', {}, 0) for i in range(4)])
+
+    delays = [first.lease(['fetch'], 'w1')['delay'], second.lease(['fetch'], 'w2')['delay'],
+              first.lease(['fetch'], 'w3')['delay']]
+    assert delays[0] == pytest.approx(0, abs=0.5)
+    assert delays[1] == pytest.approx(interval, abs=0.5)
+    assert delays[2] == pytest.approx(2 * interval, abs=0.5)
+    # 下一个时间槽超过 MAX_SLOT_AHEAD：暂不分配，任务留在队列中
+    assert second.lease(['fetch'], 'w4') is None
+    assert second.stats()['tasks']['fetch']['pending'] == 1
+
+
+def test_lease_expiry_counts_from_the_reserved_slot(tmp_path):
+    queue = make_queue(tmp_path, stage_intervals={'fetch': 10}, lease_seconds=5)
+    queue.enqueue_many('fetch', [('D1', {}, 0), ('D2', {}, 0)])
+    queue.lease(['fetch'], 'w1')
+    waiting = queue.lease(['fetch'], 'w2')
+    # 等待时间槽期间租约不会过期
+    assert waiting['lease_expires'] - time.time() > 10
+
+
+def test_mark_collected_skips_tasks_rerun_after_reading(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue_many('parse', [('D1', {'html': 'a'}, 0), ('D2', {'html': 'b'}, 0)])
+    for worker in ('w1', 'w2'):
+        task = queue.lease(['parse'], worker)
+        queue.complete(task['id'], worker, {'key': task['key']})
+
+    taken = queue.take_results('parse')
+    assert [task['key'] for task in taken] == ['D1', 'D2']
+    # take_results不改变状态，可以分页重复读取
+    assert [task['key'] for task in queue.take_results('parse', limit=1, after_id=taken[0]['id'])] == ['D2']
+
+    # 读取之后D2被重新抓取并再次完成：旧的updated不匹配，新结果留到下次汇总
+    time.sleep(0.01)
+    queue.enqueue('parse', 'D2', {'html': 'c'})
+    task = queue.lease(['parse'], 'w3')
+    queue.complete(task['id'], 'w3', {'key': 'D2', 'version': 2})
+
+    assert queue.mark_collected([(task['id'], task['updated']) for task in taken]) == 1
+    remaining = queue.take_results('parse')
+    assert [(task['key'], task['result']) for task in remaining] == [('D2', {'key': 'D2', 'version': 2})]
+
+
+def test_follow_up_does_not_touch_leased_task(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue('fetch', 'D1', {})
+    queue.enqueue('parse', 'D1', {'html': 'old'})
+    leased = queue.lease(['parse'], 'w1')
+    fetch = queue.lease(['fetch'], 'w2')
+    assert queue.complete(fetch['id'], 'w2', None, [('parse', 'D1', {'html': 'new'}, 0)])
+    assert queue.complete(leased['id'], 'w1', {'done': True})
+
+
+def test_remote_arguments_map_to_work_queue_parameters():
+    assert RemoteQueue._named('lease', (['fetch'], 'w1'), {}) == {'stages': ['fetch'], 'worker_id': 'w1'}
+    assert RemoteQueue._named('take_results', ('parse',), {'after_id': 5}) == {'stage': 'parse', 'after_id': 5}
+    assert RemoteQueue._named('complete', (3, 'w1', {'a': 1}), {'follow_ups': []}) == {
+        'task_id': 3, 'worker_id': 'w1', 'result': {'a': 1}, 'follow_ups': []}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_remote_queue_round_trip_and_token(tmp_path, monkeypatch):
+    monkeypatch.delenv('JRECIN_QUEUE_TOKEN', raising=False)
+    queue = make_queue(tmp_path)
+    port = free_port()
+    threading.Thread(target=serve_queue, args=(queue, '127.0.0.1', port, 'secret'), daemon=True).start()
+    url = f'http://127.0.0.1:{port}'
+    remote = RemoteQueue(url, 'secret')
+    for _ in range(50):
+        try:
+            remote.stats()
+            break
+        except Exception:
+            time.sleep(0.05)
+
+    assert remote.enqueue('parse', 'D1', {'html': 'x'}, 0)
+    task = remote.lease(['parse'], 'w1')
+    assert task['key'] == 'D1' and task['payload'] == {'html': 'x'}
+    assert remote.complete(task['id'], 'w1', {'ok': True}, [])
+    taken = remote.take_results('parse', 10)
+    assert remote.mark_collected([(t['id'], t['updated']) for t in taken]) == 1
+
+    with pytest.raises(RuntimeError):
+        RemoteQueue(url, 'wrong').stats()
+    with pytest.raises(ValueError):
+        serve_queue(queue, '127.0.0.1', free_port(), token='')
@@ -0,0 +1,32 @@
+"""薪资解析只取带「円」或紧跟在年俸、月給等词之后的金额，不把人数、日期等数字当作薪资"""
+
+import pytest
+
+from jrecin_normalize import annual_salary, parse_salary_range
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('年収 500万円～800万円', (5000000, 8000000, 'year')),
+    ('500～800万円', (5000000, 8000000, None)),
+    ('5,000,000円-8,000,000円', (5000000, 8000000, None)),
+    ('月給30万円', (300000, 300000, 'month')),
+    ('年俸 600万', (6000000, 6000000, 'year')),
+    ('月給：30万～40万', (300000, 400000, 'month')),
+    ('時給1,500円', (1500, 1500, 'hour')),
+    ('募集人員 2名、年俸500万円', (5000000, 5000000, 'year')),
+    ('2025年4月1日着任、月給35万円（経験による）', (350000, 350000, 'month')),
+    ('任期5年、4月1日から年俸800万円', (8000000, 8000000, 'year')),
+])
+def test_parse_salary_range(text, expected):
+    salary = parse_salary_range(text)
+    assert (salary['min'], salary['max'], salary['period']) == expected
+
+
+@pytest.mark.parametrize('text', ['', '本学規程による', '年俸制', '募集人員 2名', '2025年4月1日着任', '週5日勤務'])
+def test_numbers_without_salary_context_are_ignored(text):
+    assert parse_salary_range(text) is None
+    assert annual_salary(text) is None
+
+
+def test_annual_salary_uses_period():
+    assert annual_salary('月給30万円') == 3600000
@@ -0,0 +1,69 @@
+"""检索索引：BM25只追加变化的职位，向量模型在第一次计算向量时才加载，加载失败时（auto）退回BM25"""
+
+import os
+import sys
+import types
+
+import jrecin_search
+from jrecin_search import SemanticIndex
+
+
+def job(job_id, title):
+    return {'基本信息': {'job_id': job_id, 'position_title': title}}
+
+
+def test_bm25_appends_changes_and_replays_them(tmp_path):
+    index = SemanticIndex(str(tmp_path), backend='bm25')
+    index.add_jobs([job('D1', '経済学 講義'), job('D2', '法学 講義')])
+    index.save()
+    base = (tmp_path / 'bm25.json').read_bytes()
+
+    index.add_job(job('D1', '経済学 演習'))
+    index.index.remove('D2')
+    index.save()
+    assert (tmp_path / 'bm25.json').read_bytes() == base
+    assert len((tmp_path / 'bm25.log.jsonl').read_text(encoding='utf-8').splitlines()) == 2
+
+    # 中断时写了一半的最后一行被忽略
+    with open(tmp_path / 'bm25.log.jsonl', 'a', encoding='utf-8') as f:
+        f.write('{"D9": {"経')
+    reloaded = SemanticIndex(str(tmp_path), backend='bm25')
+    assert sorted(reloaded.index.doc_terms) == ['D1']
+    assert [job_id for job_id, _ in reloaded.search('演習')] == ['D1']
+
+
+def test_bm25_compacts_long_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(jrecin_search, 'BM25_COMPACT_RATIO', 0)
+    monkeypatch.setattr(jrecin_search, 'BM25_COMPACT_MIN_LINES', 2)
+    index = SemanticIndex(str(tmp_path), backend='bm25')
+    index.add_jobs([job('D1', '経済学'), job('D2', '法学')])
+    index.save()
+    index.add_job(job('D1', '経済学 演習'))
+    index.save()
+    assert os.path.getsize(tmp_path / 'bm25.log.jsonl') > 0
+    index.add_jobs([job('D2', '法学 演習'), job('D3', '商学')])
+    index.save()
+    assert os.path.getsize(tmp_path / 'bm25.log.jsonl') == 0
+    assert sorted(SemanticIndex(str(tmp_path), backend='bm25').index.doc_terms) == ['D1', 'D2', 'D3']
+
+
+def test_model_loads_lazily_and_falls_back(tmp_path, monkeypatch):
+    loads = []
+
+    class SentenceTransformer:
+        def __init__(self, *args, **kwargs):
+            loads.append(kwargs)
+            raise OSError('no local model')
+
+    monkeypatch.setitem(sys.modules, 'sentence_transformers',
+                        types.SimpleNamespace(SentenceTransformer=SentenceTransformer))
+    monkeypatch.setattr(jrecin_search.importlib.util, 'find_spec', lambda name: object())
+    monkeypatch.delenv('HF_HUB_OFFLINE', raising=False)
+
+    index = SemanticIndex(str(tmp_path))
+    assert index.backend == 'embedding' and not loads
+    index.add_job(job('D1', '経済学 講義'))
+    assert loads == [{'device': 'cpu', 'local_files_only': True}]
+    assert index.backend == 'bm25'
+    assert [job_id for job_id, _ in index.search('経済')] == ['D1']
+    assert 'HF_HUB_OFFLINE' not in os.environ
@@ -0,0 +1,91 @@
+"""职位存储的磁盘索引（过期、截断、损坏时的补扫）和JSON数组的流式读取"""
+
+import json
+import os
+
+import pytest
+
+from jrecin_store import JobStore, iter_json_list
+
+
+def job(job_id, title):
+    return {'基本信息': {'job_id': job_id, 'position_title': title}}
+
+
+def test_stale_index_rescans_appended_records(tmp_path):
+    path = str(tmp_path / 'store.jsonl')
+    store = JobStore(path)
+    store.put_many([job('D1', 'a'), job('D2', 'b')])
+    # 追加后未保存索引就中断
+    store.put_many([job('D3', 'c'), job('D1', 'a2')], sync=False)
+
+    reopened = JobStore(path)
+    assert reopened.ids() == ['D2', 'D3', 'D1']
+    assert reopened.get('D1')['基本信息']['position_title'] == 'a2'
+    assert [record['基本信息']['job_id'] for record in reopened] == ['D2', 'D3', 'D1']
+    assert json.load(open(path + '.idx', encoding='utf-8'))['size'] == os.path.getsize(path)
+
+
+def test_half_written_last_line_is_truncated(tmp_path):
+    path = str(tmp_path / 'store.jsonl')
+    JobStore(path).put_many([job('D1', 'a')])
+    size = os.path.getsize(path)
+    with open(path, 'ab') as f:
+        f.write('{"基本信息": {"job_id": "D2"'.encode('utf-8'))
+    os.remove(path + '.idx')
+
+    store = JobStore(path)
+    assert store.ids() == ['D1']
+    assert os.path.getsize(path) == size
+    store.put(job('D2', 'b'))
+    assert JobStore(path).get('D2')['基本信息']['position_title'] == 'b'
+
+
+def test_index_for_a_longer_file_is_discarded(tmp_path):
+    path = str(tmp_path / 'store.jsonl')
+    JobStore(path).put_many([job('D1', 'a'), job('D2', 'b'), job('D3', 'c')])
+    # 数据文件被替换为更短的内容，索引中的偏移已失效
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(job('D9', 'z'), ensure_ascii=False) + '\n')
+
+    store = JobStore(path)
+    assert store.ids() == ['D9']
+    assert store.get('D1') is None
+
+
+def test_corrupt_index_is_rebuilt(tmp_path):
+    path = str(tmp_path / 'store.jsonl')
+    JobStore(path).put_many([job('D1', 'a'), job('D2', 'b')])
+    with open(path + '.idx', 'w', encoding='utf-8') as f:
+        f.write('{"size": 12, "offs')
+    store = JobStore(path)
+    assert store.ids() == ['D1', 'D2']
+    assert store.get('D2')['基本信息']['position_title'] == 'b'
+
+
+ITEMS = [
+    {'job_id': 'D1', 'title': '教授 [経済学], "理論"', 'nested': {'list': [1, [2, {'x': ']'}]], 'empty': {}}},
+    {'job_id': 'D2', 'text': 'line\nbreak \\ backslash é 😀', 'values': [1.5e3, -0, True, None]},
+    12345678901234567890,
+    'plain ] , string',
+    [],
+]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 65536])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_iter_json_list_reads_nested_and_escaped_items(tmp_path, chunk_size, indent):
+    path = tmp_path / 'list.json'
+    path.write_text(json.dumps(ITEMS, ensure_ascii=bool(indent), indent=indent), encoding='utf-8-sig')
+    assert list(iter_json_list(str(path), chunk_size=chunk_size)) == ITEMS
+
+
+def test_iter_json_list_edge_cases(tmp_path):
+    path = tmp_path / 'list.json'
+    path.write_text(' [ ] ', encoding='utf-8')
+    assert list(iter_json_list(str(path), chunk_size=2)) == []
+    path.write_text('[1, 2, 3]', encoding='utf-8')
+    assert list(iter_json_list(str(path), chunk_size=2)) == [1, 2, 3]
+    path.write_text('{"a": 1}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_json_list(str(path)))